@@ -0,0 +1,294 @@
+# backend/aggregation.py
+"""
+Income / earning / expense totals of a profile's transactions, bucketed by
+day, week (Monday first), month or category over any date range.
+
+Rows are turned into columnar NumPy arrays once (TxFrame); every grouping is
+then one masked np.bincount over (bucket, kind), so a year of transactions
+or 100k+ rows costs milliseconds, not a Python loop per row.
+
+    frame = await load_transactions(profile_id, start, end)
+    aggregate(frame, start, end, "week")
+
+net = income + earning - expense. Time buckets cover the whole range (empty
+ones are zero) and are clipped to it: a week that starts before `start` is
+reported from `start`.
+
+Plain totals for a range don't need the rows at all: period_totals() asks
+Postgres (sql/transaction_totals.sql) for the sums in one round-trip.
+"""
+import time
+import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from logs import get_logger
+from supabase_rest import arpc, asbr_all
+
+KINDS = ("income", "earning", "expense")
+_KIND_INDEX = {k: i for i, k in enumerate(KINDS)}
+GROUP_BYS = ("day", "week", "month", "category", "total")
+PERIODS = (
+    "today",
+    "this_week",
+    "last_week",
+    "this_month",
+    "last_month",
+    "this_quarter",
+    "last_quarter",
+    "this_year",
+    "last_year",
+)
+# the chat tool's cap: more buckets than this is not an answer anyone reads
+MAX_BUCKETS = 120
+PAGE_SIZE = 1000  # Supabase max-rows
+
+# when transaction_totals is not deployed, sum client-side and ask again after this
+RPC_RETRY_SECONDS = 300
+
+_EPOCH = np.datetime64("1970-01-01", "D")
+_rpc_missing_until = 0.0
+
+log = get_logger("surra.aggregation")
+
+
+class TxFrame:
+    """Transactions as arrays: day (days since epoch), kind (index into KINDS), amount, category code."""
+
+    def __init__(
+        self,
+        day: np.ndarray,
+        kind: np.ndarray,
+        amount: np.ndarray,
+        category: np.ndarray,
+        categories: List[Any],
+        source_rows: Optional[int] = None,
+    ):
+        self.day = day
+        self.kind = kind
+        self.amount = amount
+        self.category = category
+        self.categories = categories  # code -> category_id (None = uncategorized)
+        # rows it was built from, including the dropped ones (no date, unknown type)
+        self.source_rows = int(day.size) if source_rows is None else source_rows
+
+    def __len__(self) -> int:
+        return int(self.day.size)
+
+    def kind_counts(self) -> Dict[str, int]:
+        return dict(zip(KINDS, np.bincount(self.kind, minlength=len(KINDS)).tolist()))
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]]) -> "TxFrame":
+        """Rows with a date, a known type and an amount; anything else is dropped."""
+        n = len(rows)
+        dates = np.array([str(r.get("date") or "")[:10] for r in rows], dtype="datetime64[D]")
+        kind = np.fromiter(
+            (_KIND_INDEX.get(str(r.get("type") or "").lower(), -1) for r in rows), dtype=np.int8, count=n
+        )
+        amount = np.fromiter((float(r.get("amount") or 0) for r in rows), dtype=np.float64, count=n)
+        codes: Dict[Any, int] = {}
+        category = np.fromiter(
+            (codes.setdefault(r.get("category_id"), len(codes)) for r in rows), dtype=np.int32, count=n
+        )
+        keep = ~np.isnat(dates) & (kind >= 0)
+        return cls(
+            (dates[keep] - _EPOCH).astype(np.int64),
+            kind[keep],
+            amount[keep],
+            category[keep],
+            list(codes),
+            n,
+        )
+
+
+def _day(d: datetime.date) -> int:
+    return int((np.datetime64(d, "D") - _EPOCH).astype(np.int64))
+
+
+def _month_index(d: datetime.date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+def _time_buckets(by: str, start: datetime.date, end: datetime.date) -> Tuple[int, List[Tuple[datetime.date, datetime.date]]]:
+    """Offset of bucket 0 and each bucket's (first, last) day, clipped to [start, end]."""
+    if by == "day":
+        n = (end - start).days + 1
+        return _day(start), [(start + datetime.timedelta(days=i),) * 2 for i in range(n)]
+    if by == "week":
+        week0 = start - datetime.timedelta(days=start.weekday())
+        n = (end - week0).days // 7 + 1
+        spans = []
+        for i in range(n):
+            first = week0 + datetime.timedelta(days=7 * i)
+            spans.append((max(first, start), min(first + datetime.timedelta(days=6), end)))
+        return _day(week0), spans
+    if by == "month":
+        m0 = _month_index(start)
+        spans = []
+        for m in range(m0, _month_index(end) + 1):
+            first = datetime.date(m // 12, m % 12 + 1, 1)
+            nxt = datetime.date((m + 1) // 12, (m + 1) % 12 + 1, 1)
+            spans.append((max(first, start), min(nxt - datetime.timedelta(days=1), end)))
+        return m0, spans
+    return 0, [(start, end)]  # total
+
+
+def _totals(sums: np.ndarray, count: int) -> Dict[str, Any]:
+    income, earning, expense = (round(float(v), 2) for v in sums)
+    return {
+        "income": income,
+        "earning": earning,
+        "expense": expense,
+        "net": round(income + earning - expense, 2),
+        "count": count,
+    }
+
+
+def check_buckets(start: datetime.date, end: datetime.date, by: str, max_buckets: int = MAX_BUCKETS) -> None:
+    """Raise ValueError when grouping [start, end] by `by` gives more than max_buckets time buckets."""
+    if by in ("day", "week", "month") and end >= start:
+        n = len(_time_buckets(by, start, end)[1])
+        if n > max_buckets:
+            raise ValueError(f"{n} {by} buckets is too many (max {max_buckets}); use a coarser group_by")
+
+
+def aggregate(frame: TxFrame, start: datetime.date, end: datetime.date, by: str = "day") -> Dict[str, Any]:
+    """Buckets for transactions dated in [start, end]; raises ValueError for a bad group_by or range."""
+    if by not in GROUP_BYS:
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_BYS)}")
+    if end < start:
+        raise ValueError("end_date is before start_date")
+
+    mask = (frame.day >= _day(start)) & (frame.day <= _day(end))
+    day, kind, amount = frame.day[mask], frame.kind[mask], frame.amount[mask]
+
+    if by == "category":
+        key = frame.category[mask]
+        n = len(frame.categories)
+    else:
+        origin, spans = _time_buckets(by, start, end)
+        n = len(spans)
+        if by == "day":
+            key = day - origin
+        elif by == "week":
+            key = (day - origin) // 7
+        elif by == "month":
+            months = (_EPOCH + day.astype("timedelta64[D]")).astype("datetime64[M]").astype(np.int64)
+            key = months + 1970 * 12 - origin
+        else:
+            key = np.zeros(day.size, dtype=np.int64)
+
+    nk = len(KINDS)
+    sums = np.bincount(key * nk + kind, weights=amount, minlength=n * nk).reshape(n, nk)
+    counts = np.bincount(key, minlength=n)
+
+    buckets: List[Dict[str, Any]] = []
+    if by == "category":
+        for i in np.flatnonzero(counts):
+            buckets.append({"category_id": frame.categories[i], **_totals(sums[i], int(counts[i]))})
+        buckets.sort(key=lambda b: b["expense"], reverse=True)
+    else:
+        for i, (first, last) in enumerate(spans):
+            bucket = {"date": first.isoformat()} if by == "day" else {"start": first.isoformat(), "end": last.isoformat()}
+            buckets.append({**bucket, **_totals(sums[i], int(counts[i]))})
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "group_by": by,
+        "buckets": buckets,
+        "totals": _totals(sums.sum(axis=0), int(counts.sum())),
+    }
+
+
+def resolve_range(
+    today: datetime.date,
+    period: Optional[str] = None,
+    last_days: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Tuple[datetime.date, datetime.date]:
+    """
+    [start, end] from explicit dates, the last N days (today included) or a
+    named period; defaults to this month. Ranges are cut off at today.
+    """
+    if start_date or end_date:
+        start = datetime.date.fromisoformat(str(start_date)[:10]) if start_date else None
+        end = datetime.date.fromisoformat(str(end_date)[:10]) if end_date else today
+        if start is None:
+            start = end.replace(day=1)
+    elif last_days is not None:
+        if int(last_days) < 1:
+            raise ValueError("last_days must be at least 1")
+        start, end = today - datetime.timedelta(days=int(last_days) - 1), today
+    else:
+        period = period or "this_month"
+        q = (today.month - 1) // 3
+        if period == "today":
+            start = end = today
+        elif period in ("this_week", "last_week"):
+            start = today - datetime.timedelta(days=today.weekday() + (7 if period == "last_week" else 0))
+            end = start + datetime.timedelta(days=6)
+        elif period == "this_month":
+            start, end = today.replace(day=1), today
+        elif period == "last_month":
+            end = today.replace(day=1) - datetime.timedelta(days=1)
+            start = end.replace(day=1)
+        elif period in ("this_quarter", "last_quarter"):
+            m = _month_index(today.replace(month=3 * q + 1)) - (3 if period == "last_quarter" else 0)
+            start = datetime.date(m // 12, m % 12 + 1, 1)
+            end = datetime.date((m + 3) // 12, (m + 3) % 12 + 1, 1) - datetime.timedelta(days=1)
+        elif period == "this_year":
+            start, end = today.replace(month=1, day=1), today
+        elif period == "last_year":
+            start, end = datetime.date(today.year - 1, 1, 1), datetime.date(today.year - 1, 12, 31)
+        else:
+            raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+    end = min(end, today)
+    if end < start:
+        raise ValueError("the range is empty or in the future")
+    return start, end
+
+
+async def load_transactions(profile_id: str, start: datetime.date, end: Optional[datetime.date]) -> TxFrame:
+    """A profile's transactions dated in [start, end] (end None: no upper bound), every page."""
+    params = {
+        "select": "transaction_id,date,type,amount,category_id",
+        "profile_id": f"eq.{profile_id}",
+        "date": f"gte.{start.isoformat()}",
+    }
+    if end is not None:
+        # half-open like transaction_totals: also takes all of `end` when date is a timestamp
+        params["and"] = f"(date.lt.{(end + datetime.timedelta(days=1)).isoformat()})"
+    rows = await asbr_all("Transaction", params, "transaction_id", PAGE_SIZE)
+    return TxFrame.from_rows(rows)
+
+
+async def period_totals(profile_id: str, start: datetime.date, end: datetime.date) -> Dict[str, Any]:
+    """
+    Income / earning / expense / net / count for [start, end] from the
+    transaction_totals function; falls back to loading the rows while the
+    function is missing (404).
+    """
+    global _rpc_missing_until
+    if time.monotonic() >= _rpc_missing_until:
+        try:
+            rows = await arpc(
+                "transaction_totals",
+                {"p_profile_id": profile_id, "p_start": start.isoformat(), "p_end": end.isoformat()},
+            )
+        except HTTPException as e:
+            if e.status_code != 404:
+                raise
+            _rpc_missing_until = time.monotonic() + RPC_RETRY_SECONDS
+            log.warning("aggregation.rpc_missing", function="transaction_totals", retry_in_s=RPC_RETRY_SECONDS)
+        else:
+            row = rows[0] if rows else {}
+            sums = np.array([float(row.get(k) or 0) for k in KINDS])
+            return _totals(sums, int(row.get("tx_count") or 0))
+
+    frame = await load_transactions(profile_id, start, end)
+    return aggregate(frame, start, end, "total")["totals"]
@@ -0,0 +1,155 @@
+"""
+Transaction aggregation for one profile with many transactions.
+
+Seeds one profile with --transactions rows spread over the last two years
+and compares, per grouping over the last 365 days:
+
+    loop    a per-row Python dict loop (how get_weekly_summary used to sum)
+    engine  aggregation.aggregate() on the NumPy frame
+
+Then runs the get_transaction_summary tool end to end against the in-memory
+PostgREST emulator (keyset pages of 1000 rows). The emulator scans the whole
+table for every page, so its time is reported apart from the client's
+(HTTP round-trips, JSON, frame, aggregation).
+
+    python benchmarks/bench_aggregation.py
+    python benchmarks/bench_aggregation.py --transactions 250000
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+for _k, _v in {
+    "OPENAI_API_KEY": "sk-bench",
+    "FT_MODEL_ID": "ft:bench",
+    "SUPABASE_URL": "http://supabase.bench",
+    "SUPABASE_SERVICE_ROLE_KEY": "bench",
+    "LOG_LEVEL": "WARNING",
+}.items():
+    os.environ.setdefault(_k, _v)
+
+import aggregation  # noqa: E402
+from loadtest.seed import CATEGORY_NAMES  # noqa: E402
+from loadtest.postgrest_emulator import PostgrestStore, install  # noqa: E402
+
+
+class TimedStore(PostgrestStore):
+    """Emulator that keeps the time spent answering selects."""
+
+    select_s = 0.0
+
+    def select(self, table, params):
+        t = time.perf_counter()
+        try:
+            return super().select(table, params)
+        finally:
+            self.select_s += time.perf_counter() - t
+
+
+def build_rows(n: int, profile_id: str, category_ids: List[str], seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    rows = []
+    for _ in range(n):
+        is_income = rng.random() < 0.08
+        rows.append(
+            {
+                "transaction_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "profile_id": profile_id,
+                "date": (today - datetime.timedelta(days=rng.randrange(730))).isoformat(),
+                "type": "income" if is_income else rng.choice(["expense"] * 9 + ["earning"]),
+                "amount": round(rng.uniform(200, 3000) if is_income else rng.uniform(5, 400), 2),
+                "category_id": None if is_income else rng.choice(category_ids),
+            }
+        )
+    return rows
+
+
+def loop_aggregate(rows: List[Dict[str, Any]], start: datetime.date, end: datetime.date, by: str) -> Dict[Any, Dict[str, float]]:
+    out: Dict[Any, Dict[str, float]] = {}
+    lo, hi = start.isoformat(), end.isoformat()
+    for r in rows:
+        d = r.get("date")
+        if not d or not lo <= d[:10] <= hi:
+            continue
+        ttype = (r.get("type") or "").lower()
+        if ttype not in aggregation.KINDS:
+            continue
+        if by == "day":
+            key = d[:10]
+        elif by == "week":
+            day = datetime.date.fromisoformat(d[:10])
+            key = (day - datetime.timedelta(days=day.weekday())).isoformat()
+        elif by == "month":
+            key = d[:7]
+        else:
+            key = r.get("category_id")
+        bucket = out.setdefault(key, {"income": 0.0, "earning": 0.0, "expense": 0.0})
+        bucket[ttype] += float(r.get("amount", 0) or 0)
+    return out
+
+
+def _best_ms(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--transactions", type=int, default=100_000)
+    args = ap.parse_args()
+
+    pid = str(uuid.uuid4())
+    categories = [{"category_id": str(uuid.uuid4()), "profile_id": pid, "name": name} for name in CATEGORY_NAMES]
+    rows = build_rows(args.transactions, pid, [c["category_id"] for c in categories])
+    today = datetime.date.today()
+    start = today - datetime.timedelta(days=364)
+
+    parse_ms = _best_ms(lambda: aggregation.TxFrame.from_rows(rows), repeat=3)
+    frame = aggregation.TxFrame.from_rows(rows)
+    print(f"{len(rows)} transactions, frame built in {parse_ms:.1f} ms\n")
+    print(f"{'group_by':<10} {'loop ms':>9} {'engine ms':>10} {'speedup':>8}")
+    for by in ("day", "week", "month", "category"):
+        loop_ms = _best_ms(lambda: loop_aggregate(rows, start, today, by), repeat=3)
+        engine_ms = _best_ms(lambda: aggregation.aggregate(frame, start, today, by))
+        print(f"{by:<10} {loop_ms:>9.1f} {engine_ms:>10.2f} {loop_ms / engine_ms:>7.0f}x")
+
+    import main as api
+
+    store = TimedStore({"Transaction": rows, "Category": categories})
+    transport = install(store)
+    print()
+    for call in (
+        {"group_by": "week", "period": "this_quarter"},
+        {"group_by": "month", "period": "this_year"},
+        {"group_by": "category", "last_days": 365},
+    ):
+        transport.stats.reset()
+        store.select_s = 0.0
+        t = time.perf_counter()
+        result = asyncio.run(api.get_transaction_summary_async(pid, **call))
+        ms = (time.perf_counter() - t) * 1000
+        emulator_ms = store.select_s * 1000
+        snap = transport.stats.snapshot()
+        print(
+            f"tool {call}: client {ms - emulator_ms:.0f} ms (+ emulator {emulator_ms:.0f} ms),"
+            f" {result['totals']['count']} rows, {len(result['buckets'])} buckets, {snap['queries']} round-trips"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
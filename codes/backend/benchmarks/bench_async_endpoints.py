@@ -0,0 +1,156 @@
+"""
+Requests/second for one API worker, before and after the async request path.
+
+  before: the same work run the old way, as a sync handler on Starlette's
+          threadpool (every request blocks one thread for its full I/O time)
+  after:  the async handlers / tools, awaiting I/O on the event loop
+
+Supabase is replaced by an in-process transport that answers after a fixed
+delay, so the numbers reflect concurrency rather than network conditions.
+
+    python benchmarks/bench_async_endpoints.py --latency-ms 40 --concurrency 200
+"""
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+for _k, _v in {
+    "OPENAI_API_KEY": "bench",
+    "FT_MODEL_ID": "bench-model",
+    "SUPABASE_URL": "http://supabase.bench",
+    "SUPABASE_SERVICE_ROLE_KEY": "bench",
+    "BACKEND_API_KEY": "bench",
+}.items():
+    os.environ.setdefault(_k, _v)
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+import main  # noqa: E402
+import supabase_rest  # noqa: E402
+from supabase_rest import run_sync  # noqa: E402
+
+PROFILE_ID = "00000000-0000-0000-0000-000000000001"
+TOOLS = ["simulate_purchase", "suggest_savings_plan", "get_goals", "get_category_summary"]
+
+
+def _rows(table: str):
+    today = time.strftime("%Y-%m-%d")
+    if table == "Gold":
+        return [
+            {"karat": k, "current_price": 250.0, "predicted_price": 251.0, "predicted_low": 249.0,
+             "predicted_high": 253.0, "confidence_level": "high", "created_at": f"{today}T00:00:00+00:00"}
+            for k in (24, 21, 18)
+        ]
+    if table == "User_Profile":
+        return [{"current_balance": 5400.0}]
+    if table == "Monthly_Financial_Record":
+        return [{"record_id": "r1", "period_start": today[:8] + "01", "period_end": today[:8] + "28",
+                 "total_income": 9000, "total_earning": 300}]
+    if table == "Fixed_Income":
+        return [{"income_id": "i1", "name": "Salary", "monthly_income": 9000, "payday": 27, "is_primary": True}]
+    if table == "Fixed_Expense":
+        return [{"expense_id": "e1", "name": "Rent", "amount": 2500, "due_date": 1}]
+    if table == "Category_Summary":
+        return [{"summary_id": f"s{i}", "total_expense": 100 * i, "record_id": "r1", "category_id": f"c{i}"}
+                for i in range(1, 6)]
+    if table == "Category":
+        return [{"category_id": f"c{i}", "name": f"Cat {i}", "monthly_limit": 800} for i in range(1, 6)]
+    if table == "Goal":
+        return [{"goal_id": f"g{i}", "name": f"Goal {i}", "target_amount": 1000, "target_date": today,
+                 "status": "active", "created_at": today} for i in range(1, 4)]
+    if table == "Goal_Transfer":
+        return [{"goal_transfer_id": "t1", "direction": "assign", "amount": 250, "created_at": today, "goal_id": "g1"}]
+    return []
+
+
+def install_fake_supabase(latency_s: float) -> None:
+    def table_of(request: httpx.Request) -> str:
+        return request.url.path.rstrip("/").rsplit("/", 1)[-1]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency_s)
+        return httpx.Response(200, json=_rows(table_of(request)))
+
+    def sync_handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(latency_s)
+        return httpx.Response(200, json=_rows(table_of(request)))
+
+    supabase_rest.configure(
+        transport=httpx.MockTransport(sync_handler),
+        async_transport=httpx.MockTransport(handler),
+    )
+
+
+def build_before_app() -> FastAPI:
+    """Sync handlers, as the endpoints were written before the async path."""
+    app = FastAPI()
+
+    @app.get("/gold/latest")
+    def gold_latest_sync():
+        return run_sync(main.gold_latest())
+
+    @app.get("/tools")
+    def tools_sync():
+        return {name: main.NAME_TO_FUNC[name](profile_id=PROFILE_ID) for name in TOOLS}
+
+    return app
+
+
+def build_after_app() -> FastAPI:
+    app = FastAPI()
+    app.add_api_route("/gold/latest", main.gold_latest, methods=["GET"])
+
+    @app.get("/tools")
+    async def tools_async():
+        results = await asyncio.gather(*(main.ASYNC_NAME_TO_FUNC[n](profile_id=PROFILE_ID) for n in TOOLS))
+        return dict(zip(TOOLS, results))
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, concurrency: int, duration_s: float) -> dict:
+    done = 0
+    errors = 0
+    deadline = time.perf_counter() + duration_s
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as c:
+        async def worker():
+            nonlocal done, errors
+            while time.perf_counter() < deadline:
+                r = await c.get(path)
+                if r.status_code == 200:
+                    done += 1
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {"rps": round(done / elapsed, 1), "ok": done, "errors": errors}
+
+
+async def main_async(args) -> dict:
+    install_fake_supabase(args.latency_ms / 1000)
+    out = {}
+    for path in ("/gold/latest", "/tools"):
+        before = await drive(build_before_app(), path, args.concurrency, args.duration)
+        after = await drive(build_after_app(), path, args.concurrency, args.duration)
+        out[path] = {"before": before, "after": after, "speedup": round(after["rps"] / max(before["rps"], 1e-9), 2)}
+    return out
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--latency-ms", type=float, default=40.0, help="simulated Supabase round-trip")
+    p.add_argument("--concurrency", type=int, default=200)
+    p.add_argument("--duration", type=float, default=5.0, help="seconds per scenario")
+    result = asyncio.run(main_async(p.parse_args()))
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,105 @@
+"""
+Budget alert evaluation across many profiles.
+
+Runs notifications.budget_alerts twice against the in-memory PostgREST
+emulator (loadtest/postgrest_emulator.py), seeded with one current monthly
+record per profile and six limited categories each, spending between 20%
+and 120% of the limit. The first run alerts every crossing; the second must
+send nothing (watermarks). Reports wall time, round-trips and notifications.
+
+    python benchmarks/bench_budget_alerts.py
+    python benchmarks/bench_budget_alerts.py --profiles 100000
+
+Emulator time is included in the wall time, so a real Supabase is the bound
+on network, not on CPU.
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import datetime
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+for _k, _v in {
+    "SUPABASE_URL": "http://supabase.bench",
+    "SUPABASE_SERVICE_ROLE_KEY": "bench",
+    "LOG_LEVEL": "WARNING",
+}.items():
+    os.environ.setdefault(_k, _v)
+_state = tempfile.TemporaryDirectory()
+os.environ["BUDGET_ALERT_STATE_PATH"] = os.path.join(_state.name, "budget_alerts.sqlite3")
+os.environ["NOTIFICATION_DEDUP_PATH"] = os.path.join(_state.name, "notification_dedup.sqlite3")
+
+from loadtest.seed import CATEGORY_NAMES  # noqa: E402
+from loadtest.postgrest_emulator import PostgrestStore, install  # noqa: E402
+from notifications import budget_alerts  # noqa: E402
+from notifications.notification_service import stop_notification_worker  # noqa: E402
+
+
+def build_tables(n_profiles: int, seed: int = 7) -> Dict[str, List[Dict[str, Any]]]:
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    start = today.replace(day=1).isoformat()
+    end = (today.replace(day=28) + datetime.timedelta(days=4)).replace(day=1) - datetime.timedelta(days=1)
+    tables: Dict[str, List[Dict[str, Any]]] = {
+        "Monthly_Financial_Record": [],
+        "Category": [],
+        "Category_Summary": [],
+        "Notification": [],
+    }
+    uid = lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4))  # noqa: E731
+    for _ in range(n_profiles):
+        pid, rid = uid(), uid()
+        tables["Monthly_Financial_Record"].append(
+            {"record_id": rid, "profile_id": pid, "period_start": start, "period_end": end.isoformat()}
+        )
+        for name in CATEGORY_NAMES:
+            cid = uid()
+            limit = rng.choice([300, 500, 800, 1200, 2000])
+            tables["Category"].append({"category_id": cid, "profile_id": pid, "name": name, "monthly_limit": limit})
+            tables["Category_Summary"].append(
+                {
+                    "summary_id": uid(),
+                    "record_id": rid,
+                    "category_id": cid,
+                    "total_expense": round(limit * rng.uniform(0.2, 1.2), 2),
+                }
+            )
+    return tables
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--profiles", type=int, default=100_000)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    store = PostgrestStore(build_tables(args.profiles))
+    transport = install(store)
+    print(f"seeded {args.profiles} profiles in {time.perf_counter() - t0:.1f}s\n")
+
+    for label in ("first run", "second run"):
+        transport.stats.reset()
+        sent_before = len(store.tables["Notification"])
+        stats = asyncio.run(budget_alerts.run_budget_alerts())
+        snap = transport.stats.snapshot()
+        sent = len(store.tables["Notification"]) - sent_before
+        print(
+            f"{label:<11} {stats['duration_s']:>7.1f}s (load {stats['load_s']:.1f}s)  rows {stats['rows']}"
+            f"  near {stats['near']}  over {stats['over']}  notified {sent}"
+            f"  GETs {snap['by_method'].get('GET', 0)}  POSTs {snap['by_method'].get('POST', 0)}"
+        )
+    stop_notification_worker()
+    _state.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
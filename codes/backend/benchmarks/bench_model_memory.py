@@ -0,0 +1,122 @@
+"""
+Per-worker memory of the receipt categorizer, copied vs. memory-mapped.
+
+Starts --workers processes that each load the same artifact through
+receipt_model._load_from_disk (mmap_mode=None, then "r"), fault in every
+coefficient page (worst case: a long-running worker eventually touches all
+of them) and report RSS and PSS while all workers are alive. PSS splits
+shared pages between the processes mapping them, so its sum is the real
+footprint of the fleet.
+
+    python benchmarks/bench_model_memory.py
+    python benchmarks/bench_model_memory.py --workers 8 --artifact categories_model/receipt_cat_model.joblib
+
+Without --artifact a synthetic HashingVectorizer + SGDClassifier artifact
+with 2**--n-features-log2 features is built in a temp dir. Linux only (PSS
+comes from /proc/self/smaps_rollup).
+"""
+import os
+import sys
+import importlib
+import tempfile
+import argparse
+import multiprocessing as mp
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def _memory_mb() -> Dict[str, Optional[float]]:
+    out: Dict[str, Optional[float]] = {"rss": None, "pss": None}
+    try:
+        with open("/proc/self/smaps_rollup", encoding="ascii") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    out[key.lower()] = int(rest.split()[0]) / 1024
+    except FileNotFoundError:
+        pass
+    return out
+
+
+def _worker(artifact: str, mmap_mode: Optional[str], ready, done, results) -> None:
+    from categories_model import receipt_model as rm
+    # import sklearn up front so "load RSS" is the artifact alone
+    for module in ("sklearn.pipeline", "sklearn.linear_model", "sklearn.feature_extraction.text"):
+        importlib.import_module(module)
+
+    rm.MODEL_PATH = Path(artifact)
+    before = _memory_mb()
+    obj, _ = rm._load_from_disk(None, mmap_mode=mmap_mode)
+    clf = obj["pipeline"].named_steps["clf"]
+    float(clf.coef_.sum())  # touch every page
+    obj["pipeline"].predict(["milk 2l", "uber ride"])
+    ready.wait()
+    after = _memory_mb()
+    results.put({"before": before, "after": after})
+    done.wait()
+
+
+def build_artifact(path: Path, n_features_log2: int) -> None:
+    import joblib
+    import numpy as np
+    from sklearn.pipeline import Pipeline
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from categories_model.receipt_model import CATEGORIES
+
+    vec = HashingVectorizer(n_features=2**n_features_log2, alternate_sign=False)
+    clf = SGDClassifier(loss="log_loss", random_state=0)
+    texts = [f"{c} item {i}" for c in CATEGORIES for i in range(50)]
+    labels = [c for c in CATEGORIES for _ in range(50)]
+    clf.partial_fit(vec.transform(texts), np.array(labels), classes=np.array(CATEGORIES))
+    joblib.dump({"pipeline": Pipeline([("vec", vec), ("clf", clf)]), "classes": CATEGORIES}, path)
+
+
+def run(artifact: str, mmap_mode: Optional[str], workers: int) -> List[Dict]:
+    ctx = mp.get_context("spawn")  # fresh interpreters, like separate uvicorn workers
+    ready, done = ctx.Barrier(workers + 1), ctx.Barrier(workers + 1)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(artifact, mmap_mode, ready, done, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    ready.wait()
+    out = [results.get() for _ in procs]
+    done.wait()
+    for p in procs:
+        p.join()
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--artifact", type=Path, help="existing {'pipeline','classes'} joblib artifact")
+    ap.add_argument("--n-features-log2", type=int, default=20, help="size of the synthetic artifact")
+    args = ap.parse_args()
+
+    tmp = None
+    artifact = args.artifact
+    if artifact is None:
+        tmp = tempfile.TemporaryDirectory()
+        artifact = Path(tmp.name) / "receipt_cat_model.joblib"
+        build_artifact(artifact, args.n_features_log2)
+    print(f"artifact {artifact} ({os.path.getsize(artifact) / 2**20:.1f} MB), {args.workers} workers\n")
+
+    print(f"{'mode':<8} {'load RSS MB':>12} {'RSS/worker':>11} {'PSS/worker':>11} {'PSS total':>10}")
+    for mode in (None, "r"):
+        rows = run(str(artifact), mode, args.workers)
+        load = sum(r["after"]["rss"] - r["before"]["rss"] for r in rows) / len(rows)
+        rss = sum(r["after"]["rss"] for r in rows) / len(rows)
+        pss = [r["after"]["pss"] for r in rows]
+        print(
+            f"{mode or 'copy':<8} {load:>12.1f} {rss:>11.1f} {sum(pss) / len(pss):>11.1f} {sum(pss):>10.1f}"
+        )
+    if tmp is not None:
+        tmp.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
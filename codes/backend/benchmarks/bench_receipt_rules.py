@@ -0,0 +1,119 @@
+"""
+Rules fast path vs. LLM for /receipt/preprocess.
+
+Runs receipt_rules.parse_receipt_rules over a sample of OCR texts
+(benchmarks/data/receipts_sample.jsonl, one {"ocr_text", "total"} per line)
+and reports how many receipts would escalate to the LLM, how often an
+accepted rules parse got the total wrong, and the parse latency.
+
+    python benchmarks/bench_receipt_rules.py
+    python benchmarks/bench_receipt_rules.py --llm-ms 1800 --min-confidence 0.7 --verbose
+
+The LLM is not called: its latency is taken from --llm-ms (use the
+surra_llm_request_duration_seconds mean for purpose="receipt" from /metrics)
+to estimate the mean end-to-end latency with and without the fast path.
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from receipt_rules import RULES_MIN_CONFIDENCE, parse_receipt_rules  # noqa: E402
+
+DEFAULT_SAMPLE = Path(__file__).resolve().parent / "data" / "receipts_sample.jsonl"
+
+
+def load_samples(path: Path) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run(samples: List[Dict[str, Any]], min_confidence: float, repeat: int) -> Dict[str, Any]:
+    rows = []
+    for sample in samples:
+        text = sample["ocr_text"]
+        started = time.perf_counter()
+        for _ in range(repeat):
+            data, confidence = parse_receipt_rules(text)
+        per_call_us = (time.perf_counter() - started) / repeat * 1e6
+        accepted = confidence >= min_confidence
+        expected = sample.get("total")
+        rows.append({
+            "merchant": data["merchant"],
+            "confidence": confidence,
+            "accepted": accepted,
+            "total": data["total"],
+            "expected_total": expected,
+            "wrong": accepted and expected is not None and data["total"] != expected,
+            "us": per_call_us,
+        })
+    return {"rows": rows}
+
+
+def summarize(rows: List[Dict[str, Any]], llm_ms: float) -> Dict[str, Any]:
+    n = len(rows)
+    accepted = [r for r in rows if r["accepted"]]
+    escalated = n - len(accepted)
+    lat = sorted(r["us"] for r in rows)
+    rules_ms = statistics.mean(lat) / 1000
+    # escalated receipts pay the rules attempt and then the LLM call
+    mean_ms = (len(accepted) * rules_ms + escalated * (rules_ms + llm_ms)) / n
+    return {
+        "receipts": n,
+        "accepted": len(accepted),
+        "escalated": escalated,
+        "escalation_rate": round(escalated / n, 3),
+        "wrong_totals_accepted": sum(r["wrong"] for r in rows),
+        "rules_us_p50": round(lat[n // 2], 1),
+        "rules_us_max": round(lat[-1], 1),
+        "est_mean_ms_llm_only": round(llm_ms, 1),
+        "est_mean_ms_with_rules": round(mean_ms, 1),
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sample", type=Path, default=DEFAULT_SAMPLE)
+    ap.add_argument("--min-confidence", type=float, default=RULES_MIN_CONFIDENCE)
+    ap.add_argument("--llm-ms", type=float, default=1500.0, help="mean LLM receipt parse latency to assume")
+    ap.add_argument("--repeat", type=int, default=200, help="parses per receipt when timing")
+    ap.add_argument("--verbose", action="store_true", help="print one line per receipt")
+    ap.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = ap.parse_args()
+
+    rows = run(load_samples(args.sample), args.min_confidence, args.repeat)["rows"]
+    summary = summarize(rows, args.llm_ms)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    if args.verbose:
+        print(f"{'merchant':<24} {'conf':>5} {'path':<5} {'total':>9} {'expected':>9} {'us':>7}")
+        for r in rows:
+            flag = "  <-- wrong total" if r["wrong"] else ""
+            print(
+                f"{str(r['merchant'])[:24]:<24} {r['confidence']:>5.2f} {'rules' if r['accepted'] else 'llm':<5} "
+                f"{str(r['total']):>9} {str(r['expected_total']):>9} {r['us']:>7.1f}{flag}"
+            )
+        print()
+
+    print(f"receipts            {summary['receipts']}  (min confidence {args.min_confidence})")
+    print(f"rules accepted      {summary['accepted']}")
+    print(f"escalated to LLM    {summary['escalated']}  ({summary['escalation_rate']:.1%})")
+    print(f"wrong totals kept   {summary['wrong_totals_accepted']}")
+    print(f"rules parse         p50 {summary['rules_us_p50']} us, max {summary['rules_us_max']} us")
+    print(
+        f"est. mean latency   {summary['est_mean_ms_llm_only']} ms LLM-only -> "
+        f"{summary['est_mean_ms_with_rules']} ms with rules (LLM at {args.llm_ms:.0f} ms)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
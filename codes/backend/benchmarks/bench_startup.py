@@ -0,0 +1,116 @@
+"""
+API worker startup: import profile and time until it serves traffic.
+
+Each run is a fresh interpreter that imports main (with -X importtime) and
+then runs the lifespan and one GET /health through TestClient, i.e. the point
+where a new uvicorn worker would accept its first request.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --check --budget-ms 2500
+
+With --check the script exits 1 when the best run's time-to-serve exceeds
+--budget-ms, or when importing main pulls in a module from HEAVY_MODULES;
+those must stay lazy (first use, background startup stage or the gold worker).
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ("tensorflow", "keras", "pandas", "sklearn", "scipy")
+
+ENV = {
+    "OPENAI_API_KEY": "bench",
+    "FT_MODEL_ID": "bench-model",
+    "SUPABASE_URL": "http://127.0.0.1:9",
+    "SUPABASE_SERVICE_ROLE_KEY": "bench",
+    "BACKEND_API_KEY": "bench",
+    "LOG_LEVEL": "WARNING",
+    "RECEIPT_CACHE_PATH": ":memory:",
+}
+
+_CHILD = """
+import time, json, sys
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+heavy = sorted({m.split(".")[0] for m in sys.modules} & set(sys.argv[1:]))
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    status = client.get("/health").status_code
+    t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "serve_ms": (t2 - t0) * 1000, "status": status, "heavy": heavy}))
+sys.stdout.flush()
+"""
+
+
+def run_once() -> Tuple[Dict[str, Any], List[Tuple[str, int, int]]]:
+    env = {**os.environ, **ENV, "PYTHONPATH": str(BACKEND_DIR)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, *HEAVY_MODULES],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"startup failed:\n{proc.stderr[-3000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # "import time: self [us] | cumulative | imported package", children
+    # first and indented by depth; stop at main itself (the rest is lifespan)
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        modules.append((name.strip(), int(cum_us), depth))
+        if name.strip() == "main" and depth == 0:
+            break
+    return result, modules
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--budget-ms", type=float, default=2500.0, help="time from interpreter start to serving")
+    ap.add_argument("--top", type=int, default=12, help="slowest imports of main to list")
+    ap.add_argument("--check", action="store_true")
+    args = ap.parse_args()
+
+    runs = [run_once() for _ in range(args.repeat)]
+    best, modules = min(runs, key=lambda r: r[0]["serve_ms"])
+
+    direct = sorted((m for m in modules if m[2] == 1), key=lambda m: -m[1])[: args.top]
+    print(f"slowest imports under main (best of {args.repeat} runs):")
+    for name, cum_us, _ in direct:
+        print(f"  {cum_us / 1000:>8.1f} ms  {name}")
+
+    heavy = best["heavy"]
+    print(f"\nimport main     {best['import_ms']:.0f} ms")
+    print(f"serving after   {best['serve_ms']:.0f} ms  (budget {args.budget_ms:.0f} ms)")
+    print(f"heavy modules   {', '.join(heavy) if heavy else 'none'} imported by main")
+
+    if not args.check:
+        return 0
+    failures = []
+    if best["serve_ms"] > args.budget_ms:
+        failures.append(f"time to serve {best['serve_ms']:.0f} ms > budget {args.budget_ms:.0f} ms")
+    if heavy:
+        failures.append(f"import main pulled in {', '.join(heavy)}; import them on first use instead")
+    for f in failures:
+        print(f"FAIL: {f}")
+    if not failures:
+        print("Startup within budget.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
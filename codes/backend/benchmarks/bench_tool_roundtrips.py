@@ -0,0 +1,166 @@
+"""
+Supabase round-trips, bytes and wall time per chat tool.
+
+Every tool in main.ASYNC_NAME_TO_FUNC runs against the in-memory PostgREST
+emulator (loadtest/postgrest_emulator.py) seeded with synthetic profiles.
+Calls are made one at a time so each one's queries can be counted exactly.
+
+    python benchmarks/bench_tool_roundtrips.py
+    python benchmarks/bench_tool_roundtrips.py --check benchmarks/baselines/tool_roundtrips.json
+    python benchmarks/bench_tool_roundtrips.py --update-baseline benchmarks/baselines/tool_roundtrips.json
+
+With --check the script exits 1 when any tool makes more round-trips per
+call (mean or max) than the baseline, or when a tool has no baseline yet.
+Bytes and wall time are reported but never gate: they vary with the data.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+for _k, _v in {
+    "OPENAI_API_KEY": "bench",
+    "FT_MODEL_ID": "bench-model",
+    "SUPABASE_URL": "http://supabase.bench",
+    "SUPABASE_SERVICE_ROLE_KEY": "bench",
+    "BACKEND_API_KEY": "bench",
+}.items():
+    os.environ.setdefault(_k, _v)
+
+import main  # noqa: E402
+from loadtest.seed import build_dataset  # noqa: E402
+from loadtest.postgrest_emulator import PostgrestStore, install  # noqa: E402
+
+ArgsFactory = Callable[[str], Dict[str, Any]]
+
+
+def _arg_factories(tables: Dict[str, List[Dict[str, Any]]]) -> Dict[str, ArgsFactory]:
+    goals: Dict[str, List[Dict[str, Any]]] = {}
+    for g in tables["Goal"]:
+        goals.setdefault(g["profile_id"], []).append(g)
+    cats: Dict[str, List[Dict[str, Any]]] = {}
+    for c in tables["Category"]:
+        cats.setdefault(c["profile_id"], []).append(c)
+
+    def first_goal(pid: str) -> Dict[str, Any]:
+        return (goals.get(pid) or [{"goal_id": "00000000-0000-0000-0000-000000000000", "name": "Missing"}])[0]
+
+    return {
+        "get_goal_transfers": lambda pid: {"goal_id": first_goal(pid)["goal_id"]},
+        "get_goal_details": lambda pid: {"goal_name": first_goal(pid)["name"]},
+        "compare_category_last_month": lambda pid: {"category_id": cats[pid][0]["category_id"]},
+        "simulate_purchase": lambda pid: {"price": 450, "category_id": cats[pid][0]["category_id"]},
+        "get_top_spending": lambda pid: {"n": 3},
+        "get_transaction_summary": lambda pid: {"group_by": "category", "period": "this_year"},
+    }
+
+
+async def _measure(transport, profiles: List[str], factories: Dict[str, ArgsFactory]) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, fn in sorted(main.ASYNC_NAME_TO_FUNC.items()):
+        queries: List[int] = []
+        sent = received = errors = 0
+        started = time.perf_counter()
+        for pid in profiles:
+            args = {"profile_id": pid, **factories.get(name, lambda _pid: {})(pid)}
+            before = transport.stats.snapshot()
+            try:
+                await fn(**args)
+            except Exception:
+                errors += 1
+            after = transport.stats.snapshot()
+            queries.append(after["queries"] - before["queries"])
+            sent += after["bytes_sent"] - before["bytes_sent"]
+            received += after["bytes_received"] - before["bytes_received"]
+        elapsed = time.perf_counter() - started
+        calls = len(profiles)
+        results[name] = {
+            "calls": calls,
+            "queries_per_call_mean": round(sum(queries) / calls, 3),
+            "queries_per_call_max": max(queries),
+            "bytes_sent_per_call": round(sent / calls),
+            "bytes_received_per_call": round(received / calls),
+            "wall_ms_per_call": round(1000 * elapsed / calls, 3),
+            "errors": errors,
+        }
+    return results
+
+
+def run(n_profiles: int, sample: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    # the dataset is generated relative to today, like the tools' "current period"
+    tables = build_dataset(n_profiles=n_profiles, seed=seed)
+    transport = install(PostgrestStore(tables))
+    profiles = [p["profile_id"] for p in tables["User_Profile"][:sample]]
+    return asyncio.run(_measure(transport, profiles, _arg_factories(tables)))
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> List[str]:
+    problems = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            problems.append(f"{name}: no baseline (run with --update-baseline)")
+            continue
+        for key in ("queries_per_call_mean", "queries_per_call_max"):
+            if r[key] > base[key] + 1e-9:
+                problems.append(f"{name}: {key} {base[key]} -> {r[key]}")
+    return problems
+
+
+def format_table(results: Dict[str, Dict[str, Any]]) -> str:
+    header = f"{'tool':<30}{'q/call':>8}{'max':>6}{'sent B':>9}{'recv B':>10}{'ms/call':>10}{'err':>5}"
+    lines = [header, "-" * len(header)]
+    for name, r in results.items():
+        lines.append(
+            f"{name:<30}{r['queries_per_call_mean']:>8}{r['queries_per_call_max']:>6}"
+            f"{r['bytes_sent_per_call']:>9}{r['bytes_received_per_call']:>10}"
+            f"{r['wall_ms_per_call']:>10}{r['errors']:>5}"
+        )
+    return "\n".join(lines)
+
+
+def main_cli() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--profiles", type=int, default=60, help="profiles in the generated dataset")
+    p.add_argument("--sample", type=int, default=25, help="profiles each tool is called for")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--check", metavar="BASELINE", help="fail if round-trips regress against this file")
+    p.add_argument("--update-baseline", metavar="BASELINE", help="write round-trip counts to this file")
+    p.add_argument("--json", help="write the full report to this file")
+    args = p.parse_args()
+
+    results = run(args.profiles, args.sample, args.seed)
+    print(format_table(results))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {
+            name: {k: r[k] for k in ("queries_per_call_mean", "queries_per_call_max")}
+            for name, r in results.items()
+        }
+        with open(args.update_baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.check:
+        with open(args.check, "r", encoding="utf-8") as f:
+            problems = compare(results, json.load(f))
+        if problems:
+            print("\nRound-trip regressions:")
+            for line in problems:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nRound-trips within baseline.")
+
+
+if __name__ == "__main__":
+    main_cli()
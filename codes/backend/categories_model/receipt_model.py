@@ -1,26 +1,148 @@
+import os
+import copy
+import json
+import time
 import joblib
 import numpy as np
 from pathlib import Path
 import threading
 
+from logs import get_logger
+
+try:
+    import fcntl  # cross-process file locks (Linux / macOS)
+except ImportError:  # pragma: no cover - Windows dev machines
+    fcntl = None
+
 # Path to the model file, always relative to this file
 MODEL_PATH = Path(__file__).with_name("receipt_cat_model.joblib")
+# Points at the current versioned artifact (receipt_cat_model.v<N>.joblib).
+# Without a manifest the legacy MODEL_PATH is served as version 0.
+MANIFEST_PATH = Path(__file__).with_name("receipt_cat_model.manifest.json")
+KEEP_VERSIONS = 3
+# how often predict() may stat the manifest to notice a newer version
+RELOAD_CHECK_SECONDS = float(os.getenv("CATEGORIZER_RELOAD_CHECK_SECONDS", "2"))
+# Serve artifacts memory-mapped read-only: the classifier's arrays stay in
+# the page cache, shared by every worker, instead of one copy per process.
+# Needs uncompressed joblib artifacts (what _checkpoint and train.py write).
+MMAP_MODE = "r" if os.getenv("CATEGORIZER_MMAP", "1") == "1" else None
 CATEGORIES = ["groceries", "transportation", "utilities", "health", "entertainment", "others"]
 
+# Feedback is appended here and applied to the model in mini-batches
+FEEDBACK_LOG = Path(os.getenv("CATEGORIZER_FEEDBACK_LOG", str(MODEL_PATH.with_name("feedback_log.jsonl"))))
+FEEDBACK_BATCH_SIZE = int(os.getenv("CATEGORIZER_FEEDBACK_BATCH_SIZE", "64"))
+FEEDBACK_FLUSH_SECONDS = float(os.getenv("CATEGORIZER_FEEDBACK_FLUSH_SECONDS", "30"))
+
+log = get_logger("surra.categorizer")
+
 _model = None
+_model_version = None
 _model_lock = threading.Lock()  # protects training and saving
+_load_lock = threading.Lock()   # first load / swap of the served model
+
+_manifest_mtime = None
+_next_check = 0.0
+_reloading = False
+
+_pending = 0  # feedback lines this process appended since its last apply
+_pending_lock = threading.Lock()
+_wakeup = threading.Event()
+_stop = threading.Event()
+_worker = None
+
+
+def _read_manifest() -> dict | None:
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _load_from_disk(manifest: dict | None, mmap_mode: str | None = MMAP_MODE) -> tuple[dict, int]:
+    if manifest is None:
+        return joblib.load(MODEL_PATH, mmap_mode=mmap_mode), 0
+    return joblib.load(MODEL_PATH.with_name(manifest["path"]), mmap_mode=mmap_mode), int(manifest["version"])
+
+
+def _swap(obj: dict, version: int) -> None:
+    """Publish a model; never goes back to an older version."""
+    global _model, _model_version
+    with _load_lock:
+        if _model_version is None or version >= _model_version:
+            _model, _model_version = obj, version
 
 
 def _load():
     """
-    Load the receipt categorization model once and cache it in memory.
+    Return the served model, loading it on first use.
+    At most every RELOAD_CHECK_SECONDS this also stats the manifest; when a
+    newer version was published (by any worker), it is loaded on a
+    background thread and swapped in, while requests keep using this one.
     """
-    global _model
     if _model is None:
-        _model = joblib.load(MODEL_PATH)
+        with _load_lock:
+            if _model is None:
+                _initial_load()
+    else:
+        _maybe_reload()
     return _model
 
 
+def _initial_load() -> None:
+    global _model, _model_version, _manifest_mtime
+    try:
+        _manifest_mtime = MANIFEST_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        _manifest_mtime = None
+    _model, _model_version = _load_from_disk(_read_manifest())
+
+
+def _maybe_reload() -> None:
+    global _manifest_mtime, _next_check, _reloading
+    now = time.monotonic()
+    if now < _next_check or _reloading:
+        return
+    _next_check = now + RELOAD_CHECK_SECONDS
+    try:
+        mtime = MANIFEST_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return
+    if mtime == _manifest_mtime:
+        return
+    manifest = _read_manifest()
+    if manifest is None or int(manifest["version"]) <= (_model_version or 0):
+        _manifest_mtime = mtime
+        return
+    _reloading = True
+    threading.Thread(target=_reload, args=(manifest, mtime), name="categorizer-reload", daemon=True).start()
+
+
+def _reload(manifest: dict, mtime: int) -> None:
+    global _manifest_mtime, _reloading
+    try:
+        obj, version = _load_from_disk(manifest)
+        _swap(obj, version)
+        _manifest_mtime = mtime
+        log.info("categorizer.model_reloaded", version=version)
+    except Exception:
+        # e.g. the artifact was pruned meanwhile; the next check retries
+        log.exception("categorizer.model_reload_failed", version=manifest.get("version"))
+    finally:
+        _reloading = False
+
+
+def model_info() -> dict:
+    """Version this worker serves and the latest published one."""
+    _load()
+    manifest = _read_manifest()
+    return {
+        "served_version": _model_version,
+        "published_version": int(manifest["version"]) if manifest else 0,
+        "created_at": manifest.get("created_at") if manifest else None,
+    }
+
+
 def predict_category(text: str) -> dict:
     """
     Predict a category for the given receipt text.
@@ -33,30 +155,300 @@ def predict_category(text: str) -> dict:
     return {"category": str(pred)}
 
 
+def predict_categories(texts: list[str]) -> list[dict]:
+    """
+    Predict categories for many receipt lines at once.
+    One vectorizer transform and one classifier call for the whole batch.
+    Returns, in input order:
+        [{"category": "<label>", "probabilities": {"<label>": p, ...}}, ...]
+    "probabilities" is only present when the classifier supports predict_proba.
+    """
+    if not texts:
+        return []
+    obj = _load()
+    pipe = obj["pipeline"]
+    vec = pipe.named_steps["vec"]
+    clf = pipe.named_steps["clf"]
+
+    X_vec = vec.transform(texts)
+    preds = clf.predict(X_vec)
+
+    try:
+        proba = clf.predict_proba(X_vec)
+    except (AttributeError, NotImplementedError):
+        # e.g. SGDClassifier with hinge loss has no probabilities
+        proba = None
+
+    out = []
+    for i, pred in enumerate(preds):
+        item = {"category": str(pred)}
+        if proba is not None:
+            item["probabilities"] = {
+                str(c): round(float(p), 4) for c, p in zip(clf.classes_, proba[i])
+            }
+        out.append(item)
+    return out
+
+
+def warm_up() -> None:
+    """Load the served model and run one batch through it before the first request does."""
+    predict_categories(["warm up"])
+
+
+def suggest_category(merchant: dict | None, items: list[dict], prices: list[float]) -> dict | None:
+    """
+    One category for the whole receipt from predict_categories() results.
+    Items vote with their share of the receipt's spend; the merchant's
+    prediction weighs as much as all items together. Probabilities are used
+    when present, otherwise each prediction is a hard vote.
+    Returns {"category": "<label>", "score": share of the vote} or None.
+    """
+    scores: dict[str, float] = {}
+
+    def vote(pred: dict, weight: float) -> None:
+        for label, p in (pred.get("probabilities") or {pred["category"]: 1.0}).items():
+            scores[label] = scores.get(label, 0.0) + weight * p
+
+    if merchant is not None:
+        vote(merchant, 1.0)
+    spend = sum(max(p, 0.0) for p in prices)
+    for pred, price in zip(items, prices):
+        vote(pred, max(price, 0.0) / spend if spend > 0 else 1.0 / len(items))
+
+    if not scores:
+        return None
+    best = max(scores, key=scores.get)
+    return {"category": best, "score": round(scores[best] / sum(scores.values()), 4)}
+
+
+def _validate_label(correct_category: str) -> str:
+    classes = _load()["classes"]
+    y = str(correct_category).strip().lower()
+    if y not in classes:
+        raise ValueError(f"Invalid category '{y}'. Must be one of: {classes}")
+    return y
+
+
+def _partial_fit(obj: dict, texts: list[str], labels: list[str]) -> None:
+    pipe = obj["pipeline"]
+    vec = pipe.named_steps["vec"]
+    clf = pipe.named_steps["clf"]
+    X_vec = vec.transform(texts)
+
+    if not hasattr(clf, "classes_"):
+        clf.partial_fit(X_vec, np.array(labels), classes=np.array(obj["classes"]))
+    else:
+        clf.partial_fit(X_vec, np.array(labels))
+
+
+def _write_atomic(path: Path, write) -> None:
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _checkpoint(obj: dict, examples: int) -> int:
+    """
+    Publish `obj` as the next version: write the artifact, then swap the
+    manifest with a rename. Readers see either the old or the new
+    manifest, and the artifact it names is always complete. This process
+    then serves the artifact through the same mmap load as the others.
+    Caller must hold the train lock. Returns the new version.
+    """
+    manifest = _read_manifest()
+    version = (int(manifest["version"]) if manifest else 0) + 1
+    name = f"{MODEL_PATH.stem}.v{version}.joblib"
+    data = {"pipeline": obj["pipeline"], "classes": obj["classes"]}
+
+    _write_atomic(MODEL_PATH.with_name(name), lambda p: joblib.dump(data, p))
+    new_manifest = {
+        "version": version,
+        "path": name,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "examples": examples,
+    }
+    _write_atomic(
+        MANIFEST_PATH,
+        lambda p: p.write_text(json.dumps(new_manifest, indent=2), encoding="utf-8"),
+    )
+    # serve the published artifact (memory-mapped like every other worker),
+    # not the private copy that was trained in memory
+    served, _ = _load_from_disk(new_manifest)
+    _swap(served, version)
+
+    # keep a few old versions for workers that are still loading them
+    for old in range(1, version - KEEP_VERSIONS + 1):
+        MODEL_PATH.with_name(f"{MODEL_PATH.stem}.v{old}.joblib").unlink(missing_ok=True)
+    return version
+
+
+def publish_model(pipeline, examples: int) -> int:
+    """
+    Publish a model trained elsewhere (categories_model/train.py) as the next
+    version; running workers pick it up on their next manifest check.
+    Feedback applied after this point trains on top of it.
+    """
+    with _train_lock(), _model_lock:
+        return _checkpoint({"pipeline": pipeline, "classes": list(CATEGORIES)}, examples)
+
+
+def _train_lock() -> "_FileLock":
+    return _FileLock(MODEL_PATH.with_name(MODEL_PATH.name + ".train.lock"))
+
+
+def _fresh_copy() -> dict:
+    """
+    Latest published model, copied so training never mutates the object
+    that concurrent predictions are using. Never memory-mapped: partial_fit
+    writes the coefficients in place (a deepcopy of a mapped model is a
+    private, writable copy).
+    """
+    manifest = _read_manifest()
+    version = int(manifest["version"]) if manifest else 0
+    if _model is None or version != _model_version:
+        obj, _ = _load_from_disk(manifest, mmap_mode=None)
+        return obj
+    return copy.deepcopy(_model)
+
+
+class _FileLock:
+    """Exclusive flock on a side file; a no-op where fcntl is unavailable."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+def _log_lock() -> _FileLock:
+    return _FileLock(FEEDBACK_LOG.with_name(FEEDBACK_LOG.name + ".lock"))
+
+
 def update_with_feedback(text: str, correct_category: str) -> dict:
     """
-    Online update of the classifier with a single feedback example.
-    This function acquires a lock so concurrent updates in the same process
-    do not corrupt the model file.
+    Online update of the classifier with a single feedback example, saved
+    immediately. Kept for scripts; the API uses record_feedback().
+    """
+    y = _validate_label(correct_category)
+    with _train_lock(), _model_lock:
+        obj = _fresh_copy()
+        _partial_fit(obj, [text], [y])
+        _checkpoint(obj, 1)
+        return {"status": "updated", "category": y}
+
+
+def record_feedback(text: str, correct_category: str) -> dict:
+    """
+    Append one correction to the durable feedback log and return.
+    The background worker applies it with the next mini-batch.
+    """
+    global _pending
+    y = _validate_label(correct_category)
+    line = json.dumps({"text": text, "category": y, "ts": time.time()}, ensure_ascii=False) + "\n"
+
+    with _log_lock():
+        with open(FEEDBACK_LOG, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    with _pending_lock:
+        _pending += 1
+        if _pending >= FEEDBACK_BATCH_SIZE:
+            _wakeup.set()
+    return {"status": "queued", "category": y}
+
+
+def _claim_batches() -> list[Path]:
+    """
+    Move the live log aside (new feedback starts a fresh file) and return
+    every claimed file, including ones left behind by a crashed apply.
+    """
+    with _log_lock():
+        if FEEDBACK_LOG.exists() and FEEDBACK_LOG.stat().st_size > 0:
+            FEEDBACK_LOG.rename(FEEDBACK_LOG.with_name(f"{FEEDBACK_LOG.name}.{time.time_ns()}.applying"))
+    return sorted(FEEDBACK_LOG.parent.glob(f"{FEEDBACK_LOG.name}.*.applying"))
+
+
+def apply_pending_feedback() -> int:
+    """
+    Apply all logged feedback in one partial_fit and checkpoint once.
+    Returns the number of examples applied. A crash between checkpoint and
+    cleanup re-applies that batch on the next run (at-least-once).
     """
-    with _model_lock:
-        obj = _load()
-        pipe = obj["pipeline"]
-        classes = obj["classes"]
+    global _pending
+    with _pending_lock:
+        _pending = 0
+
+    # one applier at a time across workers, so checkpoints never race
+    with _train_lock(), _model_lock:
+        files = _claim_batches()
+        if not files:
+            return 0
+
+        texts, labels = [], []
+        for path in files:
+            with open(path, "r", encoding="utf-8") as f:
+                for raw in f:
+                    try:
+                        row = json.loads(raw)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from a crash
+                    texts.append(row["text"])
+                    labels.append(row["category"])
+
+        if texts:
+            # trains on top of the latest version, even if another worker published it
+            obj = _fresh_copy()
+            _partial_fit(obj, texts, labels)
+            _checkpoint(obj, len(texts))
+
+        for path in files:
+            path.unlink(missing_ok=True)
+        return len(texts)
+
 
-        y = str(correct_category).strip().lower()
-        if y not in classes:
-            raise ValueError(f"Invalid category '{y}'. Must be one of: {classes}")
+def _run_worker() -> None:
+    while not _stop.is_set():
+        _wakeup.wait(FEEDBACK_FLUSH_SECONDS)
+        _wakeup.clear()
+        try:
+            applied = apply_pending_feedback()
+            if applied:
+                log.info("categorizer.feedback_applied", examples=applied)
+        except Exception:
+            # claimed files stay on disk and are retried on the next tick
+            log.exception("categorizer.feedback_apply_failed")
 
-        vec = pipe.named_steps["vec"]
-        clf = pipe.named_steps["clf"]
-        X_vec = vec.transform([text])
 
-        if not hasattr(clf, "classes_"):
-            clf.partial_fit(X_vec, np.array([y]), classes=np.array(classes))
-        else:
-            clf.partial_fit(X_vec, np.array([y]))
+def start_feedback_worker() -> None:
+    """Start the background mini-batch applier (idempotent)."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    _stop.clear()
+    _worker = threading.Thread(target=_run_worker, name="categorizer-feedback", daemon=True)
+    _worker.start()
 
-        joblib.dump({"pipeline": pipe, "classes": classes}, MODEL_PATH)
 
-        return {"status": "updated", "category": y}
\ No newline at end of file
+def stop_feedback_worker(flush: bool = True) -> None:
+    """Stop the applier; by default apply whatever is still in the log."""
+    global _worker
+    _stop.set()
+    _wakeup.set()
+    if _worker is not None:
+        _worker.join(timeout=30)
+        _worker = None
+    if flush:
+        apply_pending_feedback()
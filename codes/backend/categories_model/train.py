@@ -0,0 +1,238 @@
+# backend/categories_model/train.py
+"""
+Out-of-core trainer for the receipt categorizer.
+
+Streams a labelled corpus (CSV or JSON lines, optionally .gz) in chunks
+through a HashingVectorizer, which is stateless, into SGDClassifier.partial_fit,
+so memory stays bounded by --chunk-size whatever the corpus size. A stable
+hash of each text puts it in the holdout set (--holdout percent) or the
+training set, so duplicates never land on both sides.
+
+    python -m categories_model.train --data corpus.csv --out /tmp/receipt_cat_model.joblib
+    python -m categories_model.train --data corpus.jsonl.gz --epochs 3 \
+        --grid alpha=1e-6,1e-5,1e-4 --grid loss=log_loss,modified_huber --jobs 4 --publish
+
+Rows need a text and a category (--text-col / --label-col); labels outside
+receipt_model.CATEGORIES are skipped and counted. With several --grid values
+every combination is trained in a process pool and the best holdout accuracy
+wins. --out writes the {"pipeline", "classes"} artifact; --publish makes it
+the next served version through the manifest (see receipt_model.publish_model).
+"""
+import io
+import sys
+import csv
+import gzip
+import json
+import time
+import zlib
+import random
+import argparse
+import itertools
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
+
+import joblib
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.linear_model import SGDClassifier
+from sklearn.feature_extraction.text import HashingVectorizer
+
+try:
+    import resource  # peak RSS (Unix only)
+except ImportError:  # pragma: no cover - Windows dev machines
+    resource = None
+
+from categories_model.receipt_model import CATEGORIES, publish_model
+
+VEC_PARAMS = {"n_features": int, "ngram_max": int, "analyzer": str}
+CLF_PARAMS = {"alpha": float, "loss": str, "penalty": str}
+DEFAULTS = {"n_features": 2**18, "ngram_max": 2, "analyzer": "word", "alpha": 1e-5, "loss": "log_loss", "penalty": "l2"}
+
+
+# ---------- Corpus ----------
+def _open_text(path: Path) -> io.TextIOBase:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def _rows(path: Path, text_col: str, label_col: str) -> Iterator[Tuple[str, str]]:
+    kind = path.suffixes[-2] if path.suffix == ".gz" and len(path.suffixes) > 1 else path.suffix
+    with _open_text(path) as f:
+        if kind in (".jsonl", ".ndjson", ".json"):
+            records = (json.loads(line) for line in f if line.strip())
+        elif kind == ".csv":
+            records = csv.DictReader(f)
+        else:
+            raise ValueError(f"Unsupported corpus format '{kind}' (use .csv or .jsonl, optionally .gz)")
+        for rec in records:
+            yield str(rec.get(text_col) or "").strip(), str(rec.get(label_col) or "").strip().lower()
+
+
+def iter_chunks(
+    path: Path, chunk_size: int, text_col: str, label_col: str, stats: Dict[str, int]
+) -> Iterator[Tuple[List[str], List[str]]]:
+    """Yield (texts, labels) chunks of valid rows; counts skipped rows in stats."""
+    texts: List[str] = []
+    labels: List[str] = []
+    for text, label in _rows(path, text_col, label_col):
+        if not text or label not in CATEGORIES:
+            stats["skipped"] = stats.get("skipped", 0) + 1
+            continue
+        texts.append(text)
+        labels.append(label)
+        if len(texts) >= chunk_size:
+            yield texts, labels
+            texts, labels = [], []
+    if texts:
+        yield texts, labels
+
+
+def is_holdout(text: str, holdout_pct: float) -> bool:
+    return zlib.crc32(text.encode("utf-8")) % 10000 < holdout_pct * 100
+
+
+# ---------- Training ----------
+def build_pipeline(params: Dict[str, Any], seed: int) -> Pipeline:
+    vec = HashingVectorizer(
+        n_features=params["n_features"],
+        ngram_range=(1, params["ngram_max"]),
+        analyzer=params["analyzer"],
+        alternate_sign=False,
+    )
+    clf = SGDClassifier(loss=params["loss"], alpha=params["alpha"], penalty=params["penalty"], random_state=seed)
+    return Pipeline([("vec", vec), ("clf", clf)])
+
+
+def train_one(params: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    """Train and evaluate one configuration; runs in a pool worker during sweeps."""
+    pipe = build_pipeline(params, args.seed)
+    vec, clf = pipe.named_steps["vec"], pipe.named_steps["clf"]
+    classes = np.array(CATEGORIES)
+    rng = random.Random(args.seed)
+    stats: Dict[str, int] = {}
+
+    started = time.perf_counter()
+    trained = 0
+    for _ in range(args.epochs):
+        for texts, labels in iter_chunks(args.data, args.chunk_size, args.text_col, args.label_col, stats):
+            rows = [(t, y) for t, y in zip(texts, labels) if not is_holdout(t, args.holdout)]
+            if not rows:
+                continue
+            rng.shuffle(rows)  # SGD converges badly on label-sorted chunks
+            clf.partial_fit(vec.transform([t for t, _ in rows]), np.array([y for _, y in rows]), classes=classes)
+            trained += len(rows)
+    train_s = time.perf_counter() - started
+    if trained == 0:
+        raise ValueError(f"No training rows in {args.data} (check --text-col / --label-col)")
+
+    correct = total = 0
+    per_class = {c: [0, 0] for c in CATEGORIES}
+    started = time.perf_counter()
+    for texts, labels in iter_chunks(args.data, args.chunk_size, args.text_col, args.label_col, {}):
+        rows = [(t, y) for t, y in zip(texts, labels) if is_holdout(t, args.holdout)]
+        if not rows:
+            continue
+        preds = clf.predict(vec.transform([t for t, _ in rows]))
+        for (_, y), p in zip(rows, preds):
+            per_class[y][0] += int(p == y)
+            per_class[y][1] += 1
+        correct += int(sum(p == y for (_, y), p in zip(rows, preds)))
+        total += len(rows)
+    eval_s = time.perf_counter() - started
+
+    return {
+        "params": params,
+        "pipeline": pipe,
+        "train_rows": trained // args.epochs,
+        "holdout_rows": total,
+        "skipped_rows": stats.get("skipped", 0) // args.epochs,
+        "accuracy": round(correct / total, 4) if total else None,
+        "recall_by_class": {c: round(k / n, 4) for c, (k, n) in per_class.items() if n},
+        "train_seconds": round(train_s, 2),
+        "train_rows_per_sec": round(trained / train_s) if train_s else None,
+        "predict_rows_per_sec": round(total / eval_s) if total and eval_s else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None,
+    }
+
+
+# ---------- CLI ----------
+def parse_grid(specs: List[str]) -> List[Dict[str, Any]]:
+    """["alpha=1e-5,1e-4", "loss=log_loss"] -> every combination, merged over DEFAULTS."""
+    types = {**VEC_PARAMS, **CLF_PARAMS}
+    axes: Dict[str, List[Any]] = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip()
+        if name not in types or not values:
+            raise SystemExit(f"bad --grid '{spec}'; expected name=v1,v2 with name in {sorted(types)}")
+        axes[name] = [types[name](v.strip()) for v in values.split(",")]
+    names = list(axes)
+    return [{**DEFAULTS, **dict(zip(names, combo))} for combo in itertools.product(*axes.values())] or [dict(DEFAULTS)]
+
+
+def _short(params: Dict[str, Any]) -> str:
+    return " ".join(f"{k}={v}" for k, v in params.items() if DEFAULTS.get(k) != v) or "defaults"
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--data", type=Path, required=True, help="labelled corpus: .csv or .jsonl, optionally .gz")
+    ap.add_argument("--text-col", default="text")
+    ap.add_argument("--label-col", default="category")
+    ap.add_argument("--chunk-size", type=int, default=10000, help="rows in memory at once")
+    ap.add_argument("--epochs", type=int, default=1)
+    ap.add_argument("--holdout", type=float, default=10.0, help="percent of texts held out for evaluation")
+    ap.add_argument("--grid", action="append", default=[], help="name=v1,v2 (repeatable); see DEFAULTS")
+    ap.add_argument("--jobs", type=int, default=1, help="worker processes for the sweep")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path, help="write the best {'pipeline','classes'} artifact here")
+    ap.add_argument("--publish", action="store_true", help="publish the best model as the next served version")
+    ap.add_argument("--report", type=Path, help="write the full report as JSON")
+    args = ap.parse_args()
+
+    trials = parse_grid(args.grid)
+    started = time.perf_counter()
+    if args.jobs > 1 and len(trials) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(trials))) as pool:
+            results = list(pool.map(train_one, trials, itertools.repeat(args)))
+    else:
+        results = [train_one(params, args) for params in trials]
+    wall_s = time.perf_counter() - started
+
+    print(f"{'trial':<48} {'acc':>7} {'train r/s':>10} {'pred r/s':>10} {'rss MB':>8}")
+    for r in results:
+        print(
+            f"{_short(r['params'])[:48]:<48} {r['accuracy'] if r['accuracy'] is not None else '-':>7} "
+            f"{r['train_rows_per_sec'] or '-':>10} {r['predict_rows_per_sec'] or '-':>10} {r['peak_rss_mb'] or '-':>8}"
+        )
+    best = max(results, key=lambda r: r["accuracy"] or 0.0)
+    print(
+        f"\nbest: {_short(best['params'])}  accuracy {best['accuracy']}  "
+        f"({best['train_rows']} train / {best['holdout_rows']} holdout rows, {best['skipped_rows']} skipped; "
+        f"{len(results)} trial(s) in {wall_s:.1f}s)"
+    )
+
+    artifact = {"pipeline": best["pipeline"], "classes": list(CATEGORIES)}
+    if args.out:
+        tmp = args.out.with_name(args.out.name + ".tmp")
+        joblib.dump(artifact, tmp)
+        tmp.replace(args.out)
+        print(f"wrote {args.out}")
+    if args.publish:
+        version = publish_model(best["pipeline"], best["train_rows"])
+        print(f"published version {version}")
+    if args.report:
+        report = {
+            "data": str(args.data),
+            "wall_seconds": round(wall_s, 2),
+            "best": {k: v for k, v in best.items() if k != "pipeline"},
+            "trials": [{k: v for k, v in r.items() if k != "pipeline"} for r in results],
+        }
+        args.report.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+# backend/goal_progress.py
+"""Goal savings math shared by the chat tools and the goal scheduler."""
+from typing import Any, Dict, Iterable, Optional
+
+
+def signed_transfer_amount(direction: Optional[str], amount: Any) -> float:
+    if amount is None:
+        return 0.0
+
+    value = float(amount)
+    dir_norm = (direction or "").lower()
+
+    if dir_norm in ("unassign", "from_goal", "withdraw", "out"):
+        return -value
+
+    return value
+
+
+def saved_amount(transfers: Iterable[Dict[str, Any]]) -> float:
+    return round(sum(signed_transfer_amount(t.get("direction"), t.get("amount")) for t in transfers), 2)
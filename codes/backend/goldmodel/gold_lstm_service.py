@@ -1,34 +1,59 @@
 import os
-import joblib
+import threading
 import httpx
-import pandas as pd
 import numpy as np
-import tensorflow as tf
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 
+# TensorFlow, pandas and joblib are imported on first use: together they are
+# most of the API's import time (benchmarks/bench_startup.py)
+if TYPE_CHECKING:
+    import pandas as pd
+
+from logs import get_logger
+
 load_dotenv(dotenv_path=Path(__file__).resolve().parents[1] / ".env")
 
 API_KEY = os.getenv("METALPRICE_API_KEY", "")
 TROY_OUNCE_TO_GRAM = 31.1034768
 CARAT_MULTIPLIERS = {"24K": 1.0, "21K": 21 / 24, "18K": 18 / 24}
 
+log = get_logger("surra.gold")
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 MODEL_DIR = BASE_DIR / "goldmodel"
 
 _model = None
 _scaler = None
 _SEQ_LEN = None
+_load_lock = threading.Lock()
 
 
 def load_gold_lstm():
     global _model, _scaler, _SEQ_LEN
-    if _model is None:
-        _model = tf.keras.models.load_model(MODEL_DIR / "gold_lstm_next_day.keras")
-        assets = joblib.load(MODEL_DIR / "gold_lstm_assets.pkl")
-        _scaler = assets["scaler"]
-        _SEQ_LEN = int(assets["seq_len"])
+    if _model is not None:
+        return
+    with _load_lock:
+        if _model is None:
+            import joblib
+            import tensorflow as tf
+
+            assets = joblib.load(MODEL_DIR / "gold_lstm_assets.pkl")
+            _scaler = assets["scaler"]
+            _SEQ_LEN = int(assets["seq_len"])
+            _model = tf.keras.models.load_model(MODEL_DIR / "gold_lstm_next_day.keras")
+
+
+def is_loaded() -> bool:
+    return _model is not None
+
+
+def warm_up() -> None:
+    """Load the model and run two dropout passes: the first call is where TF traces the graph."""
+    load_gold_lstm()
+    mc_dropout_predict_distribution_24k(np.zeros((1, _SEQ_LEN, 1), dtype=np.float32), n_samples=2)
 
 
 def sar_per_gram_from_rates(rate: dict) -> float:
@@ -53,7 +78,9 @@ def fetch_latest_24k() -> float:
     return sar_per_gram_from_rates(data["rates"])
 
 
-def fetch_last_n_days_df(n_days: int) -> pd.DataFrame:
+def fetch_last_n_days_df(n_days: int) -> "pd.DataFrame":
+    import pandas as pd
+
     if not API_KEY:
         raise ValueError("METALPRICE_API_KEY missing in backend/.env")
 
@@ -93,6 +120,8 @@ def fetch_last_n_days_df(n_days: int) -> pd.DataFrame:
 
 
 def mc_dropout_predict_distribution_24k(seq, n_samples: int = 300):
+    import tensorflow as tf
+
     load_gold_lstm()
 
     preds = []
@@ -133,12 +162,14 @@ def confidence_from_cv(std_sar: float, mean_sar: float):
 
 
 def predict_next_week_all_karats(n_samples: int = 300):
+    import pandas as pd
+
     load_gold_lstm()
 
     try:
      df_hist = fetch_last_n_days_df(_SEQ_LEN)
     except Exception as e:
-        print("⚠️ timeframe API failed → fallback to synthetic data", e)
+        log.warning("gold.timeframe_fetch_failed", fallback="flat_series", error=repr(e))
 
         current = fetch_latest_24k()
 
@@ -149,7 +180,7 @@ def predict_next_week_all_karats(n_samples: int = 300):
     try:
         current_24k = fetch_latest_24k()
     except Exception as e:
-        print("⚠️ latest API failed → using last known value", e)
+        log.warning("gold.latest_fetch_failed", fallback="last_known", error=repr(e))
         current_24k = df_hist["sar_per_gram"].iloc[-1]
 
     df_hist.loc[df_hist.index[-1], "sar_per_gram"] = current_24k
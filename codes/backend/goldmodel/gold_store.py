@@ -0,0 +1,173 @@
+# backend/goldmodel/gold_store.py
+"""
+Gold table reads and writes shared by the API and the gold worker
+(goldmodel/gold_worker.py). Kept free of TensorFlow and of main.py so the
+worker and the API can both import it cheaply.
+"""
+from datetime import datetime as dt, timezone, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+
+from logs import get_logger
+from supabase_rest import asbr, sbr, sb_patch, sb_post
+
+log = get_logger("surra.gold")
+
+
+def _today_window_utc():
+    now = dt.now(timezone.utc)
+    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=1)
+    return start.isoformat(), end.isoformat()
+
+def _iso_day_window_utc(day: dt):
+    start = day.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+    end = start + timedelta(days=1)
+    return start.isoformat(), end.isoformat()
+
+def _seven_days_ago_params(karat: int) -> dict:
+    target_day = dt.now(timezone.utc) - timedelta(days=7)
+    start_iso, end_iso = _iso_day_window_utc(target_day)
+    return {
+        "select": "created_at,karat,current_price",
+        "karat": f"eq.{karat}",
+        "created_at": f"gte.{start_iso}",
+        "and": f"(created_at.lt.{end_iso})",
+        "order": "created_at.desc",
+        "limit": "1",
+    }
+
+
+async def get_price_exactly_7_days_ago_from_db_async(karat: int) -> Optional[float]:
+    rows = await asbr("Gold", _seven_days_ago_params(karat))
+    if not rows:
+        return None
+    return float(rows[0]["current_price"])
+
+
+def get_price_exactly_7_days_ago_from_db(karat: int) -> Optional[float]:
+    # sync callers (save_gold_to_db, the gold worker) use the pooled sync client
+    rows = sbr("Gold", params=_seven_days_ago_params(karat))
+    if not rows:
+        return None
+    return float(rows[0]["current_price"])
+
+
+def save_gold_to_db(result: dict):
+    """
+    Upsert today's Gold rows (per karat).
+
+    Requirements handled:
+    - past_price is NOT NULL in your schema, so:
+      * INSERT requires past_7d to exist in DB
+      * UPDATE keeps existing past_price if past_7d missing
+    - Stores prediction RANGE if your table has predicted_low/predicted_high
+      (otherwise falls back to storing mean in predicted_price only)
+    """
+    log.debug("gold.model_output", result=result)
+
+    start_iso, end_iso = _today_window_utc()
+    affected: list[dict] = []
+
+    for karat_str, obj in result.get("prices", {}).items():
+        karat = int(str(karat_str).replace("K", ""))
+
+        interval = obj.get("predicted_tplus7_interval") or {}
+        conf = obj.get("confidence") or {}
+
+        current_price = obj.get("current")
+        mean_price = interval.get("mean")
+        low_price = interval.get("lo")
+        high_price = interval.get("hi")
+        confidence_level = conf.get("level")
+
+        if current_price is None or mean_price is None:
+            raise HTTPException(500, f"Gold model output missing current/mean for {karat_str}")
+
+        # past_price must come from DB exactly 7 days ago
+        past_7d = get_price_exactly_7_days_ago_from_db(karat)
+
+        # Check if today's row exists (IMPORTANT: use params= not payload=)
+        rows = sbr(
+            "Gold",
+            params={
+                "select": "gold_data_id,created_at,past_price",
+                "karat": f"eq.{karat}",
+                "created_at": f"gte.{start_iso}",
+                "and": f"(created_at.lt.{end_iso})",
+                "limit": "1",
+            },
+        )
+
+        def _try_patch(gold_data_id: str, payload: dict):
+            """Patch, and if predicted_low/high columns don't exist, retry without them."""
+            try:
+                return sb_patch("Gold", {"gold_data_id": f"eq.{gold_data_id}"}, payload)
+            except HTTPException as e:
+                msg = str(e.detail) if hasattr(e, "detail") else str(e)
+                # fallback if schema doesn't have predicted_low/high
+                if ("predicted_low" in msg) or ("predicted_high" in msg) or ("column" in msg and "predicted_" in msg):
+                    payload.pop("predicted_low", None)
+                    payload.pop("predicted_high", None)
+                    return sb_patch("Gold", {"gold_data_id": f"eq.{gold_data_id}"}, payload)
+                raise
+
+        def _try_insert(payload: dict):
+            """Insert, and if predicted_low/high columns don't exist, retry without them."""
+            try:
+                return sb_post("Gold", [payload])
+            except HTTPException as e:
+                msg = str(e.detail) if hasattr(e, "detail") else str(e)
+                if ("predicted_low" in msg) or ("predicted_high" in msg) or ("column" in msg and "predicted_" in msg):
+                    payload.pop("predicted_low", None)
+                    payload.pop("predicted_high", None)
+                    return sb_post("Gold", [payload])
+                raise
+
+        if rows:
+            # UPDATE existing row for today
+            gid = rows[0]["gold_data_id"]
+
+            payload = {
+                "current_price": current_price,
+                # keep predicted_price as mean for compatibility
+                "predicted_price": mean_price,
+                "confidence_level": confidence_level,
+            }
+
+            # store range IF table supports it
+            if low_price is not None and high_price is not None:
+                payload["predicted_low"] = low_price
+                payload["predicted_high"] = high_price
+
+            # Only overwrite past_price if we successfully fetched 7-days-ago
+            if past_7d is not None:
+                payload["past_price"] = past_7d
+
+            updated = _try_patch(gid, payload)
+            affected.extend(updated)
+
+        else:
+            # INSERT new row for today requires NOT NULL past_price
+            if past_7d is None:
+                log.info("gold.past_price_missing", karat=karat)
+                past_7d = current_price
+
+            payload = {
+                "karat": karat,
+                "past_price": past_7d,
+                "current_price": current_price,
+                "predicted_price": mean_price,  # mean kept
+                "confidence_level": confidence_level,
+            }
+
+            # store range IF table supports it
+            if low_price is not None and high_price is not None:
+                payload["predicted_low"] = low_price
+                payload["predicted_high"] = high_price
+
+            inserted = _try_insert(payload)
+            affected.extend(inserted)
+
+    return affected
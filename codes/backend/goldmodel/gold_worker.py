@@ -0,0 +1,200 @@
+# backend/goldmodel/gold_worker.py
+"""
+Dedicated gold process: owns the LSTM, the metalpriceapi fetches and the Gold
+table writes, and publishes every new prediction to a snapshot file that API
+workers read. With it, API workers never import TensorFlow and gold inference
+does not compete with request handling for CPU.
+
+GOLD_WORKER selects who runs gold:
+    inline    (default) every API worker, as before: model in-process,
+              refresh loop in the lifespan
+    spawn     each API worker's lifespan starts `python -m goldmodel.gold_worker`
+              and restarts it if it dies; a file lock lets only one run
+    external  run it yourself next to the API (same host, it shares the file):
+              python -m goldmodel.gold_worker
+
+In spawn/external mode /gold/predict serves the snapshot and /gold/refresh
+drops a trigger file the worker picks up within a second.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from logs import get_logger
+from metrics import gauge
+
+try:
+    import fcntl  # single worker per host (Linux / macOS)
+except ImportError:  # pragma: no cover - Windows dev machines
+    fcntl = None
+
+MODEL_DIR = Path(__file__).resolve().parent
+
+GOLD_WORKER_MODE = os.getenv("GOLD_WORKER", "inline").strip().lower()
+SNAPSHOT_PATH = Path(os.getenv("GOLD_SNAPSHOT_PATH", str(MODEL_DIR / "gold_snapshot.json")))
+TRIGGER_PATH = SNAPSHOT_PATH.with_name(SNAPSHOT_PATH.name + ".refresh")
+LOCK_PATH = SNAPSHOT_PATH.with_name(SNAPSHOT_PATH.name + ".lock")
+GOLD_REFRESH_SECONDS = float(os.getenv("GOLD_REFRESH_SECONDS", "600"))
+GOLD_SAMPLES = int(os.getenv("GOLD_SAMPLES", "60"))
+
+# exit status when another gold worker already holds the lock
+EXIT_ALREADY_RUNNING = 3
+# spawn mode: wait before starting again after an exit (ours or the lock holder's)
+RESPAWN_SECONDS = 60
+
+log = get_logger("surra.gold_worker")
+
+if GOLD_WORKER_MODE not in ("inline", "spawn", "external"):
+    raise RuntimeError(f"GOLD_WORKER must be inline, spawn or external (got '{GOLD_WORKER_MODE}')")
+
+
+def out_of_process() -> bool:
+    return GOLD_WORKER_MODE != "inline"
+
+
+# ---------- API side (no TensorFlow) ----------
+_snapshot_cache: Dict[str, Any] = {"mtime": None, "data": None}
+
+
+def read_snapshot() -> Optional[Dict[str, Any]]:
+    """Latest published snapshot, re-read only when the file changed."""
+    try:
+        mtime = SNAPSHOT_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if mtime != _snapshot_cache["mtime"]:
+        with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
+            _snapshot_cache["data"] = json.load(f)
+        _snapshot_cache["mtime"] = mtime
+    return _snapshot_cache["data"]
+
+
+def request_refresh() -> None:
+    """Ask the worker for a refresh now (it polls the trigger file)."""
+    TRIGGER_PATH.write_text(str(time.time()), encoding="utf-8")
+
+
+def _snapshot_age() -> Dict[tuple, float]:
+    if not out_of_process():
+        return {}
+    try:
+        return {(): time.time() - SNAPSHOT_PATH.stat().st_mtime}
+    except FileNotFoundError:
+        return {}
+
+
+gauge("surra_gold_snapshot_age_seconds", "Seconds since the gold worker last published", (), _snapshot_age)
+
+
+async def supervise() -> None:
+    """
+    Spawn mode: keep one gold worker process running on this host.
+    Runs until cancelled (lifespan shutdown), then stops our child.
+    """
+    child: Optional[asyncio.subprocess.Process] = None
+    try:
+        while True:
+            child = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "goldmodel.gold_worker", cwd=str(MODEL_DIR.parent)
+            )
+            code = await child.wait()
+            if code != EXIT_ALREADY_RUNNING:
+                log.warning("gold_worker.exited", code=code, respawn_in_s=RESPAWN_SECONDS)
+            child = None
+            await asyncio.sleep(RESPAWN_SECONDS)
+    finally:
+        if child is not None and child.returncode is None:
+            child.terminate()
+            try:
+                await asyncio.wait_for(child.wait(), 30)
+            except asyncio.TimeoutError:
+                child.kill()
+
+
+# ---------- Worker side ----------
+def _write_snapshot(data: Dict[str, Any]) -> None:
+    tmp = SNAPSHOT_PATH.with_name(f"{SNAPSHOT_PATH.name}.tmp-{os.getpid()}")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, SNAPSHOT_PATH)
+
+
+def _trigger_time() -> float:
+    try:
+        return TRIGGER_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def refresh_once(samples: int, previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Predict, upsert the Gold rows and publish; on failure keep the last good result."""
+    from goldmodel.gold_lstm_service import predict_next_week_all_karats
+    from goldmodel.gold_store import save_gold_to_db
+
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc).isoformat()
+    snapshot = dict(previous or {}, pid=os.getpid(), samples=samples)
+    try:
+        result = predict_next_week_all_karats(n_samples=samples)
+        rows = save_gold_to_db(result)
+    except Exception as e:
+        log.exception("gold_worker.refresh_failed")
+        snapshot.update(last_error=repr(e), last_error_at=now)
+    else:
+        duration_s = round(time.perf_counter() - started, 3)
+        snapshot.update(
+            result=result, refreshed_at=now, affected_rows=len(rows), duration_s=duration_s, last_error=None
+        )
+        log.info("gold_worker.refresh_ok", duration_s=duration_s, rows=len(rows))
+    _write_snapshot(snapshot)
+    return snapshot
+
+
+def run(stop: threading.Event, interval_seconds: float = GOLD_REFRESH_SECONDS, samples: int = GOLD_SAMPLES) -> None:
+    """Refresh every interval_seconds, or sooner when the trigger file is touched."""
+    from goldmodel.gold_lstm_service import load_gold_lstm
+
+    load_gold_lstm()
+    log.info("gold_worker.model_loaded", snapshot=str(SNAPSHOT_PATH))
+    try:
+        snapshot = read_snapshot()
+    except (OSError, ValueError):
+        snapshot = None
+    handled_trigger = _trigger_time()
+    next_run = 0.0
+    while not stop.is_set():
+        trigger = _trigger_time()
+        if time.monotonic() >= next_run or trigger > handled_trigger:
+            handled_trigger = trigger
+            snapshot = refresh_once(samples, snapshot)
+            next_run = time.monotonic() + interval_seconds
+        stop.wait(1.0)
+
+
+def main() -> int:
+    lock_fd = os.open(LOCK_PATH, os.O_CREAT | os.O_RDWR, 0o644)
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return EXIT_ALREADY_RUNNING
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    log.info("gold_worker.started", pid=os.getpid(), interval_s=GOLD_REFRESH_SECONDS, samples=GOLD_SAMPLES)
+    try:
+        run(stop)
+    finally:
+        log.info("gold_worker.stopped", pid=os.getpid())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# backend/llm_client.py
+import os
+import time
+import asyncio
+from pathlib import Path
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+from metrics import LLM_CALLS, LLM_LATENCY, LLM_TOKENS
+from tracing import current_trace_id, span
+
+load_dotenv(dotenv_path=Path(__file__).with_name(".env"))
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Global cap on in-flight model calls for this worker, plus a quota per endpoint
+# so one busy endpoint (e.g. a receipt import) cannot starve /chat.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "256"))
+ENDPOINT_QUOTAS: Dict[str, int] = {
+    "chat": int(os.getenv("LLM_CHAT_CONCURRENCY", "192")),
+    "receipt": int(os.getenv("LLM_RECEIPT_CONCURRENCY", "64")),
+    "dashboard": int(os.getenv("LLM_DASHBOARD_CONCURRENCY", "64")),
+}
+
+_client: AsyncOpenAI | None = None
+_global_limit: asyncio.Semaphore | None = None
+_endpoint_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_client() -> AsyncOpenAI:
+    """Shared async OpenAI client (one connection pool per worker)."""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return _client
+
+
+def _limits(endpoint: str) -> tuple[asyncio.Semaphore, asyncio.Semaphore]:
+    global _global_limit
+    if endpoint not in ENDPOINT_QUOTAS:
+        raise ValueError(f"Unknown LLM endpoint quota '{endpoint}'")
+    if _global_limit is None:
+        _global_limit = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    sem = _endpoint_limits.get(endpoint)
+    if sem is None:
+        sem = _endpoint_limits[endpoint] = asyncio.Semaphore(ENDPOINT_QUOTAS[endpoint])
+    return _global_limit, sem
+
+
+def _record(model: str, purpose: str, started: float, outcome: str, usage: Any = None) -> None:
+    LLM_LATENCY.observe(time.perf_counter() - started, model=model, purpose=purpose)
+    LLM_CALLS.inc(model=model, purpose=purpose, outcome=outcome)
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, model=model, purpose=purpose, kind="prompt")
+        LLM_TOKENS.inc(usage.completion_tokens or 0, model=model, purpose=purpose, kind="completion")
+
+
+async def chat_completion(endpoint: str, purpose: str | None = None, **kwargs: Any):
+    """
+    Run `chat.completions.create` on the shared client.
+    The endpoint quota is taken before the global slot, so requests queued
+    behind their own quota do not hold global capacity while they wait.
+    `purpose` labels the call in metrics (defaults to the endpoint name);
+    latency is measured around the API call only, not the queueing.
+    """
+    global_limit, endpoint_limit = _limits(endpoint)
+    purpose = purpose or endpoint
+    model = str(kwargs.get("model", ""))
+    rid = current_trace_id()
+    if rid:
+        kwargs["extra_headers"] = {**(kwargs.get("extra_headers") or {}), "X-Client-Request-Id": rid}
+    with span("openai.chat", model=model, purpose=purpose) as s:
+        queued = time.perf_counter()
+        async with endpoint_limit:
+            async with global_limit:
+                started = time.perf_counter()
+                s.set(queued_ms=round((started - queued) * 1000, 3))
+                try:
+                    r = await get_client().chat.completions.create(**kwargs)
+                except Exception:
+                    _record(model, purpose, started, "error")
+                    raise
+                usage = getattr(r, "usage", None)
+                _record(model, purpose, started, "ok", usage)
+                if usage is not None:
+                    s.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+                return r
+
+
+async def warm() -> None:
+    """Open a pooled connection to the API before the first chat (lists models: no tokens)."""
+    await get_client().models.list()
+
+
+async def aclose() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,179 @@
+"""
+Closed-loop concurrency driver for the Surra API.
+
+N virtual users each pick an endpoint by weight, send one request, wait for
+the response and repeat until the duration ends. Per endpoint it reports
+p50/p95/p99 latency, throughput and error rate.
+
+    python -m loadtest.driver --base-url http://127.0.0.1:8000 --api-key loadtest \\
+        --users 200 --duration 60 --mix chat=6,receipt=2,dashboard=2
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from loadtest.seed import profile_ids
+
+CHAT_QUESTIONS = [
+    "What is my balance?",
+    "Can I buy a 450 SAR jacket?",
+    "How are my goals going?",
+    "Where did I spend the most this month?",
+    "How much should I save before payday?",
+    "Show me this week's summary",
+    "What is the gold price today?",
+    "Any advice for my spending?",
+]
+
+OCR_SAMPLES = [
+    "PANDA RETAIL CO\nBranch 112 Riyadh\n2025-11-03 18:22\nMILK 2L        6.50\nBREAD          4.00\nTOTAL         10.50\nVAT 15% incl.",
+    "Al Othaim Markets\nINVOICE 88812\nRICE 5KG      32.95\nCHICKEN       24.00\nWATER 12x     11.50\nالإجمالي      68.45",
+    "STARBUCKS\nLatte Grande   19.00\nCroissant      12.00\nTotal SAR      31.00",
+    "ALDREES PETROL\n91 Octane 40.12L\nAmount 93.08 SAR\nThank you",
+]
+
+Request = Tuple[str, str, Dict]
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, elapsed_ms: float, status: str, ok: bool) -> None:
+        self.latencies_ms.append(elapsed_ms)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return round(sorted_values[rank], 1)
+
+
+def build_requests(profiles: List[str], rng: random.Random) -> Dict[str, Callable[[], Request]]:
+    return {
+        "chat": lambda: (
+            "POST",
+            "/chat",
+            {"json": {"text": rng.choice(CHAT_QUESTIONS), "profile_id": rng.choice(profiles)}},
+        ),
+        "receipt": lambda: ("POST", "/receipt/preprocess", {"json": {"ocr_text": rng.choice(OCR_SAMPLES)}}),
+        "dashboard": lambda: ("GET", "/dashboard/recommendations", {"params": {"profile_id": rng.choice(profiles)}}),
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    out = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        out[name.strip()] = float(weight or 1)
+    return out
+
+
+async def run_load(
+    base_url: str,
+    api_key: str,
+    users: int,
+    duration_s: float,
+    mix: Dict[str, float],
+    n_profiles: int = 200,
+    seed: int = 7,
+    timeout_s: float = 60.0,
+) -> Dict[str, Dict]:
+    rng = random.Random(seed)
+    factories = build_requests(profile_ids(n_profiles, seed), rng)
+    unknown = set(mix) - set(factories)
+    if unknown:
+        raise ValueError(f"Unknown endpoints in mix: {sorted(unknown)}")
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    stats = {n: EndpointStats() for n in names}
+
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(
+        base_url=base_url, headers={"x-api-key": api_key}, timeout=timeout_s, limits=limits
+    ) as client:
+        deadline = time.perf_counter() + duration_s
+
+        async def user():
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                method, path, kwargs = factories[name]()
+                started = time.perf_counter()
+                try:
+                    r = await client.request(method, path, **kwargs)
+                    status, ok = str(r.status_code), r.status_code < 400
+                except httpx.HTTPError as e:
+                    status, ok = type(e).__name__, False
+                stats[name].record((time.perf_counter() - started) * 1000, status, ok)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(users)))
+        elapsed = time.perf_counter() - started
+
+    report = {}
+    for name, s in stats.items():
+        lat = sorted(s.latencies_ms)
+        count = len(lat)
+        report[name] = {
+            "requests": count,
+            "throughput_rps": round(count / elapsed, 2),
+            "error_rate": round(s.errors / count, 4) if count else None,
+            "p50_ms": percentile(lat, 50),
+            "p95_ms": percentile(lat, 95),
+            "p99_ms": percentile(lat, 99),
+            "statuses": s.statuses,
+        }
+    return report
+
+
+def format_report(report: Dict[str, Dict]) -> str:
+    header = f"{'endpoint':<12}{'reqs':>8}{'rps':>9}{'err%':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+    lines = [header, "-" * len(header)]
+    for name, r in report.items():
+        err = "-" if r["error_rate"] is None else f"{100 * r['error_rate']:.2f}"
+        lines.append(
+            f"{name:<12}{r['requests']:>8}{r['throughput_rps']:>9}{err:>8}"
+            f"{str(r['p50_ms']):>9}{str(r['p95_ms']):>9}{str(r['p99_ms']):>9}"
+        )
+    return "\n".join(lines)
+
+
+def add_load_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--users", type=int, default=100, help="concurrent virtual users")
+    p.add_argument("--duration", type=float, default=30.0, help="seconds")
+    p.add_argument("--mix", default="chat=6,receipt=2,dashboard=2")
+    p.add_argument("--profiles", type=int, default=200, help="must match the fake backend's seed size")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--json", help="write the report to this file")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Concurrency driver for the Surra API")
+    p.add_argument("--base-url", default="http://127.0.0.1:8000")
+    p.add_argument("--api-key", default="loadtest")
+    add_load_args(p)
+    args = p.parse_args(argv)
+
+    report = asyncio.run(
+        run_load(args.base_url, args.api_key, args.users, args.duration, parse_mix(args.mix), args.profiles, args.seed)
+    )
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
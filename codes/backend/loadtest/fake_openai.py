@@ -0,0 +1,159 @@
+"""
+Local stand-in for the OpenAI Chat Completions API.
+
+Recognises the backend's call sites from their prompts and answers in the
+shape each one expects: intent classification, receipt JSON, dashboard JSON,
+chat with tool calls and the follow-up after tool results. Latency is
+configurable (base + uniform jitter) so capacity runs can mimic real models.
+
+Tool calls are scripted: each rule matches a substring of the last user
+message and lists the tools to call. Without a script, a built-in rotation
+covers the common tools.
+
+    python -m loadtest.fake_openai --port 8787 --latency-ms 900 --jitter-ms 300 \\
+        --script my_tool_script.json
+"""
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import itertools
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+
+DEFAULT_SCRIPT: List[Dict[str, Any]] = [
+    {"match": "buy", "tool_calls": [{"name": "simulate_purchase", "arguments": {"price": 450}}]},
+    {"match": "balance", "tool_calls": [{"name": "get_balance", "arguments": {}}]},
+    {"match": "goal", "tool_calls": [{"name": "get_goals", "arguments": {}}]},
+    {"match": "save", "tool_calls": [{"name": "suggest_savings_plan", "arguments": {}}]},
+    {"match": "week", "tool_calls": [{"name": "get_weekly_summary", "arguments": {}}]},
+    {"match": "gold", "tool_calls": [{"name": "get_gold_prediction", "arguments": {}}]},
+    {
+        "match": "spend",
+        "tool_calls": [
+            {"name": "get_top_spending", "arguments": {"n": 3}},
+            {"name": "get_category_summary", "arguments": {}},
+        ],
+    },
+]
+
+
+class FakeModel:
+    def __init__(self, latency_ms: float, jitter_ms: float, script: List[Dict[str, Any]], seed: int = 0):
+        self.latency_s = latency_ms / 1000
+        self.jitter_s = jitter_ms / 1000
+        self.script = script
+        self.rng = random.Random(seed)
+        self._fallback = itertools.cycle(script)
+        self.requests = 0
+
+    async def delay(self) -> None:
+        await asyncio.sleep(max(0.0, self.latency_s + self.rng.uniform(-self.jitter_s, self.jitter_s)))
+
+    def tool_calls_for(self, text: str) -> List[Dict[str, Any]]:
+        lowered = text.lower()
+        rule = next((r for r in self.script if r["match"].lower() in lowered), None) or next(self._fallback)
+        return [
+            {
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {"name": c["name"], "arguments": json.dumps(c.get("arguments", {}))},
+            }
+            for c in rule["tool_calls"]
+        ]
+
+    def reply(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        messages = body.get("messages", [])
+        system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+        last_user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        has_tool_results = any(m.get("role") == "tool" for m in messages)
+
+        message: Dict[str, Any] = {"role": "assistant", "content": None}
+        finish = "stop"
+        if "Classify the user message" in system:
+            message["content"] = "advice" if any(w in last_user.lower() for w in ("advice", "should", "tip")) else "data"
+        elif "receipt parsing engine" in system:
+            message["content"] = json.dumps(
+                {
+                    "merchant": "Panda",
+                    "date": time.strftime("%Y-%m-%d"),
+                    "items": [{"name": "Milk", "price": 6.5}, {"name": "Bread", "price": 4.0}],
+                    "total": 10.5,
+                    "currency": "SAR",
+                    "type": "expense",
+                }
+            )
+        elif "dashboard recommendation engine" in system:
+            message["content"] = json.dumps(
+                {"recommendation": "You have 250 SAR in bills due this week. Your balance covers them.", "message": None}
+            )
+        elif body.get("tools") and not has_tool_results:
+            message["tool_calls"] = self.tool_calls_for(last_user)
+            finish = "tool_calls"
+        else:
+            message["content"] = "Here is a short summary based on your data."
+
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 4
+        completion_tokens = len(json.dumps(message)) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:16]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "finish_reason": finish, "message": message}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+
+def create_app(model: FakeModel) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy", "requests": model.requests}
+
+    @app.get("/v1/models")
+    def models():
+        # the API lists models to open its connection pool while warming up
+        return {"object": "list", "data": [{"id": "fake", "object": "model", "created": 0, "owned_by": "loadtest"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model.requests += 1
+        await model.delay()
+        return model.reply(body)
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    p = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8787)
+    p.add_argument("--latency-ms", type=float, default=800.0)
+    p.add_argument("--jitter-ms", type=float, default=200.0)
+    p.add_argument("--script", help="JSON list of {match, tool_calls:[{name, arguments}]} rules")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+
+    app = create_app(FakeModel(args.latency_ms, args.jitter_ms, script, seed=args.seed))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", timeout_keep_alive=120)
+
+
+if __name__ == "__main__":
+    main()
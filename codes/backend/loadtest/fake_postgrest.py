@@ -0,0 +1,65 @@
+"""
+Local stand-in for Supabase's PostgREST API over HTTP, serving the
+in-memory emulator (see postgrest_emulator.py) seeded with synthetic profiles.
+
+    python -m loadtest.fake_postgrest --port 54321 --profiles 500
+"""
+import argparse
+from typing import List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from loadtest.seed import build_dataset
+from loadtest.postgrest_emulator import PostgrestError, PostgrestStore
+
+
+# ---------- HTTP ----------
+def create_app(store: PostgrestStore) -> FastAPI:
+    app = FastAPI(title="Fake PostgREST")
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy", "tables": {k: len(v) for k, v in store.tables.items()}}
+
+    @app.api_route("/rest/v1/{table}", methods=["GET", "POST", "PATCH"])
+    async def rest(table: str, request: Request):
+        params = list(request.query_params.multi_items())
+        try:
+            if request.method == "GET":
+                return store.select(table, params)
+            payload = await request.json()
+            if request.method == "POST":
+                rows = payload if isinstance(payload, list) else [payload]
+                return JSONResponse(store.insert(table, rows), status_code=201)
+            return store.update(table, params, payload)
+        except PostgrestError as e:
+            return JSONResponse(e.body(), status_code=e.status)
+
+    @app.post("/rest/v1/rpc/{function}")
+    async def rpc(function: str, request: Request):
+        try:
+            return store.rpc(function, await request.json())
+        except PostgrestError as e:
+            return JSONResponse(e.body(), status_code=e.status)
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    p = argparse.ArgumentParser(description="In-memory PostgREST stand-in")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=54321)
+    p.add_argument("--profiles", type=int, default=200)
+    p.add_argument("--seed", type=int, default=7)
+    args = p.parse_args(argv)
+
+    store = PostgrestStore(build_dataset(n_profiles=args.profiles, seed=args.seed))
+    # long keep-alive: the API's pooled connections must not race idle closes
+    uvicorn.run(create_app(store), host=args.host, port=args.port, log_level="warning", timeout_keep_alive=120)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+In-memory PostgREST emulator for the filter subset the backend builds by hand.
+
+Supported: eq/neq/gt/gte/lt/lte, in.(...), like/ilike, is.null/true/false,
+not.<op>, and=(...)/or=(...) (nested), select, order, limit, offset;
+POST inserts and PATCH updates return the affected rows
+(Prefer: return=representation). POST /rpc/<name> runs the Python twin of a
+Postgres function in backend/sql (FUNCTIONS); pass functions={} to emulate
+a database where they are not deployed.
+
+`EmulatorTransport` is an httpx transport (sync and async), so the shared
+Supabase helpers can be pointed at it without a server:
+
+    store = PostgrestStore(build_dataset(n_profiles=50))
+    transport = install(store)        # sbr / sb_post / sb_patch / asbr ... now hit `store`
+    ...
+    transport.stats.snapshot()        # round-trips, bytes, per table
+"""
+import re
+import json
+import uuid
+import datetime
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from urllib.parse import parse_qsl
+
+import httpx
+
+RESERVED = {"select", "order", "limit", "offset", "and", "or"}
+
+PRIMARY_KEYS = {
+    "User_Profile": "profile_id",
+    "Monthly_Financial_Record": "record_id",
+    "Category": "category_id",
+    "Category_Summary": "summary_id",
+    "Fixed_Income": "income_id",
+    "Fixed_Expense": "expense_id",
+    "Goal": "goal_id",
+    "Goal_Transfer": "goal_transfer_id",
+    "Transaction": "transaction_id",
+    "Gold": "gold_data_id",
+    "Notification": "notification_id",
+}
+
+
+class PostgrestError(Exception):
+    def __init__(self, status: int, message: str, code: str = "PGRST000"):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.code = code
+
+    def body(self) -> Dict[str, Any]:
+        return {"code": self.code, "message": self.message, "details": None, "hint": None}
+
+
+# ---------- filter parsing ----------
+def _split_top(s: str) -> List[str]:
+    """Split on commas that are not inside parentheses or double quotes."""
+    out, depth, quoted, cur = [], 0, False, []
+    for ch in s:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            out.append("".join(cur))
+            cur = []
+        else:
+            cur.append(ch)
+    if cur:
+        out.append("".join(cur))
+    return [p.strip() for p in out if p.strip()]
+
+
+def _unquote(v: str) -> str:
+    v = v.strip()
+    if len(v) >= 2 and v[0] == v[-1] == '"':
+        return v[1:-1]
+    return v
+
+
+def _as_comparable(cell: Any, raw: str) -> Tuple[Any, Any]:
+    if isinstance(cell, bool):
+        return ("true" if cell else "false"), raw.lower()
+    if isinstance(cell, (int, float)):
+        try:
+            return float(cell), float(raw)
+        except ValueError:
+            return str(cell), raw
+    return str(cell), raw
+
+
+def _like_regex(pattern: str, ignore_case: bool) -> re.Pattern:
+    parts = re.split(r"([%*])", pattern)
+    rx = "".join(".*" if p in ("%", "*") else re.escape(p) for p in parts)
+    return re.compile(f"^{rx}$", re.IGNORECASE | re.DOTALL if ignore_case else re.DOTALL)
+
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+def _condition(column: str, expr: str) -> Predicate:
+    negate = False
+    if expr.startswith("not."):
+        negate, expr = True, expr[4:]
+    op, _, raw = expr.partition(".")
+
+    if op in _OPS:
+        fn = _OPS[op]
+
+        def pred(row):
+            cell = row.get(column)
+            if cell is None:
+                return False
+            a, b = _as_comparable(cell, raw)
+            try:
+                return fn(a, b)
+            except TypeError:
+                return False
+    elif op == "in":
+        values = {_unquote(v) for v in _split_top(raw.strip()[1:-1])}
+
+        def pred(row):
+            cell = row.get(column)
+            if cell is None:
+                return False
+            if isinstance(cell, str):
+                return cell in values
+            return any(a == b for a, b in (_as_comparable(cell, v) for v in values))
+    elif op in ("like", "ilike"):
+        rx = _like_regex(raw, ignore_case=(op == "ilike"))
+
+        def pred(row):
+            cell = row.get(column)
+            return cell is not None and bool(rx.match(str(cell)))
+    elif op == "is":
+        target = {"null": None, "true": True, "false": False}.get(raw.lower(), "invalid")
+        if target == "invalid":
+            raise PostgrestError(400, f'failed to parse filter (is.{raw})', "PGRST100")
+
+        def pred(row):
+            return row.get(column) is target
+    else:
+        raise PostgrestError(400, f"unsupported operator '{op}'", "PGRST100")
+
+    return (lambda row: not pred(row)) if negate else pred
+
+
+def _logic(items: str, any_of: bool) -> Predicate:
+    inner = items.strip()
+    if not (inner.startswith("(") and inner.endswith(")")):
+        raise PostgrestError(400, f"failed to parse logic tree ({items})", "PGRST100")
+    preds = []
+    for part in _split_top(inner[1:-1]):
+        m = re.match(r"^(not\.)?(and|or)(\(.*\))$", part)
+        if m:
+            sub = _logic(m.group(3), any_of=(m.group(2) == "or"))
+            preds.append((lambda r, p=sub: not p(r)) if m.group(1) else sub)
+            continue
+        column, _, expr = part.partition(".")
+        preds.append(_condition(column, expr))
+    if any_of:
+        return lambda row: any(p(row) for p in preds)
+    return lambda row: all(p(row) for p in preds)
+
+
+def build_predicate(params: Iterable[Tuple[str, str]]) -> Predicate:
+    preds: List[Predicate] = []
+    for key, value in params:
+        if key in ("and", "or"):
+            preds.append(_logic(value, any_of=(key == "or")))
+        elif key not in RESERVED:
+            preds.append(_condition(key, value))
+    return lambda row: all(p(row) for p in preds)
+
+
+def _order_key(column: str):
+    # PostgREST default: NULLS LAST for asc, NULLS FIRST for desc (the sort is
+    # reversed for desc, so "null sorts highest" covers both)
+    def key(row):
+        v = row.get(column)
+        return v is None, (0 if v is None else v)
+    return key
+
+
+# ---------- functions (POST /rpc/<name>) ----------
+def _transaction_totals(store: "PostgrestStore", args: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """sql/transaction_totals.sql"""
+    start, end = str(args["p_start"])[:10], str(args["p_end"])[:10]
+    sums = {"income": 0.0, "earning": 0.0, "expense": 0.0}
+    count = 0
+    for row in store._index("Transaction", "profile_id").get(str(args["p_profile_id"]), []):
+        kind = str(row.get("type") or "").lower()
+        if kind in sums and row.get("date") and start <= str(row["date"])[:10] <= end:
+            sums[kind] += float(row.get("amount") or 0)
+            count += 1
+    return [{**sums, "tx_count": count}]
+
+
+FUNCTIONS: Dict[str, Callable[["PostgrestStore", Dict[str, Any]], Any]] = {
+    "transaction_totals": _transaction_totals,
+}
+
+
+# ---------- store ----------
+class PostgrestStore:
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]], functions: Dict[str, Callable] | None = None):
+        self.tables = tables
+        self.functions = FUNCTIONS if functions is None else functions
+        # lazy hash indexes on *_id columns, so eq/in filters don't scan whole tables
+        self._indexes: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+
+    def _index(self, table: str, column: str) -> Dict[str, List[Dict[str, Any]]]:
+        idx = self._indexes.get((table, column))
+        if idx is None:
+            idx = {}
+            for row in self.tables[table]:
+                v = row.get(column)
+                if v is not None:
+                    idx.setdefault(str(v), []).append(row)
+            self._indexes[(table, column)] = idx
+        return idx
+
+    def _candidates(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        rows = self.tables[table]
+        for key, value in params:
+            if key.endswith("_id") and value.startswith("eq."):
+                return self._index(table, key).get(value[3:], [])
+            if key.endswith("_id") and value.startswith("in.("):
+                idx = self._index(table, key)
+                values = dict.fromkeys(_unquote(v) for v in _split_top(value[4:-1]))
+                return [row for v in values for row in idx.get(v, [])]
+        return rows
+
+    def _invalidate(self, table: str) -> None:
+        for key in [k for k in self._indexes if k[0] == table]:
+            del self._indexes[key]
+
+    def _table(self, name: str) -> List[Dict[str, Any]]:
+        if name not in self.tables:
+            raise PostgrestError(404, f'relation "public.{name}" does not exist', "42P01")
+        return self.tables[name]
+
+    def _check_columns(self, table: str, columns: Iterable[str]) -> None:
+        rows = self.tables.get(table) or []
+        if not rows:
+            return
+        known = rows[0].keys()
+        for c in columns:
+            if c != "*" and c not in known:
+                raise PostgrestError(400, f"column {table}.{c} does not exist", "42703")
+
+    def select(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        self._table(table)
+        self._check_columns(table, [k for k, _ in params if k not in RESERVED])
+        p = dict(params)
+        pred = build_predicate(params)
+        out = [r for r in self._candidates(table, params) if pred(r)]
+
+        for spec in reversed(_split_top(p.get("order", ""))):
+            column, _, direction = spec.partition(".")
+            desc = direction.startswith("desc")
+            out.sort(key=_order_key(column), reverse=desc)
+
+        offset = int(p.get("offset", 0) or 0)
+        limit = p.get("limit")
+        out = out[offset: offset + int(limit)] if limit is not None else out[offset:]
+
+        columns = [c.strip() for c in p.get("select", "*").split(",") if c.strip()]
+        self._check_columns(table, columns)
+        if "*" in columns:
+            return [dict(r) for r in out]
+        return [{c: r.get(c) for c in columns} for r in out]
+
+    def insert(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        target = self._table(table)
+        self._check_columns(table, {k for r in rows for k in r})
+        pk = PRIMARY_KEYS.get(table)
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        created = []
+        for r in rows:
+            row = dict(r)
+            if pk and not row.get(pk):
+                row[pk] = str(uuid.uuid4())
+            row.setdefault("created_at", now)
+            target.append(row)
+            created.append(dict(row))
+        self._invalidate(table)
+        return created
+
+    def rpc(self, name: str, args: Dict[str, Any]) -> Any:
+        fn = self.functions.get(name)
+        if fn is None:
+            raise PostgrestError(404, f"Could not find the function public.{name} in the schema cache", "PGRST202")
+        return fn(self, args)
+
+    def update(self, table: str, params: List[Tuple[str, str]], data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        target = self._table(table)
+        self._check_columns(table, data.keys())
+        pred = build_predicate(params)
+        updated = []
+        for row in target:
+            if pred(row):
+                row.update(data)
+                updated.append(dict(row))
+        self._invalidate(table)
+        return updated
+
+
+# ---------- httpx transport ----------
+@dataclass
+class QueryStats:
+    queries: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    by_table: Dict[str, int] = field(default_factory=dict)
+    by_method: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, method: str, table: str, sent: int, received: int) -> None:
+        with self._lock:
+            self.queries += 1
+            self.bytes_sent += sent
+            self.bytes_received += received
+            self.by_table[table] = self.by_table.get(table, 0) + 1
+            self.by_method[method] = self.by_method.get(method, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.queries = self.bytes_sent = self.bytes_received = 0
+            self.by_table = {}
+            self.by_method = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+                "by_table": dict(self.by_table),
+                "by_method": dict(self.by_method),
+            }
+
+
+class EmulatorTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Serves /rest/v1/<table> from a PostgrestStore and counts every round-trip."""
+
+    def __init__(self, store: PostgrestStore):
+        self.store = store
+        self.stats = QueryStats()
+        self._lock = threading.Lock()
+
+    def _dispatch(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        table = path.rsplit("/rest/v1/", 1)[-1].strip("/")
+        params = parse_qsl(request.url.query.decode("ascii"), keep_blank_values=True)
+        body = request.read()
+        try:
+            with self._lock:
+                if "/rest/v1/" not in path:
+                    raise PostgrestError(404, f"no route for {path}", "PGRST125")
+                if table.startswith("rpc/") and request.method == "POST":
+                    status, payload = 200, self.store.rpc(table[4:], json.loads(body or b"{}"))
+                elif request.method == "GET":
+                    status, payload = 200, self.store.select(table, params)
+                elif request.method == "POST":
+                    rows = json.loads(body or b"[]")
+                    status, payload = 201, self.store.insert(table, rows if isinstance(rows, list) else [rows])
+                elif request.method == "PATCH":
+                    status, payload = 200, self.store.update(table, params, json.loads(body or b"{}"))
+                else:
+                    raise PostgrestError(405, f"method {request.method} not supported", "PGRST000")
+        except PostgrestError as e:
+            status, payload = e.status, e.body()
+
+        content = json.dumps(payload, default=str).encode()
+        sent = len(str(request.url)) + len(body)
+        self.stats.record(request.method, table, sent, len(content))
+        return httpx.Response(status, content=content, headers={"Content-Type": "application/json"})
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self._dispatch(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        return self._dispatch(request)
+
+
+def install(store: PostgrestStore) -> EmulatorTransport:
+    """Point the shared Supabase helpers (supabase_rest) at `store`."""
+    import supabase_rest
+
+    transport = EmulatorTransport(store)
+    supabase_rest.configure(transport=transport, async_transport=transport)
+    return transport
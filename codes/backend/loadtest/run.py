@@ -0,0 +1,126 @@
+"""
+One-command offline capacity run on a single Linux box.
+
+Starts the fake PostgREST backend, the fake OpenAI server and the real API
+(uvicorn main:app) on free localhost ports, waits for them to come up,
+drives load, prints the per-endpoint report and shuts everything down.
+No request leaves 127.0.0.1.
+
+    cd backend
+    python -m loadtest.run --workers 2 --users 200 --duration 60 \\
+        --llm-latency-ms 900 --mix chat=6,receipt=2,dashboard=2
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from loadtest.driver import add_load_args, format_report, parse_mix, run_load
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+API_KEY = "loadtest"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_healthy(url: str, proc: subprocess.Popen, timeout_s: float = 120.0, streak: int = 1) -> None:
+    """Poll until `streak` answers in a row are 200 (each poll is a new connection, so may hit another worker)."""
+    deadline = time.monotonic() + timeout_s
+    ok = 0
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"process for {url} exited with {proc.returncode}")
+        try:
+            ok = ok + 1 if httpx.get(url, timeout=1).status_code == 200 else 0
+        except httpx.HTTPError:
+            ok = 0
+        if ok >= streak:
+            return
+        time.sleep(0.25 if ok == 0 else 0.02)
+    raise RuntimeError(f"{url} did not become healthy in {timeout_s}s")
+
+
+def main(argv: List[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Offline load test: fake OpenAI + fake PostgREST + real API")
+    p.add_argument("--workers", type=int, default=1, help="uvicorn workers for the API")
+    p.add_argument("--llm-latency-ms", type=float, default=800.0)
+    p.add_argument("--llm-jitter-ms", type=float, default=200.0)
+    p.add_argument("--tool-script", help="scripted tool calls for the fake model (JSON)")
+    add_load_args(p)
+    args = p.parse_args(argv)
+
+    pg_port, oa_port, api_port = _free_port(), _free_port(), _free_port()
+    py = sys.executable
+    procs: Dict[str, subprocess.Popen] = {}
+
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "loadtest",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{oa_port}/v1",
+        "FT_MODEL_ID": "ft:loadtest",
+        "SUPABASE_URL": f"http://127.0.0.1:{pg_port}",
+        "SUPABASE_SERVICE_ROLE_KEY": "loadtest",
+        "BACKEND_API_KEY": API_KEY,
+        # empty on purpose: the gold refresh loop must not reach the internet
+        "METALPRICE_API_KEY": "",
+        "PYTHONPATH": str(BACKEND_DIR),
+    }
+
+    oa_cmd = [py, "-m", "loadtest.fake_openai", "--port", str(oa_port),
+              "--latency-ms", str(args.llm_latency_ms), "--jitter-ms", str(args.llm_jitter_ms)]
+    if args.tool_script:
+        oa_cmd += ["--script", args.tool_script]
+
+    try:
+        procs["postgrest"] = subprocess.Popen(
+            [py, "-m", "loadtest.fake_postgrest", "--port", str(pg_port),
+             "--profiles", str(args.profiles), "--seed", str(args.seed)],
+            cwd=BACKEND_DIR, env=env,
+        )
+        procs["openai"] = subprocess.Popen(oa_cmd, cwd=BACKEND_DIR, env=env)
+        _wait_healthy(f"http://127.0.0.1:{pg_port}/health", procs["postgrest"])
+        _wait_healthy(f"http://127.0.0.1:{oa_port}/health", procs["openai"])
+
+        procs["api"] = subprocess.Popen(
+            [py, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(api_port),
+             "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+             "--timeout-keep-alive", "120"],
+            cwd=BACKEND_DIR, env=env,
+        )
+        # /ready is 503 until the worker's warm-up is done; don't measure the warm-up
+        _wait_healthy(f"http://127.0.0.1:{api_port}/ready", procs["api"], streak=4 * args.workers)
+
+        report = asyncio.run(
+            run_load(
+                f"http://127.0.0.1:{api_port}", API_KEY, args.users, args.duration,
+                parse_mix(args.mix), args.profiles, args.seed,
+            )
+        )
+        print(format_report(report))
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"config": vars(args), "report": report}, f, indent=2)
+    finally:
+        for proc in procs.values():
+            proc.terminate()
+        for proc in procs.values():
+            try:
+                proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Deterministic synthetic data for the offline load-test stand-ins.
+
+Every profile gets the rows the API reads: a User_Profile, nine monthly
+records, categories + summaries, fixed incomes/expenses, goals + transfers
+and a few months of transactions. The same seed always yields the same ids,
+so the driver can pick profile ids without talking to the fake backend.
+"""
+import uuid
+import random
+import datetime
+from typing import Any, Dict, List
+
+CATEGORY_NAMES = ["Groceries", "Transportation", "Utilities", "Health", "Entertainment", "Others"]
+MONTHS = 9
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def profile_ids(n_profiles: int, seed: int = 7) -> List[str]:
+    rng = random.Random(f"profiles-{seed}")
+    return [_uuid(rng) for _ in range(n_profiles)]
+
+
+def _month_start(d: datetime.date, back: int) -> datetime.date:
+    y, m = d.year, d.month - back
+    while m <= 0:
+        m += 12
+        y -= 1
+    return datetime.date(y, m, 1)
+
+
+def _month_end(start: datetime.date) -> datetime.date:
+    nxt = _month_start(start, -1)
+    return nxt - datetime.timedelta(days=1)
+
+
+def build_dataset(
+    n_profiles: int = 200,
+    seed: int = 7,
+    tx_per_month: int = 40,
+    today: datetime.date | None = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    today = today or datetime.date.today()
+    rng = random.Random(seed)
+    tables: Dict[str, List[Dict[str, Any]]] = {
+        "User_Profile": [],
+        "Monthly_Financial_Record": [],
+        "Category": [],
+        "Category_Summary": [],
+        "Fixed_Income": [],
+        "Fixed_Expense": [],
+        "Goal": [],
+        "Goal_Transfer": [],
+        "Transaction": [],
+        "Gold": [],
+        "Notification": [],
+    }
+
+    for pid in profile_ids(n_profiles, seed):
+        salary = rng.choice([6000, 8000, 9500, 12000, 15000, 22000])
+        tables["User_Profile"].append(
+            {
+                "profile_id": pid,
+                "user_id": _uuid(rng),
+                "full_name": f"User {pid[:6]}",
+                # a share of profiles has no cached balance -> computed path
+                "current_balance": None if rng.random() < 0.3 else round(rng.uniform(-500, 30000), 2),
+            }
+        )
+
+        cats = []
+        for name in CATEGORY_NAMES:
+            cat = {
+                "category_id": _uuid(rng),
+                "profile_id": pid,
+                "name": name,
+                "monthly_limit": rng.choice([None, 300, 500, 800, 1500, 2500]),
+                "icon": "circle",
+                "icon_color": "#888888",
+                "is_archived": False,
+            }
+            cats.append(cat)
+        tables["Category"].extend(cats)
+
+        for back in range(MONTHS - 1, -1, -1):
+            start = _month_start(today, back)
+            end = _month_end(start)
+            record_id = _uuid(rng)
+            expense_total = 0.0
+            for cat in cats:
+                spent = round(rng.uniform(0, 1.4) * float(cat["monthly_limit"] or 600), 2)
+                expense_total += spent
+                tables["Category_Summary"].append(
+                    {
+                        "summary_id": _uuid(rng),
+                        "record_id": record_id,
+                        "category_id": cat["category_id"],
+                        "total_expense": spent,
+                    }
+                )
+            earning = round(rng.choice([0, 0, 250, 900]), 2)
+            tables["Monthly_Financial_Record"].append(
+                {
+                    "record_id": record_id,
+                    "profile_id": pid,
+                    "period_start": start.isoformat(),
+                    "period_end": end.isoformat(),
+                    "total_income": salary,
+                    "total_earning": earning,
+                    "total_expense": round(expense_total, 2),
+                    "monthly_saving": round(salary + earning - expense_total, 2),
+                }
+            )
+
+            days = (end - start).days + 1
+            for _ in range(tx_per_month):
+                day = start + datetime.timedelta(days=rng.randrange(days))
+                is_income = rng.random() < 0.08
+                tx = {
+                    "transaction_id": _uuid(rng),
+                    "profile_id": pid,
+                    "date": day.isoformat(),
+                    "type": "income" if is_income else rng.choice(["expense"] * 9 + ["earning"]),
+                    "amount": round(rng.uniform(200, 3000) if is_income else rng.uniform(5, 400), 2),
+                    "category_id": None if is_income else rng.choice(cats)["category_id"],
+                }
+                # drawn before the check so the random stream doesn't depend on today
+                if day <= today:
+                    tables["Transaction"].append(tx)
+
+        tables["Fixed_Income"].append(
+            {
+                "income_id": _uuid(rng),
+                "profile_id": pid,
+                "name": "Salary",
+                "monthly_income": salary,
+                "payday": rng.choice([1, 10, 25, 27, 28]),
+                "start_time": _month_start(today, MONTHS).isoformat(),
+                "end_time": None,
+                "is_primary": True,
+                "is_transacted": False,
+                "last_update": today.isoformat(),
+            }
+        )
+        for name in rng.sample(["Rent", "Internet", "Phone", "Gym", "Streaming", "Insurance"], k=rng.randint(1, 4)):
+            tables["Fixed_Expense"].append(
+                {
+                    "expense_id": _uuid(rng),
+                    "profile_id": pid,
+                    "name": name,
+                    "amount": round(rng.uniform(30, 3000), 2),
+                    "due_date": rng.randint(1, 28),
+                    "is_transacted": False,
+                    "start_time": _month_start(today, MONTHS).isoformat(),
+                    "end_time": None,
+                    "last_update": today.isoformat(),
+                    "category_id": rng.choice(cats)["category_id"],
+                }
+            )
+
+        for i in range(rng.randint(0, 4)):
+            goal_id = _uuid(rng)
+            target = rng.choice([1000, 3000, 5000, 12000])
+            target_date = today + datetime.timedelta(days=rng.randint(-30, 365))
+            # the app's casing; an active goal past its date shows as Incompleted
+            status = rng.choice(["Active", "Active", "Completed"])
+            if status == "Active" and target_date < today:
+                status = "Incompleted"
+            tables["Goal"].append(
+                {
+                    "goal_id": goal_id,
+                    "profile_id": pid,
+                    "name": f"Goal {i + 1}",
+                    "target_amount": target,
+                    "target_date": target_date.isoformat(),
+                    "status": status,
+                    "created_at": _month_start(today, 3).isoformat() + "T09:00:00+00:00",
+                }
+            )
+            for _ in range(rng.randint(0, 6)):
+                tables["Goal_Transfer"].append(
+                    {
+                        "goal_transfer_id": _uuid(rng),
+                        "goal_id": goal_id,
+                        "direction": rng.choice(["assign", "assign", "assign", "unassign"]),
+                        "amount": round(rng.uniform(50, target / 3), 2),
+                        "created_at": today.isoformat() + "T10:00:00+00:00",
+                    }
+                )
+
+    for back in range(14, -1, -1):
+        day = today - datetime.timedelta(days=back)
+        base = 240 + rng.uniform(-5, 5)
+        for karat, mult in ((24, 1.0), (21, 21 / 24), (18, 18 / 24)):
+            tables["Gold"].append(
+                {
+                    "gold_data_id": _uuid(rng),
+                    "karat": karat,
+                    "past_price": round(base * mult * 0.99, 2),
+                    "current_price": round(base * mult, 2),
+                    "predicted_price": round(base * mult * 1.01, 2),
+                    "predicted_low": round(base * mult * 0.995, 2),
+                    "predicted_high": round(base * mult * 1.02, 2),
+                    "confidence_level": "medium",
+                    "created_at": f"{day.isoformat()}T06:00:00+00:00",
+                }
+            )
+
+    return tables
@@ -0,0 +1,168 @@
+# backend/logs.py
+"""
+Structured logging that stays off the request path.
+
+    log = get_logger(__name__)
+    log.info("gold.refresh_ok", rows=12)
+    log.debug("chat.tool_traces", traces=traces)      # skipped entirely at INFO
+    log.info("gold.model_output", result=result, sample=0.1)
+
+Records go through a stdlib QueueHandler to one QueueListener thread, which
+does the JSON serialization and the stdout write (and the TRACE_FILE append
+for kept traces). Field values are kept as
+objects until then (lazy serialization), so callers must not mutate them
+after logging. Each field is capped at LOG_MAX_FIELD_CHARS once serialized;
+`sample` keeps only that fraction of a noisy event.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from typing import Any, Dict, List, Optional
+
+from tracing import TRACE_FILE, TRACE_LOGGER, current_trace_id
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "2000"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue the record as-is; formatting happens on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # tracebacks hold frames; render them now, while they still exist
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # never block a request on logging; drop instead
+            pass
+
+
+def _cap(value: Any) -> Any:
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    if len(text) > LOG_MAX_FIELD_CHARS:
+        return f"{text[:LOG_MAX_FIELD_CHARS]}...(+{len(text) - LOG_MAX_FIELD_CHARS} chars)"
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        rid = getattr(record, "request_id", None)
+        if rid:
+            out["request_id"] = rid
+        for k, v in (getattr(record, "fields", None) or {}).items():
+            out[k] = _cap(v)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class _TraceLineFormatter(logging.Formatter):
+    """A kept trace (the record's msg) as one JSON line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
+
+
+def _is_trace(record: logging.LogRecord) -> bool:
+    return record.name == TRACE_LOGGER
+
+
+def setup_logging() -> None:
+    """Install the queue handler on the root logger (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(LOG_QUEUE_SIZE)
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+    stream.addFilter(lambda r: not _is_trace(r))
+    handlers: List[logging.Handler] = [stream]
+    if TRACE_FILE:
+        trace_file = logging.FileHandler(TRACE_FILE, encoding="utf-8", delay=True)
+        trace_file.setFormatter(_TraceLineFormatter())
+        trace_file.addFilter(_is_trace)
+        handlers.append(trace_file)
+    _listener = logging.handlers.QueueListener(q, *handlers, respect_handler_level=False)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers = [_LazyQueueHandler(q)]
+    traces = logging.getLogger(TRACE_LOGGER)
+    traces.handlers = [_LazyQueueHandler(q)]
+    traces.setLevel(logging.INFO)  # exported whatever LOG_LEVEL is
+    traces.propagate = False
+    root.setLevel(LOG_LEVEL)
+    # httpx/openai log every request at INFO; we have metrics and traces for that
+    for noisy in ("httpx", "httpcore", "openai"):
+        logging.getLogger(noisy).setLevel(max(logging.WARNING, root.level))
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class StructLogger:
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(name)
+
+    def _log(self, level: int, event: str, fields: Dict[str, Any], exc_info: bool = False) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        sample = fields.pop("sample", 1.0)
+        if sample < 1.0 and random.random() >= sample:
+            return
+        self._logger.log(
+            level, event, exc_info=exc_info, extra={"fields": fields, "request_id": current_trace_id()}
+        )
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields)
+
+    def exception(self, event: str, **fields: Any) -> None:
+        """Error with the current exception's traceback."""
+        self._log(logging.ERROR, event, fields, exc_info=True)
+
+    def is_enabled(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+
+def get_logger(name: str) -> StructLogger:
+    setup_logging()
+    return StructLogger(name)
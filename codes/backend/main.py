@@ -2,40 +2,75 @@
 import os
 import json
 import datetime
-from datetime import datetime as dt, timezone, timedelta
 from typing import Any, Dict, List, Optional
 
 from contextlib import asynccontextmanager
 from pathlib import Path
 import uuid
 import math
-import traceback
+import time
 import asyncio
+import functools
 
 
-import httpx
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from openai import OpenAI
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
-from goldmodel.gold_lstm_service import load_gold_lstm, predict_next_week_all_karats
-from receipt_llm import parse_receipt_with_llm
-from categories_model.receipt_model import predict_category, update_with_feedback
+from goldmodel.gold_lstm_service import predict_next_week_all_karats, warm_up as warm_up_gold_model
+from goldmodel.gold_store import get_price_exactly_7_days_ago_from_db_async, save_gold_to_db
+from goldmodel import gold_worker
+from receipt_llm import parse_receipt, parse_receipts_stream
+from receipt_cache import CACHE as RECEIPT_CACHE
+from categories_model.receipt_model import (
+    predict_category,
+    predict_categories,
+    suggest_category,
+    model_info as category_model_info,
+    record_feedback,
+    start_feedback_worker,
+    stop_feedback_worker,
+    warm_up as warm_up_categorizer,
+)
 from recommendations import generate_daily_dashboard_recommendation
-from supabase import create_client
+from aggregation import GROUP_BYS, aggregate, check_buckets, load_transactions, period_totals, resolve_range
+from goal_progress import signed_transfer_amount as _signed_transfer_amount
+from notifications.notification_service import start_notification_worker, stop_notification_worker
+from notifications.budget_alerts import run_budget_alerts
+from notifications import goal_scheduler
+from notifications.dedup import GATE as NOTIFICATION_GATE
+from llm_client import chat_completion, aclose as close_llm_client, warm as warm_llm_client
+from metrics import REGISTRY, HTTP_LATENCY, GOLD_REFRESH, GOLD_REFRESH_LATENCY, CATEGORIZER
+from tracing import BUFFER as TRACE_BUFFER, defer_trace, request_id, span, start_trace
+from logs import get_logger, shutdown_logging
+from startup import background_stage, cancel_background, ready as startup_ready, report as startup_report, stage
+from supabase_rest import (
+    asbr,
+    asb_single,
+    asb_list,
+    run_sync,
+    aclose as close_supabase_client,
+    awarm as warm_supabase_client,
+)
 
 # Force load backend/.env (next to main.py)
 load_dotenv(dotenv_path=Path(__file__).with_name(".env"))
 
+log = get_logger("surra.api")
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 FT_MODEL_ID = os.getenv("FT_MODEL_ID")  # fine tuned model id
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 FASTAPI_SECRET = os.getenv("FASTAPI_SECRET_KEY")  # optional
 PORT = int(os.getenv("PORT", "8000"))
+RECEIPT_BULK_MAX_ITEMS = int(os.getenv("RECEIPT_BULK_MAX_ITEMS", "200"))
+RECEIPT_BULK_CONCURRENCY = int(os.getenv("RECEIPT_BULK_CONCURRENCY", "8"))
+RECEIPT_BULK_ITEM_TIMEOUT = float(os.getenv("RECEIPT_BULK_ITEM_TIMEOUT", "45"))
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "60"))
 
 if not FT_MODEL_ID:
     raise RuntimeError("FT_MODEL_ID is missing. Set it in backend/.env to your fine tuned model id.")
@@ -43,10 +78,10 @@ if not FT_MODEL_ID:
 if not all([OPENAI_API_KEY, SUPABASE_URL, SERVICE_KEY]):
     raise RuntimeError("Missing required env vars. Check backend/.env")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
 
-
-def _load_tools():
+@functools.lru_cache(maxsize=1)
+def openai_tools() -> List[Dict[str, Any]]:
+    """tools_data.json in OpenAI's tool format; read once, by the `tools` startup stage."""
     path = os.path.join(os.path.dirname(__file__), "datasets/tools_data.json")
     with open(path, "r", encoding="utf-8") as f:
         raw = json.load(f)
@@ -62,87 +97,14 @@ def _load_tools():
         )
 
     tools = [t if is_openai_ready(t) else {"type": "function", "function": t} for t in tool_list]
-    print("Loaded tools[0]:", tools[0])
+    log.debug("tools.first_schema", tool=tools[0])
     return tools
 
 
-OPENAI_TOOLS = _load_tools()
-
-# ---------- Supabase REST helpers ----------
-REST = f"{SUPABASE_URL}/rest/v1"
-
-
-def sbr(path: str, params: Dict[str, str] | None = None) -> List[Dict[str, Any]]:
-    """GET from Supabase REST with service key."""
-    with httpx.Client(timeout=20) as c:
-        r = c.get(
-            f"{REST}/{path}",
-            params=params or {},
-            headers={
-                "apikey": SERVICE_KEY,
-                "Authorization": f"Bearer {SERVICE_KEY}",
-                "Accept": "application/json",
-            },
-        )
-        if r.status_code >= 400:
-            raise HTTPException(r.status_code, r.text)
-        return r.json()
-
-
-def sb_post(path: str, rows: list[dict]):
-    with httpx.Client(timeout=20) as c:
-        r = c.post(
-            f"{REST}/{path}",
-            headers={
-                "apikey": SERVICE_KEY,
-                "Authorization": f"Bearer {SERVICE_KEY}",
-                "Content-Type": "application/json",
-                "Prefer": "return=representation",
-            },
-            json=rows,
-        )
-        if r.status_code >= 400:
-            raise HTTPException(r.status_code, r.text)
-        return r.json()
-
-
-def sb_patch(path: str, filters: Dict[str, str], data: Dict[str, Any]):
-    with httpx.Client(timeout=20) as c:
-        r = c.patch(
-            f"{REST}/{path}",
-            params=filters,
-            headers={
-                "apikey": SERVICE_KEY,
-                "Authorization": f"Bearer {SERVICE_KEY}",
-                "Content-Type": "application/json",
-                "Prefer": "return=representation",
-            },
-            json=data,
-        )
-        if r.status_code >= 400:
-            raise HTTPException(r.status_code, r.text)
-        return r.json()
-
-
-def sb_single(table: str, select: str, **filters) -> Optional[Dict[str, Any]]:
-    params = {"select": select}
-    for k, v in filters.items():
-        params[k] = f"eq.{v}"
-    rows = sbr(table, params)
-    return rows[0] if rows else None
-
-
-def sb_list(table: str, select: str, **filters) -> List[Dict[str, Any]]:
-    params = {"select": select}
-    for k, v in filters.items():
-        params[k] = f"eq.{v}"
-    return sbr(table, params)
-
-
 # ---------- Domain helpers ----------
-def _current_period(profile_id: str) -> Dict[str, Any]:
+async def _current_period(profile_id: str) -> Dict[str, Any]:
     today = datetime.date.today().isoformat()
-    rows = sbr(
+    rows = await asbr(
         "Monthly_Financial_Record",
         {
             "select": "record_id,period_start,period_end",
@@ -154,7 +116,7 @@ def _current_period(profile_id: str) -> Dict[str, Any]:
     if rows:
         return rows[0]
 
-    rows = sbr(
+    rows = await asbr(
         "Monthly_Financial_Record",
         {
             "select": "record_id,period_start,period_end",
@@ -169,40 +131,21 @@ def _current_period(profile_id: str) -> Dict[str, Any]:
 
 
 # ---------- Tool implementations ----------
-def get_balance(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
-    v = sb_single("User_Profile", "current_balance", profile_id=profile_id)
+async def get_balance_async(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
+    v = await asb_single("User_Profile", "current_balance", profile_id=profile_id)
     if v and "current_balance" in v and v["current_balance"] is not None:
         return {"balance_sar": float(v["current_balance"]), "source": "User_Profile"}
 
-    period = _current_period(profile_id)
-    start, end = period["period_start"], period["period_end"]
-
-    incomes = sbr(
-        "Transaction",
-        {
-            "select": "amount",
-            "profile_id": f"eq.{profile_id}",
-            "type": "eq.income",
-            "and": f"(date.gte.{start},date.lte.{end})",
-        },
-    )
-    expenses = sbr(
-        "Transaction",
-        {
-            "select": "amount",
-            "profile_id": f"eq.{profile_id}",
-            "type": "eq.expense",
-            "and": f"(date.gte.{start},date.lte.{end})",
-        },
-    )
+    period = await _current_period(profile_id)
+    start = datetime.date.fromisoformat(str(period["period_start"])[:10])
+    end = datetime.date.fromisoformat(str(period["period_end"])[:10])
 
-    inc = sum(float(x["amount"]) for x in incomes if x.get("amount") is not None)
-    exp = sum(float(x["amount"]) for x in expenses if x.get("amount") is not None)
-    return {"balance_sar": round(inc - exp, 2), "source": "computed", "period": period}
+    totals = await period_totals(profile_id, start, end)
+    return {"balance_sar": round(totals["income"] - totals["expense"], 2), "source": "computed", "period": period}
 
 
-def get_payday(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
-    rows = sbr(
+async def get_payday_async(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
+    rows = await asbr(
         "Fixed_Income",
         {
             "select": "income_id,name,monthly_income,payday,is_primary",
@@ -221,8 +164,8 @@ def get_payday(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
     return {"next_payday": None, "source": "none"}
 
 
-def get_fixed_incomes(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
-    rows = sb_list(
+async def get_fixed_incomes_async(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
+    rows = await asb_list(
         "Fixed_Income",
         "income_id,name,monthly_income,payday,start_time,end_time,is_primary,is_transacted,last_update",
         profile_id=profile_id,
@@ -230,8 +173,8 @@ def get_fixed_incomes(profile_id: str, user_id: str | None = None) -> Dict[str,
     return {"incomes": rows}
 
 
-def get_fixed_expenses(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
-    rows = sb_list(
+async def get_fixed_expenses_async(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
+    rows = await asb_list(
         "Fixed_Expense",
         "expense_id,name,amount,due_date,is_transacted,last_update",
         profile_id=profile_id,
@@ -239,13 +182,13 @@ def get_fixed_expenses(profile_id: str, user_id: str | None = None) -> Dict[str,
     return {"expenses": rows}
 
 
-def get_current_record(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
-    period = _current_period(profile_id)
+async def get_current_record_async(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
+    period = await _current_period(profile_id)
     return {"record": period}
 
 
-def _get_period_by_record_id(profile_id: str, record_id: str) -> Dict[str, Any]:
-    rows: List[Dict[str, Any]] = sbr(
+async def _get_period_by_record_id(profile_id: str, record_id: str) -> Dict[str, Any]:
+    rows: List[Dict[str, Any]] = await asbr(
         "Monthly_Financial_Record",
         {
             "select": "record_id,period_start,period_end,total_expense,total_income,monthly_saving,total_earning,profile_id",
@@ -261,11 +204,11 @@ def _get_period_by_record_id(profile_id: str, record_id: str) -> Dict[str, Any]:
     return rows[0]
 
 
-def _get_previous_period(
+async def _get_previous_period(
     profile_id: str, base_record: Optional[Dict[str, Any]] = None
 ) -> Optional[Dict[str, Any]]:
     if base_record is None:
-        base_record = _current_period(profile_id)
+        base_record = await _current_period(profile_id)
 
     base_start_str = base_record["period_start"]
     base_start = datetime.date.fromisoformat(base_start_str)
@@ -277,7 +220,7 @@ def _get_previous_period(
     prev_start_str = first_prev_month.isoformat()
     prev_end_str = last_prev_month.isoformat()
 
-    rows: List[Dict[str, Any]] = sbr(
+    rows: List[Dict[str, Any]] = await asbr(
         "Monthly_Financial_Record",
         {
             "select": "record_id,period_start,period_end,total_expense,total_income,monthly_saving,total_earning,profile_id",
@@ -291,7 +234,7 @@ def _get_previous_period(
     return rows[0] if rows else None
 
 
-def get_category_summary(
+async def get_category_summary_async(
     profile_id: str,
     record_id: Optional[str] = None,
     category_id: Optional[str] = None,
@@ -299,9 +242,9 @@ def get_category_summary(
 ) -> Dict[str, Any]:
     try:
         if record_id:
-            period = _get_period_by_record_id(profile_id, record_id)
+            period = await _get_period_by_record_id(profile_id, record_id)
         else:
-            period = _current_period(profile_id)
+            period = await _current_period(profile_id)
     except ValueError:
         return {
             "ok": False,
@@ -317,7 +260,7 @@ def get_category_summary(
         try:
             resolved_category_id = str(uuid.UUID(category_id))
         except ValueError:
-            cat_rows: List[Dict[str, Any]] = sbr(
+            cat_rows: List[Dict[str, Any]] = await asbr(
                 "Category",
                 {
                     "select": "category_id,name",
@@ -341,7 +284,7 @@ def get_category_summary(
     if resolved_category_id:
         params["category_id"] = f"eq.{resolved_category_id}"
 
-    cs_rows: List[Dict[str, Any]] = sbr("Category_Summary", params)
+    cs_rows: List[Dict[str, Any]] = await asbr("Category_Summary", params)
 
     if not cs_rows:
         return {
@@ -360,7 +303,7 @@ def get_category_summary(
             "profile_id": f"eq.{profile_id}",
             "category_id": f"in.({','.join(cat_ids)})",
         }
-        cat_rows: List[Dict[str, Any]] = sbr("Category", cat_params)
+        cat_rows: List[Dict[str, Any]] = await asbr("Category", cat_params)
         for c in cat_rows or []:
             cid = c.get("category_id")
             if cid:
@@ -402,12 +345,12 @@ def get_category_summary(
     }
 
 
-def get_record_history(
+async def get_record_history_async(
     profile_id: str,
     user_id: str | None = None,
     limit: int = 12,
 ) -> Dict[str, Any]:
-    rows: List[Dict[str, Any]] = sbr(
+    rows: List[Dict[str, Any]] = await asbr(
         "Monthly_Financial_Record",
         {
             "select": "record_id,period_start,period_end,total_expense,total_income,monthly_saving,total_earning,profile_id",
@@ -419,7 +362,7 @@ def get_record_history(
     return {"records": rows}
 
 
-def compare_category_last_month(
+async def compare_category_last_month_async(
     profile_id: str,
     category_id: Optional[str] = None,
     user_id: Optional[str] = None,
@@ -434,7 +377,7 @@ def compare_category_last_month(
             "difference": None,
         }
 
-    current_summary = get_category_summary(profile_id=profile_id, category_id=category_id)
+    current_summary = await get_category_summary_async(profile_id=profile_id, category_id=category_id)
 
     if not current_summary.get("ok") or not current_summary.get("summaries"):
         return {
@@ -462,7 +405,7 @@ def compare_category_last_month(
         "utilized_percentage": curr_cs.get("utilized_percentage"),
     }
 
-    prev_record = _get_previous_period(profile_id, base_record=current_record)
+    prev_record = await _get_previous_period(profile_id, base_record=current_record)
     if not prev_record:
         return {
             "ok": False,
@@ -474,7 +417,7 @@ def compare_category_last_month(
         }
 
     prev_record_id = prev_record["record_id"]
-    prev_summary = get_category_summary(
+    prev_summary = await get_category_summary_async(
         profile_id=profile_id,
         record_id=prev_record_id,
         category_id=category_id,
@@ -517,15 +460,20 @@ def compare_category_last_month(
     }
 
 
-def suggest_savings_plan(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
+async def suggest_savings_plan_async(profile_id: str, user_id: str | None = None) -> Dict[str, Any]:
     import calendar
 
     today = datetime.date.today()
 
-    bal = get_balance(profile_id)
+    # independent lookups, fetched concurrently
+    bal, payday_info, cat, period = await asyncio.gather(
+        get_balance_async(profile_id),
+        get_payday_async(profile_id),
+        get_category_summary_async(profile_id),
+        _current_period(profile_id),
+    )
     balance = float(bal.get("balance_sar", 0) or 0)
 
-    payday_info = get_payday(profile_id)
     payday_raw = payday_info.get("next_payday")
     income = float(payday_info.get("amount") or 0)
 
@@ -564,13 +512,11 @@ def suggest_savings_plan(profile_id: str, user_id: str | None = None) -> Dict[st
 
     days_left = max(0, (payday - today).days)
 
-    cat = get_category_summary(profile_id)
     total_spent = sum(float(c.get("spent", 0) or 0) for c in cat.get("summaries", []))
 
-    period = _current_period(profile_id)
     record_id = period["record_id"]
 
-    record = sb_single(
+    record = await asb_single(
         "Monthly_Financial_Record",
         "total_income,total_earning",
         record_id=record_id,
@@ -625,24 +571,11 @@ def suggest_savings_plan(profile_id: str, user_id: str | None = None) -> Dict[st
     }
 
 
-def _signed_transfer_amount(direction: Optional[str], amount: Any) -> float:
-    if amount is None:
-        return 0.0
-
-    value = float(amount)
-    dir_norm = (direction or "").lower()
-
-    if dir_norm in ("unassign", "from_goal", "withdraw", "out"):
-        return -value
-
-    return value
-
-
-def get_goal_transfers(profile_id: str, goal_id: str, user_id: str | None = None):
+async def get_goal_transfers_async(profile_id: str, goal_id: str, user_id: str | None = None):
     try:
         resolved = str(uuid.UUID(goal_id))
     except Exception:
-        rows = sb_list(
+        rows = await asb_list(
             "Goal",
             "goal_id,name,target_amount,target_date,status",
             profile_id=profile_id,
@@ -670,7 +603,7 @@ def get_goal_transfers(profile_id: str, goal_id: str, user_id: str | None = None
 
         resolved = rows[0]["goal_id"]
 
-    transfers = sb_list(
+    transfers = await asb_list(
         "Goal_Transfer",
         "goal_transfer_id,direction,amount,created_at,goal_id",
         goal_id=resolved,
@@ -692,12 +625,12 @@ def get_goal_transfers(profile_id: str, goal_id: str, user_id: str | None = None
     return {"ok": True, "goal_id": resolved, "transfers": out}
 
 
-def get_top_spending(
+async def get_top_spending_async(
     profile_id: str,
     user_id: str | None = None,
     n: int = 3,
 ) -> Dict[str, Any]:
-    summary = get_category_summary(profile_id=profile_id, user_id=user_id)
+    summary = await get_category_summary_async(profile_id=profile_id, user_id=user_id)
     record = summary.get("record")
     summaries: List[Dict[str, Any]] = summary.get("summaries", [])
 
@@ -713,7 +646,7 @@ def get_top_spending(
     }
 
 
-def get_weekly_summary(
+async def get_weekly_summary_async(
     profile_id: str,
     user_id: str | None = None,
 ) -> Dict[str, Any]:
@@ -721,65 +654,65 @@ def get_weekly_summary(
     week_start = today - datetime.timedelta(days=today.weekday())
     week_end = week_start + datetime.timedelta(days=6)
 
-    start_str = week_start.isoformat()
-    end_str = week_end.isoformat()
+    frame = await load_transactions(profile_id, week_start, week_end)
+    by_day = aggregate(frame, week_start, week_end, "day")["buckets"]
 
-    rows: List[Dict[str, Any]] = sbr(
-        "Transaction",
+    days = [
         {
-            "select": "date,type,amount",
-            "profile_id": f"eq.{profile_id}",
-            "and": f"(date.gte.{start_str},date.lte.{end_str})",
-        },
-    )
-
-    by_day: Dict[str, Dict[str, float]] = {}
-    for i in range(7):
-        d = (week_start + datetime.timedelta(days=i)).isoformat()
-        by_day[d] = {"income": 0.0, "expense": 0.0}
-
-    for r in rows:
-        d = r.get("date")
-        if not d:
-            continue
-
-        ttype = (r.get("type") or "").lower()
-        amount = float(r.get("amount", 0) or 0)
-
-        if d not in by_day:
-            by_day[d] = {"income": 0.0, "expense": 0.0}
-
-        if ttype == "income":
-            by_day[d]["income"] += amount
-        elif ttype == "expense":
-            by_day[d]["expense"] += amount
-
-    days = []
-    for i in range(7):
-        d = (week_start + datetime.timedelta(days=i)).isoformat()
-        income = round(by_day[d]["income"], 2)
-        expense = round(by_day[d]["expense"], 2)
-        days.append(
-            {
-                "date": d,
-                "income": income,
-                "expense": expense,
-                "net": round(income - expense, 2),
-            }
-        )
+            "date": b["date"],
+            "income": b["income"],
+            "expense": b["expense"],
+            "net": round(b["income"] - b["expense"], 2),
+        }
+        for b in by_day
+    ]
 
     return {
-        "week_start": start_str,
-        "week_end": end_str,
+        "week_start": week_start.isoformat(),
+        "week_end": week_end.isoformat(),
         "days": days,
     }
 
 
-def get_goals(
+async def get_transaction_summary_async(
     profile_id: str,
     user_id: str | None = None,
+    group_by: str = "day",
+    period: Optional[str] = None,
+    last_days: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
 ) -> Dict[str, Any]:
-    goals: List[Dict[str, Any]] = sb_list(
+    group_by = (group_by or "day").lower()
+    if group_by not in GROUP_BYS:
+        return {"ok": False, "reason": f"invalid_group_by:{group_by}"}
+    try:
+        start, end = resolve_range(datetime.date.today(), period, last_days, start_date, end_date)
+        check_buckets(start, end, group_by)
+    except ValueError as e:
+        return {"ok": False, "reason": f"invalid_range:{e}"}
+
+    if group_by == "category":
+        frame, cat_rows = await asyncio.gather(
+            load_transactions(profile_id, start, end),
+            asb_list("Category", "category_id,name", profile_id=profile_id),
+        )
+    else:
+        frame, cat_rows = await load_transactions(profile_id, start, end), []
+
+    result = aggregate(frame, start, end, group_by)
+    names = {c["category_id"]: c.get("name") for c in cat_rows}
+    for b in result["buckets"]:
+        if "category_id" in b:
+            b["category_name"] = names.get(b["category_id"]) if b["category_id"] else "Uncategorized"
+    return {"ok": True, **result}
+
+
+async def get_goals_async(
+    profile_id: str,
+    user_id: str | None = None,
+) -> Dict[str, Any]:
+    goals: List[Dict[str, Any]] = await asb_list(
         "Goal",
         "goal_id,name,target_amount,target_date,status,created_at,profile_id",
         profile_id=profile_id,
@@ -788,17 +721,22 @@ def get_goals(
     if not goals:
         return {"goals": []}
 
+    transfers_per_goal: List[List[Dict[str, Any]]] = await asyncio.gather(
+        *(
+            asb_list(
+                "Goal_Transfer",
+                "goal_transfer_id,direction,amount,created_at,goal_id",
+                goal_id=g["goal_id"],
+            )
+            for g in goals
+        )
+    )
+
     out = []
-    for g in goals:
+    for g, transfers in zip(goals, transfers_per_goal):
         gid = g["goal_id"]
         target = float(g.get("target_amount", 0) or 0)
 
-        transfers: List[Dict[str, Any]] = sb_list(
-            "Goal_Transfer",
-            "goal_transfer_id,direction,amount,created_at,goal_id",
-            goal_id=gid,
-        )
-
         saved = 0.0
         for t in transfers:
             saved += _signed_transfer_amount(t.get("direction"), t.get("amount"))
@@ -824,7 +762,7 @@ def get_goals(
     return {"goals": out}
 
 
-def simulate_purchase(
+async def simulate_purchase_async(
     profile_id: str,
     user_id: str | None = None,
     price: float = 0.0,
@@ -832,12 +770,16 @@ def simulate_purchase(
 ) -> Dict[str, Any]:
     price = float(price or 0)
 
-    bal_info = get_balance(profile_id=profile_id, user_id=user_id)
+    bal_info, income_info, expense_info = await asyncio.gather(
+        get_balance_async(profile_id=profile_id, user_id=user_id),
+        get_fixed_incomes_async(profile_id=profile_id, user_id=user_id),
+        get_fixed_expenses_async(profile_id=profile_id, user_id=user_id),
+    )
     balance_before = float(bal_info.get("balance_sar", 0) or 0)
     balance_after = round(balance_before - price, 2)
 
-    incomes = get_fixed_incomes(profile_id=profile_id, user_id=user_id).get("incomes", [])
-    expenses = get_fixed_expenses(profile_id=profile_id, user_id=user_id).get("expenses", [])
+    incomes = income_info.get("incomes", [])
+    expenses = expense_info.get("expenses", [])
 
     total_income = sum(float(i.get("monthly_income", 0)) for i in incomes)
     total_expenses = sum(float(e.get("amount", 0)) for e in expenses)
@@ -860,18 +802,20 @@ def simulate_purchase(
 
     cat_block = None
     if category_id:
-        cat_info = get_category_summary(profile_id=profile_id, category_id=category_id)
+        cat_info = await get_category_summary_async(profile_id=profile_id, category_id=category_id)
         summaries = cat_info.get("summaries", [])
         if summaries:
             cs = summaries[0]
-            remaining_before = float(cs.get("remaining", 0))
-            remaining_after = round(remaining_before - price, 2)
+            # remaining is None when the category has no monthly limit
+            remaining = cs.get("remaining")
+            remaining_before = float(remaining) if remaining is not None else None
+            remaining_after = round(remaining_before - price, 2) if remaining_before is not None else None
             cat_block = {
                 "category_id": cs.get("category_id"),
                 "category_name": cs.get("category_name"),
                 "remaining_before": remaining_before,
                 "remaining_after": remaining_after,
-                "will_overspend": remaining_after < 0,
+                "will_overspend": remaining_after is not None and remaining_after < 0,
             }
 
     return {
@@ -892,14 +836,14 @@ def simulate_purchase(
     }
 
 
-def get_goal_details(
+async def get_goal_details_async(
     profile_id: str,
     goal_name: str | None = None,
     goal_id: str | None = None,
     user_id: str | None = None,
 ):
     if goal_name and not goal_id:
-        row = sb_single(
+        row = await asb_single(
             "Goal",
             "goal_id,name,target_amount,target_date,status,created_at,profile_id",
             profile_id=profile_id,
@@ -910,7 +854,7 @@ def get_goal_details(
         goal_id = row["goal_id"]
         g = row
     else:
-        g = sb_single(
+        g = await asb_single(
             "Goal",
             "goal_id,name,target_amount,target_date,status,created_at,profile_id",
             profile_id=profile_id,
@@ -919,7 +863,7 @@ def get_goal_details(
         if not g:
             return {"ok": False, "reason": "goal_not_found"}
 
-    transfers_data = get_goal_transfers(
+    transfers_data = await get_goal_transfers_async(
         profile_id=profile_id,
         goal_id=goal_id,
         user_id=user_id,
@@ -947,13 +891,64 @@ def get_goal_details(
         },
     }
 
-def get_gold_prediction(profile_id: str | None = None, user_id: str | None = None, **kwargs):
-    data = get_latest_gold_from_db()
+async def get_gold_prediction_async(profile_id: str | None = None, user_id: str | None = None, **kwargs):
+    data = await get_latest_gold_from_db_async()
     if not data:
         return {"ok": False, "reason": "no_gold_data"}
     return data
 
 
+ASYNC_NAME_TO_FUNC = {
+    "get_balance": get_balance_async,
+    "get_payday": get_payday_async,
+    "get_fixed_incomes": get_fixed_incomes_async,
+    "get_fixed_expenses": get_fixed_expenses_async,
+    "get_current_record": get_current_record_async,
+    "get_category_summary": get_category_summary_async,
+    "get_top_spending": get_top_spending_async,
+    "get_weekly_summary": get_weekly_summary_async,
+    "get_transaction_summary": get_transaction_summary_async,
+    "get_goals": get_goals_async,
+    "get_goal_transfers": get_goal_transfers_async,
+    "get_goal_details": get_goal_details_async,
+    "simulate_purchase": simulate_purchase_async,
+    "suggest_savings_plan": suggest_savings_plan_async,
+    "get_record_history": get_record_history_async,
+    "compare_category_last_month": compare_category_last_month_async,
+    "get_gold_prediction": get_gold_prediction_async,
+}
+
+
+# ---------- Sync wrappers (scripts / non-async callers) ----------
+# run_sync keeps one event loop (and its pooled AsyncClient) per thread, so a
+# call costs no new loop or connection.
+def _sync_tool(afn):
+    @functools.wraps(afn)
+    def wrapper(*args, **kwargs):
+        return run_sync(afn(*args, **kwargs))
+
+    wrapper.__name__ = afn.__name__.removesuffix("_async")
+    return wrapper
+
+
+get_balance = _sync_tool(get_balance_async)
+get_payday = _sync_tool(get_payday_async)
+get_fixed_incomes = _sync_tool(get_fixed_incomes_async)
+get_fixed_expenses = _sync_tool(get_fixed_expenses_async)
+get_current_record = _sync_tool(get_current_record_async)
+get_category_summary = _sync_tool(get_category_summary_async)
+get_top_spending = _sync_tool(get_top_spending_async)
+get_weekly_summary = _sync_tool(get_weekly_summary_async)
+get_transaction_summary = _sync_tool(get_transaction_summary_async)
+get_goals = _sync_tool(get_goals_async)
+get_goal_transfers = _sync_tool(get_goal_transfers_async)
+get_goal_details = _sync_tool(get_goal_details_async)
+simulate_purchase = _sync_tool(simulate_purchase_async)
+suggest_savings_plan = _sync_tool(suggest_savings_plan_async)
+get_record_history = _sync_tool(get_record_history_async)
+compare_category_last_month = _sync_tool(compare_category_last_month_async)
+get_gold_prediction = _sync_tool(get_gold_prediction_async)
+
 
 NAME_TO_FUNC = {
     "get_balance": get_balance,
@@ -964,6 +959,7 @@ NAME_TO_FUNC = {
     "get_category_summary": get_category_summary,
     "get_top_spending": get_top_spending,
     "get_weekly_summary": get_weekly_summary,
+    "get_transaction_summary": get_transaction_summary,
     "get_goals": get_goals,
     "get_goal_transfers": get_goal_transfers,
     "get_goal_details": get_goal_details,
@@ -971,8 +967,7 @@ NAME_TO_FUNC = {
     "suggest_savings_plan": suggest_savings_plan,
     "get_record_history": get_record_history,
     "compare_category_last_month": compare_category_last_month,
-
-"get_gold_prediction": get_gold_prediction,
+    "get_gold_prediction": get_gold_prediction,
 }
 
 # ---------- Chat models with history ----------
@@ -1011,6 +1006,8 @@ def build_messages(body: ChatIn) -> List[Dict[str, str]]:
                 "- Compare spending in one category between this month and last month → use `compare_category_last_month`.\n"
                 "- Top spending categories → use `get_top_spending`.\n"
                 "- Weekly breakdown → use `get_weekly_summary`.\n"
+                "- Income, spending or net for any other range or grouping (e.g. 'spending last 10 days', 'by week this quarter', "
+                "'by category last month') → use `get_transaction_summary` with period or last_days and group_by.\n"
                 "- User goals → use `get_goals`.\n"
                 "- Saving advice → use `suggest_savings_plan`.\n\n"
                 "2. Be consistent and concise\n"
@@ -1095,10 +1092,21 @@ class ReceiptIn(BaseModel):
     ocr_text: str
 
 
+class ReceiptBulkIn(BaseModel):
+    ocr_texts: List[str] = Field(..., min_length=1, max_length=RECEIPT_BULK_MAX_ITEMS)
+    # optional per-request caps; never above the server's
+    concurrency: Optional[int] = Field(None, ge=1)
+    item_timeout_seconds: Optional[float] = Field(None, gt=0)
+
+
 class ReceiptCategoryIn(BaseModel):
     text: str
 
 
+class ReceiptCategoryBatchIn(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=500)
+
+
 class ReceiptFeedbackIn(BaseModel):
     text: str
     correct_category: str
@@ -1107,26 +1115,59 @@ class ReceiptFeedbackIn(BaseModel):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Load model
-    try:
-        load_gold_lstm()
-        print("Gold LSTM loaded at startup")
-    except Exception as e:
-        print("Gold LSTM not loaded:", e)
-
-    # Start background scheduler
-    task = asyncio.create_task(gold_refresh_loop(interval_seconds=600, samples=60))
+    # Only cheap stages block startup. Warm-up (models loaded and run once,
+    # connection pools opened) happens in the background; /ready answers 503
+    # until it has finished, so traffic only reaches warm workers. With
+    # GOLD_WORKER=spawn/external TensorFlow never loads here.
+    with stage("tools"):
+        log.info("tools.loaded", names=[t["function"]["name"] for t in openai_tools()])
+    with stage("categorizer_feedback_worker"):
+        start_feedback_worker()
+    with stage("notification_worker"):
+        start_notification_worker()
+    background_stage("warmup.categorizer", warm_up_categorizer, timeout=WARMUP_TIMEOUT_SECONDS)
+    background_stage("warmup.supabase_pool", warm_supabase_client, timeout=WARMUP_TIMEOUT_SECONDS)
+    background_stage("warmup.openai_pool", warm_llm_client, timeout=WARMUP_TIMEOUT_SECONDS)
+    if gold_worker.GOLD_WORKER_MODE == "inline":
+        background_stage("warmup.gold_model", warm_up_gold_model, timeout=WARMUP_TIMEOUT_SECONDS)
+        task = asyncio.create_task(
+            gold_refresh_loop(interval_seconds=gold_worker.GOLD_REFRESH_SECONDS, samples=gold_worker.GOLD_SAMPLES)
+        )
+    elif gold_worker.GOLD_WORKER_MODE == "spawn":
+        task = asyncio.create_task(gold_worker.supervise())
+    else:
+        task = None
+    tasks = [task] if task is not None else []
+    if goal_scheduler.TICK_SECONDS > 0:
+        tasks.append(asyncio.create_task(goal_scheduler.scheduler_loop()))
+    log.info("server.started", gold_worker=gold_worker.GOLD_WORKER_MODE, **startup_report())
 
     yield
 
-    # Shutdown: cancel task cleanly
-    task.cancel()
+    # Shutdown: cancel tasks cleanly (spawn mode: this also stops the gold worker)
+    await cancel_background()
+    for task in tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
     try:
-        await task
-    except asyncio.CancelledError:
-        pass
+        await run_in_threadpool(stop_feedback_worker)
+    except Exception:
+        log.exception("categorizer.feedback_flush_failed")
+
+    try:
+        await run_in_threadpool(stop_notification_worker)
+    except Exception:
+        log.exception("notifications.flush_failed")
 
-    print("Server shutting down")
+    await close_llm_client()
+    await close_supabase_client()
+    RECEIPT_CACHE.close()
+    log.info("server.shutdown")
+    shutdown_logging()
 
 
 app = FastAPI(title="Surra Chat API", lifespan=lifespan)
@@ -1149,14 +1190,19 @@ async def check_key(request: Request, call_next):
     public_paths = {
         "/",
         "/health",
+        "/ready",
         "/docs",
         "/openapi.json",
         "/receipt/preprocess",
+        "/receipt/preprocess/bulk",
+        "/receipt/process",
         "/gold/refresh",
         "/gold/latest",
         "/gold/history",  # note: this is allowed but not defined yet
         "/receipt/category/predict",
+        "/receipt/category/predict/batch",
         "/receipt/category/feedback",
+        "/receipt/category/model",
         "/dashboard/recommendations",
     }
 
@@ -1173,38 +1219,220 @@ async def check_key(request: Request, call_next):
     return await call_next(request)
 
 
+async def _finish_after(body, finish):
+    """Pass a streamed body through, then finish its deferred trace."""
+    error = None
+    try:
+        async for chunk in body:
+            yield chunk
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        finish(error)
+
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    # registered last, so it wraps check_key and also times rejected requests
+    rid = request_id(request.headers.get("x-request-id"))
+    started, status = time.perf_counter(), 500
+    with start_trace(f"{request.method} {request.url.path}", rid, method=request.method) as root:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["x-request-id"] = rid
+            if "content-length" not in response.headers:
+                # streamed (bulk NDJSON): its spans come while the body is sent, after this returns
+                response.body_iterator = _finish_after(response.body_iterator, defer_trace())
+            return response
+        finally:
+            # route template, not the raw path, to keep label cardinality bounded
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            root.name = f"{request.method} {route}"
+            root.set(status=status)
+            HTTP_LATENCY.observe(
+                time.perf_counter() - started, method=request.method, route=route, status=str(status)
+            )
+
+
+@app.get("/metrics")
+async def metrics():
+    # async on purpose: the threadpool gauge must be read from the event loop
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/admin/traces")
+def list_traces(kind: str = "slow", limit: int = 20):
+    if kind not in ("slow", "recent"):
+        raise HTTPException(400, "kind must be 'slow' or 'recent'")
+    return {"kind": kind, "traces": TRACE_BUFFER.list(kind, max(1, min(limit, 200)))}
+
+
+@app.get("/admin/traces/{trace_id}")
+def get_trace(trace_id: str):
+    trace = TRACE_BUFFER.get(trace_id)
+    if trace is None:
+        raise HTTPException(404, "Trace not found (not sampled or already evicted)")
+    return trace
+
+
+@app.get("/admin/receipt-cache")
+def receipt_cache_stats():
+    return RECEIPT_CACHE.stats()
+
+
+@app.get("/admin/notification-gate")
+def notification_gate_stats():
+    return NOTIFICATION_GATE.stats()
+
+
+@app.post("/admin/budget-alerts/run")
+async def budget_alerts_run(dry_run: bool = False):
+    """Evaluate every profile's budgets now (normally run from cron via python -m notifications.budget_alerts)."""
+    return await run_budget_alerts(dry_run=dry_run)
+
+
+@app.post("/admin/goal-scheduler/tick")
+async def goal_scheduler_tick():
+    """Fire the goal reminders / completion notices due today (also run by the loop or cron)."""
+    return await goal_scheduler.run_tick()
+
+
 @app.get("/")
 def root():
     return {"ok": True, "service": "Surra backend", "model": FT_MODEL_ID}
 
 
 @app.post("/receipt/preprocess")
-def receipt_preprocess(body: ReceiptIn):
+async def receipt_preprocess(body: ReceiptIn):
     try:
-        data = parse_receipt_with_llm(body.ocr_text)
+        data = await parse_receipt(body.ocr_text)
         return {"ok": True, "data": data}
     except Exception as e:
-        traceback.print_exc()
+        log.exception("receipt.preprocess_failed")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/receipt/preprocess/bulk")
+async def receipt_preprocess_bulk(body: ReceiptBulkIn):
+    """
+    NDJSON stream, one line per receipt as it finishes:
+    {"index", "ok", "data" | "error", "ms"}, then a final {"done": true, ...}.
+    """
+    concurrency = min(body.concurrency or RECEIPT_BULK_CONCURRENCY, RECEIPT_BULK_CONCURRENCY)
+    item_timeout = min(body.item_timeout_seconds or RECEIPT_BULK_ITEM_TIMEOUT, RECEIPT_BULK_ITEM_TIMEOUT)
+
+    async def lines():
+        started = time.perf_counter()
+        ok = failed = 0
+        async for result in parse_receipts_stream(body.ocr_texts, concurrency, item_timeout):
+            if result["ok"]:
+                ok += 1
+            else:
+                failed += 1
+                log.warning("receipt.bulk_item_failed", index=result["index"], error=result["error"])
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+        ms = round((time.perf_counter() - started) * 1000, 1)
+        yield json.dumps({"done": True, "ok": ok, "failed": failed, "ms": ms}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/receipt/process")
+async def receipt_process(body: ReceiptIn):
+    """
+    /receipt/preprocess + /receipt/category/predict in one round-trip.
+    The merchant and every item are classified in one predict_categories batch;
+    data.suggested_category is the category for the whole transaction.
+    """
+    started = time.perf_counter()
+    try:
+        data = await parse_receipt(body.ocr_text)
+    except Exception as e:
+        log.exception("receipt.process_parse_failed")
         raise HTTPException(status_code=400, detail=str(e))
+    parsed = time.perf_counter()
+
+    has_merchant = data["merchant"] != "Unknown"
+    texts = ([data["merchant"]] if has_merchant else []) + [i["name"] for i in data["items"]]
+    try:
+        with span("categorizer.predict_batch", size=len(texts)):
+            preds = await run_in_threadpool(predict_categories, texts)
+        CATEGORIZER.inc(len(preds), op="predict", outcome="ok")
+    except Exception as e:
+        # the parse is still useful without categories
+        CATEGORIZER.inc(len(texts), op="predict", outcome="error")
+        log.exception("receipt.process_categorize_failed", size=len(texts))
+        preds, data["category_error"] = None, str(e)
+
+    if preds is not None:
+        merchant_pred = preds[0] if has_merchant else None
+        item_preds = preds[1:] if has_merchant else preds
+        data["merchant_category"] = merchant_pred["category"] if merchant_pred else None
+        # new dicts: parse results can be shared with the cache and coalesced requests
+        data["items"] = [dict(item, category=pred["category"]) for item, pred in zip(data["items"], item_preds)]
+        data["suggested_category"] = suggest_category(
+            merchant_pred, item_preds, [i["price"] for i in data["items"]]
+        )
+    else:
+        data["merchant_category"] = data["suggested_category"] = None
+    done = time.perf_counter()
+
+    return {
+        "ok": True,
+        "data": data,
+        "timings_ms": {
+            "parse": round((parsed - started) * 1000, 1),
+            "categorize": round((done - parsed) * 1000, 1),
+            "total": round((done - started) * 1000, 1),
+        },
+    }
 
 
 @app.post("/receipt/category/predict")
 def receipt_category_predict(body: ReceiptCategoryIn):
     try:
-        return predict_category(body.text)
+        result = predict_category(body.text)
+        CATEGORIZER.inc(op="predict", outcome="ok")
+        return result
+    except Exception as e:
+        CATEGORIZER.inc(op="predict", outcome="error")
+        log.exception("categorizer.predict_failed")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/receipt/category/predict/batch")
+def receipt_category_predict_batch(body: ReceiptCategoryBatchIn):
+    try:
+        items = predict_categories(body.texts)
+        CATEGORIZER.inc(len(items), op="predict", outcome="ok")
+        return {"items": items}
     except Exception as e:
-        traceback.print_exc()
+        CATEGORIZER.inc(len(body.texts), op="predict", outcome="error")
+        log.exception("categorizer.predict_batch_failed", size=len(body.texts))
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/receipt/category/model")
+def receipt_category_model():
+    # served vs published version: lets ops confirm every worker caught up
+    return category_model_info()
+
+
 @app.post("/receipt/category/feedback")
 def receipt_category_feedback(body: ReceiptFeedbackIn):
     try:
-        return update_with_feedback(body.text, body.correct_category)
+        # appended to the feedback log; applied to the model in mini-batches
+        result = record_feedback(body.text, body.correct_category)
+        CATEGORIZER.inc(op="feedback", outcome="ok")
+        return result
     except ValueError as ve:
+        CATEGORIZER.inc(op="feedback", outcome="rejected")
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        traceback.print_exc()
+        CATEGORIZER.inc(op="feedback", outcome="error")
+        log.exception("categorizer.feedback_failed")
         raise HTTPException(status_code=500, detail="Internal error")
 
 
@@ -1213,156 +1441,17 @@ def health():
     return {"status": "healthy"}
 
 
-def _today_window_utc():
-    now = dt.now(timezone.utc)
-    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    end = start + timedelta(days=1)
-    return start.isoformat(), end.isoformat()
-
-def _iso_day_window_utc(day: dt):
-    start = day.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
-    end = start + timedelta(days=1)
-    return start.isoformat(), end.isoformat()
-
-def get_price_exactly_7_days_ago_from_db(karat: int) -> Optional[float]:
-    target_day = dt.now(timezone.utc) - timedelta(days=7)
-    start_iso, end_iso = _iso_day_window_utc(target_day)
-
-    rows = sbr(
-        "Gold",
-        {
-            "select": "created_at,karat,current_price",
-            "karat": f"eq.{karat}",
-            "created_at": f"gte.{start_iso}",
-            "and": f"(created_at.lt.{end_iso})",
-            "order": "created_at.desc",
-            "limit": "1",
-        },
-    )
-    if not rows:
-        return None
-    return float(rows[0]["current_price"])
-
-
-
-def save_gold_to_db(result: dict):
-    """
-    Upsert today's Gold rows (per karat).
-
-    Requirements handled:
-    - past_price is NOT NULL in your schema, so:
-      * INSERT requires past_7d to exist in DB
-      * UPDATE keeps existing past_price if past_7d missing
-    - Stores prediction RANGE if your table has predicted_low/predicted_high
-      (otherwise falls back to storing mean in predicted_price only)
-    """
-    print("=== GOLD MODEL OUTPUT ===")
-    print(json.dumps(result, indent=2, ensure_ascii=False))
-
-    start_iso, end_iso = _today_window_utc()
-    affected: list[dict] = []
-
-    for karat_str, obj in result.get("prices", {}).items():
-        karat = int(str(karat_str).replace("K", ""))
-
-        interval = obj.get("predicted_tplus7_interval") or {}
-        conf = obj.get("confidence") or {}
-
-        current_price = obj.get("current")
-        mean_price = interval.get("mean")
-        low_price = interval.get("lo")
-        high_price = interval.get("hi")
-        confidence_level = conf.get("level")
-
-        if current_price is None or mean_price is None:
-            raise HTTPException(500, f"Gold model output missing current/mean for {karat_str}")
-
-        # past_price must come from DB exactly 7 days ago
-        past_7d = get_price_exactly_7_days_ago_from_db(karat)
-
-        # Check if today's row exists (IMPORTANT: use params= not payload=)
-        rows = sbr(
-            "Gold",
-            params={
-                "select": "gold_data_id,created_at,past_price",
-                "karat": f"eq.{karat}",
-                "created_at": f"gte.{start_iso}",
-                "and": f"(created_at.lt.{end_iso})",
-                "limit": "1",
-            },
-        )
-
-        def _try_patch(gold_data_id: str, payload: dict):
-            """Patch, and if predicted_low/high columns don't exist, retry without them."""
-            try:
-                return sb_patch("Gold", {"gold_data_id": f"eq.{gold_data_id}"}, payload)
-            except HTTPException as e:
-                msg = str(e.detail) if hasattr(e, "detail") else str(e)
-                # fallback if schema doesn't have predicted_low/high
-                if ("predicted_low" in msg) or ("predicted_high" in msg) or ("column" in msg and "predicted_" in msg):
-                    payload.pop("predicted_low", None)
-                    payload.pop("predicted_high", None)
-                    return sb_patch("Gold", {"gold_data_id": f"eq.{gold_data_id}"}, payload)
-                raise
-
-        def _try_insert(payload: dict):
-            """Insert, and if predicted_low/high columns don't exist, retry without them."""
-            try:
-                return sb_post("Gold", [payload])
-            except HTTPException as e:
-                msg = str(e.detail) if hasattr(e, "detail") else str(e)
-                if ("predicted_low" in msg) or ("predicted_high" in msg) or ("column" in msg and "predicted_" in msg):
-                    payload.pop("predicted_low", None)
-                    payload.pop("predicted_high", None)
-                    return sb_post("Gold", [payload])
-                raise
-
-        if rows:
-            # UPDATE existing row for today
-            gid = rows[0]["gold_data_id"]
-
-            payload = {
-                "current_price": current_price,
-                # keep predicted_price as mean for compatibility
-                "predicted_price": mean_price,
-                "confidence_level": confidence_level,
-            }
-
-            # store range IF table supports it
-            if low_price is not None and high_price is not None:
-                payload["predicted_low"] = low_price
-                payload["predicted_high"] = high_price
-
-            # Only overwrite past_price if we successfully fetched 7-days-ago
-            if past_7d is not None:
-                payload["past_price"] = past_7d
-
-            updated = _try_patch(gid, payload)
-            affected.extend(updated)
-
-        else:
-            # INSERT new row for today requires NOT NULL past_price
-            if past_7d is None:
-                print(f" No past_price for {karat}K → using current as fallback")
-                past_7d = current_price
-
-            payload = {
-                "karat": karat,
-                "past_price": past_7d,
-                "current_price": current_price,
-                "predicted_price": mean_price,  # mean kept
-                "confidence_level": confidence_level,
-            }
-
-            # store range IF table supports it
-            if low_price is not None and high_price is not None:
-                payload["predicted_low"] = low_price
-                payload["predicted_high"] = high_price
+@app.get("/ready")
+def readiness():
+    """200 once the warm-up stages are done (failed ones included, see the report), else 503."""
+    if not startup_ready():
+        return JSONResponse(status_code=503, content={"status": "warming_up", **startup_report()})
+    return {"status": "ready", **startup_report()}
 
-            inserted = _try_insert(payload)
-            affected.extend(inserted)
 
-    return affected
+def _record_gold_refresh(trigger: str, outcome: str, started: float) -> None:
+    GOLD_REFRESH.inc(trigger=trigger, outcome=outcome)
+    GOLD_REFRESH_LATENCY.observe(time.perf_counter() - started, trigger=trigger, outcome=outcome)
 
 
 async def gold_refresh_loop(interval_seconds: int = 600, samples: int = 60):
@@ -1371,37 +1460,64 @@ async def gold_refresh_loop(interval_seconds: int = 600, samples: int = 60):
     Runs forever until cancelled.
     """
     while True:
+        started = time.perf_counter()
         try:
-            result =  predict_next_week_all_karats(n_samples=samples)
-            save_gold_to_db(result)
-            print(f"[gold_refresh_loop] refreshed successfully at {dt.now(timezone.utc).isoformat()}")
-        except Exception as e:
-            print("[gold_refresh_loop] refresh failed:", repr(e))
-            traceback.print_exc()
+            # CPU-bound inference + blocking DB writes: run them off the event loop
+            result = await run_in_threadpool(predict_next_week_all_karats, n_samples=samples)
+            await run_in_threadpool(save_gold_to_db, result)
+            _record_gold_refresh("loop", "ok", started)
+            log.info("gold.refresh_ok", duration_s=round(time.perf_counter() - started, 3))
+        except Exception:
+            _record_gold_refresh("loop", "error", started)
+            log.exception("gold.refresh_failed")
 
         await asyncio.sleep(interval_seconds)
 
 
+def _gold_snapshot() -> Dict[str, Any]:
+    try:
+        snapshot = gold_worker.read_snapshot()
+    except (OSError, ValueError):
+        log.exception("gold.snapshot_unreadable")
+        snapshot = None
+    if not snapshot or "result" not in snapshot:
+        raise HTTPException(status_code=503, detail="Gold worker has not published a prediction yet")
+    return snapshot
+
+
 @app.get("/gold/predict")
 def gold_predict(samples: int = 60):
+    if gold_worker.out_of_process():
+        # the worker predicts with its own GOLD_SAMPLES; samples is ignored here
+        return _gold_snapshot()["result"]
     try:
         samples = max(10, min(int(samples), 200))
         return predict_next_week_all_karats(n_samples=samples)
     except Exception as e:
-        traceback.print_exc()
+        log.exception("gold.predict_failed")
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/gold/refresh")
 def gold_refresh(samples: int = 60):
+    if gold_worker.out_of_process():
+        gold_worker.request_refresh()
+        GOLD_REFRESH.inc(trigger="manual", outcome="queued")
+        return {"ok": True, "queued": True}
     samples = max(10, min(int(samples), 200))
-    result = predict_next_week_all_karats(n_samples=samples)
-    rows = save_gold_to_db(result)
+    started = time.perf_counter()
+    try:
+        result = predict_next_week_all_karats(n_samples=samples)
+        rows = save_gold_to_db(result)
+    except Exception:
+        _record_gold_refresh("manual", "error", started)
+        raise
+    _record_gold_refresh("manual", "ok", started)
     return {"ok": True, "affected_rows": len(rows)}
 
 @app.get("/gold/latest")
-def gold_latest():
-    rows = sbr(
+async def gold_latest():
+    rows = await asbr(
         "Gold",
         {
             "select": "karat,current_price,predicted_price,predicted_low,predicted_high,confidence_level,created_at",
@@ -1421,10 +1537,9 @@ def gold_latest():
     if not latest_by_karat:
         raise HTTPException(404, "No gold data found")
 
-    def build_block(r):
-        kar = int(r["karat"])
+    def build_block(r, past_7_days):
         return {
-            "past_7_days": get_price_exactly_7_days_ago_from_db(kar),
+            "past_7_days": past_7_days,
             "current": float(r["current_price"]),
             "predicted_tplus7_interval": {
                 "lo": float(r["predicted_low"]) if r.get("predicted_low") is not None else None,
@@ -1433,10 +1548,14 @@ def gold_latest():
             "confidence": {"level": r.get("confidence_level")},
         }
 
+    karats = [k for k in [24, 21, 18] if k in latest_by_karat]
+    past_prices = await asyncio.gather(
+        *(get_price_exactly_7_days_ago_from_db_async(k) for k in karats)
+    )
+
     prices = {}
-    for karat in [24, 21, 18]:
-        if karat in latest_by_karat:
-            prices[f"{karat}K"] = build_block(latest_by_karat[karat])
+    for karat, past in zip(karats, past_prices):
+        prices[f"{karat}K"] = build_block(latest_by_karat[karat], past)
 
     return {
         "unit": "SAR_per_gram",
@@ -1453,21 +1572,14 @@ def is_gold_question(text: str) -> bool:
     ]
     text = text.lower()
     return any(word in text for word in keywords)
-def get_latest_gold_from_db():
-    sb = create_client(
-        os.getenv("SUPABASE_URL"),
-        os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    )
-
-    rows = (
-        sb.table("Gold")
-        .select(
-            "karat, current_price, predicted_low, predicted_high, confidence_level, created_at"
-        )
-        .order("created_at", desc=True)
-        .limit(200)
-        .execute()
-        .data
+async def get_latest_gold_from_db_async():
+    rows = await asbr(
+        "Gold",
+        {
+            "select": "karat,current_price,predicted_low,predicted_high,confidence_level,created_at",
+            "order": "created_at.desc",
+            "limit": "200",
+        },
     )
 
     latest = {}
@@ -1496,8 +1608,14 @@ def get_latest_gold_from_db():
         }
     }
 
-def detect_intent(text: str) -> str:
-    r = client.chat.completions.create(
+
+get_latest_gold_from_db = _sync_tool(get_latest_gold_from_db_async)
+
+
+async def detect_intent(text: str) -> str:
+    r = await chat_completion(
+        "chat",
+        purpose="intent",
         model="gpt-4o-mini",
         messages=[
             {
@@ -1519,12 +1637,19 @@ def detect_intent(text: str) -> str:
 
 
 
-      
+async def _run_tool(name: str, args: Dict[str, Any]) -> Any:
+    fn = ASYNC_NAME_TO_FUNC.get(name)
+    with span(f"tool.{name}", tool=name):
+        return await fn(**args) if fn else {"error": f"tool {name} not implemented"}
+
+
 @app.post("/chat")
-def chat(body: ChatIn):
+async def chat(body: ChatIn):
     try:
         
-        intent = detect_intent(body.text)
+        with span("chat.detect_intent") as s:
+            intent = await detect_intent(body.text)
+            s.set(intent=intent)
 
         
         if intent == "advice":
@@ -1533,19 +1658,14 @@ def chat(body: ChatIn):
             model = FT_MODEL_ID
 
        
-        print(" Intent detected:", intent)
-        print(" Model selected:", model)
-
-        
         base_messages = build_messages(body)
+        log.debug("chat.model_selected", intent=intent, model=model, history_turns=len(body.history))
 
-        print(f" /chat using model: {model}")
-        print(f" history turns: {len(body.history)}")
-
-        r = client.chat.completions.create(
+        r = await chat_completion(
+            "chat",
             model=model,
             messages=base_messages,
-            tools=OPENAI_TOOLS,
+            tools=openai_tools(),
             tool_choice="auto",
         )
         msg = r.choices[0].message
@@ -1554,6 +1674,7 @@ def chat(body: ChatIn):
         traces: List[Dict[str, Any]] = []
 
         if msg.tool_calls:
+            calls = []
             for call in msg.tool_calls:
                 name = call.function.name
                 args = json.loads(call.function.arguments or "{}")
@@ -1561,9 +1682,13 @@ def chat(body: ChatIn):
                 args["profile_id"] = body.profile_id
                 if body.user_id is not None:
                     args["user_id"] = body.user_id
+                calls.append((call, name, args))
+
+            # tool calls from one model turn are independent; run them concurrently
+            with span("chat.tools", count=len(calls)):
+                results = await asyncio.gather(*(_run_tool(name, args) for _, name, args in calls))
 
-                fn = NAME_TO_FUNC.get(name)
-                result = fn(**args) if fn else {"error": f"tool {name} not implemented"}
+            for (call, name, args), result in zip(calls, results):
                 traces.append({"tool": name, "args": args, "result": result})
 
                 tool_msgs.append(
@@ -1575,7 +1700,9 @@ def chat(body: ChatIn):
                     }
                 )
 
-            r2 = client.chat.completions.create(
+            r2 = await chat_completion(
+                "chat",
+                purpose="tool_followup",
                 model=model,
                 messages=[
                     *base_messages,
@@ -1587,8 +1714,8 @@ def chat(body: ChatIn):
         else:
             answer = msg.content
 
-        print("=== TOOL TRACES ===")
-        print(json.dumps(traces, indent=2, ensure_ascii=False))
+        # serialized on the logger thread, and only when DEBUG is on
+        log.debug("chat.tool_traces", traces=traces)
 
         return {
             "answer": answer,
@@ -1597,18 +1724,16 @@ def chat(body: ChatIn):
         }
 
     except Exception as e:
-        print("=== /chat ERROR ===")
-        traceback.print_exc()
+        log.exception("chat.failed")
         return JSONResponse(
             status_code=500,
             content={"error": str(e), "type": e.__class__.__name__},
         )
-print("Loaded tools:", [t["function"]["name"] for t in OPENAI_TOOLS])
 
 @app.get("/dashboard/recommendations")
-def dashboard_recommendations(profile_id: str):
+async def dashboard_recommendations(profile_id: str):
     try:
-        result = generate_daily_dashboard_recommendation(
+        result = await generate_daily_dashboard_recommendation(
             profile_id=profile_id,
             months=9,
         )
@@ -1616,7 +1741,7 @@ def dashboard_recommendations(profile_id: str):
     except HTTPException:
         raise
     except Exception:
-        traceback.print_exc()
+        log.exception("dashboard.recommendation_failed", profile_id=profile_id)
         raise HTTPException(
             status_code=503,
             detail="We’re having trouble refreshing your insight right now. Please try again later."
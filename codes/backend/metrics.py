@@ -0,0 +1,232 @@
+# backend/metrics.py
+"""
+In-process metrics in the Prometheus text format, served at GET /metrics.
+
+Counters and histograms are plain dicts keyed by label values behind one
+lock each, so recording is a dict lookup and a few additions. Values are
+per worker process: with `uvicorn --workers N` every worker keeps its own
+series, and the `pid` label on process_info tells them apart.
+"""
+import os
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import anyio.to_thread
+
+# seconds; covers Supabase reads (ms) up to slow model calls and gold refreshes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        head = f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.kind}\n"
+        return head + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{_fmt_labels(self.label_names, key)} {_fmt_value(v)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][i] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = [(k, list(c), s[0]) for k, (c, s) in self._values.items()]
+        for key, counts, total in items:
+            running = 0
+            for bound, c in zip((*self.buckets, float("inf")), counts):
+                running += c
+                le = f'le="{_fmt_value(bound)}"'
+                yield f"{self.name}_bucket{_fmt_labels(self.label_names, key, le)} {running}"
+            yield f"{self.name}_sum{_fmt_labels(self.label_names, key)} {_fmt_value(total)}"
+            yield f"{self.name}_count{_fmt_labels(self.label_names, key)} {running}"
+
+
+class Gauge(_Metric):
+    """Sampled at scrape time from `fn`, which returns {label values: value}."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        fn: Callable[[], Dict[LabelValues, float]] | None = None,
+    ):
+        super().__init__(name, help_text, labels)
+        self.fn = fn
+
+    def samples(self) -> Iterable[str]:
+        for key, v in (self.fn() if self.fn else {}).items():
+            yield f"{self.name}{_fmt_labels(self.label_names, key)} {_fmt_value(v)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "".join(m.render() for m in self._metrics)
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help_text, labels))
+
+
+def histogram(name: str, help_text: str, labels: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help_text, labels, buckets))
+
+
+def gauge(name: str, help_text: str, labels: Sequence[str] = (), fn=None) -> Gauge:
+    return REGISTRY.register(Gauge(name, help_text, labels, fn))
+
+
+# ---------- Hot-path metrics ----------
+HTTP_LATENCY = histogram(
+    "surra_http_request_duration_seconds", "API request latency by route", ("method", "route", "status")
+)
+SUPABASE_CALLS = counter(
+    "surra_supabase_requests_total", "Supabase REST calls by table", ("table", "method", "status")
+)
+SUPABASE_LATENCY = histogram(
+    "surra_supabase_request_duration_seconds", "Supabase REST latency by table", ("table", "method")
+)
+LLM_CALLS = counter("surra_llm_requests_total", "OpenAI calls by model and purpose", ("model", "purpose", "outcome"))
+LLM_LATENCY = histogram(
+    "surra_llm_request_duration_seconds", "OpenAI call latency by model and purpose", ("model", "purpose")
+)
+LLM_TOKENS = counter("surra_llm_tokens_total", "OpenAI tokens by model, purpose and kind", ("model", "purpose", "kind"))
+GOLD_REFRESH = counter("surra_gold_refresh_total", "Gold refresh runs by trigger and outcome", ("trigger", "outcome"))
+GOLD_REFRESH_LATENCY = histogram(
+    "surra_gold_refresh_duration_seconds", "Gold predict + save duration", ("trigger", "outcome")
+)
+CATEGORIZER = counter(
+    "surra_categorizer_requests_total", "Receipt categorizer predictions and feedback updates", ("op", "outcome")
+)
+RECEIPT_PARSE = counter(
+    "surra_receipt_parse_total", "Receipts parsed by path (rules fast path or LLM escalation)", ("path", "outcome")
+)
+RECEIPT_CACHE = counter(
+    "surra_receipt_cache_total", "Parsed-receipt cache lookups (hit, miss, coalesced) and evictions", ("outcome",)
+)
+NOTIFICATIONS = counter(
+    "surra_notifications_total", "Notifications queued, written, failed, rejected (queue full) or suppressed (duplicate, rate_limited)", ("outcome",)
+)
+
+
+def _process_info() -> Dict[LabelValues, float]:
+    return {(str(os.getpid()),): 1}
+
+
+gauge("surra_process_info", "Worker process serving this scrape", ("pid",), _process_info)
+
+
+def _threadpool() -> Dict[LabelValues, float]:
+    # anyio's default limiter backs run_in_threadpool and sync route handlers;
+    # it is per event loop, so this only answers from inside the app's loop
+    try:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+    except RuntimeError:
+        return {}
+    stats = limiter.statistics()
+    return {
+        ("capacity",): limiter.total_tokens,
+        ("in_use",): stats.borrowed_tokens,
+        ("waiting",): stats.tasks_waiting,
+    }
+
+
+gauge("surra_threadpool_threads", "Worker threadpool capacity, busy threads and queued tasks", ("state",), _threadpool)
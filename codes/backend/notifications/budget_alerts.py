@@ -0,0 +1,233 @@
+# backend/notifications/budget_alerts.py
+"""
+Budget alerts for every profile in one pass.
+
+    python -m notifications.budget_alerts [--dry-run]
+    POST /admin/budget-alerts/run
+
+1. current-period Monthly_Financial_Record rows of all profiles (keyset pages)
+2. for each chunk of BUDGET_ALERT_CHUNK records, concurrently: their
+   Category_Summary rows and their profiles' Category rows with a limit
+3. spent / monthly_limit for every row at once: level 2 = over the limit,
+   1 = at least BUDGET_ALERT_NEAR_RATIO of it, 0 = below
+4. notify only where the level rose above the watermark stored for
+   (profile, category, record). A new month is a new record and starts at 0;
+   a level that fell lowers the watermark, so crossing again alerts again.
+
+Watermarks live in SQLite (BUDGET_ALERT_STATE_PATH) and are committed after
+the notifications are flushed, only for alerts that were delivered (written,
+or found to be a duplicate of one already sent): a crash in between re-sends
+alerts instead of losing them, and an alert that was rate-limited or failed
+to insert is tried again on the next run. A flock next to the file makes
+concurrent runs skip.
+"""
+import os
+import sys
+import time
+import sqlite3
+import asyncio
+import argparse
+import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from logs import get_logger
+from supabase_rest import asbr_all
+from notifications.notification_service import NotificationService, RunLock, flush as flush_notifications
+
+NEAR_RATIO = float(os.getenv("BUDGET_ALERT_NEAR_RATIO", "0.8"))
+# Supabase caps responses at 1000 rows (PostgREST max-rows) unless raised
+PAGE_SIZE = int(os.getenv("BUDGET_ALERT_PAGE_SIZE", "1000"))
+# ids per in.(...) filter; keeps request URLs well under proxy limits
+CHUNK = int(os.getenv("BUDGET_ALERT_CHUNK", "150"))
+CONCURRENCY = int(os.getenv("BUDGET_ALERT_CONCURRENCY", "8"))
+STATE_PATH = os.getenv("BUDGET_ALERT_STATE_PATH", str(Path(__file__).with_name("budget_alerts.sqlite3")))
+# watermarks untouched this long belong to finished periods
+STATE_TTL_DAYS = 62
+
+LEVEL_NEAR, LEVEL_OVER = 1, 2
+
+Key = Tuple[str, str, str]  # (profile_id, category_id, record_id)
+
+log = get_logger("surra.budget_alerts")
+
+
+# ---------- Bulk load ----------
+async def load_current(today: str) -> Tuple[Dict[str, str], List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """record_id -> profile_id, current Category_Summary rows, limited categories by id."""
+    records = await asbr_all(
+        "Monthly_Financial_Record",
+        {"select": "record_id,profile_id", "period_start": f"lte.{today}", "period_end": f"gte.{today}"},
+        "record_id",
+        PAGE_SIZE,
+    )
+    profile_of = {r["record_id"]: r["profile_id"] for r in records}
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def chunk(part: List[Dict[str, Any]]):
+        record_ids = ",".join(r["record_id"] for r in part)
+        profile_ids = ",".join(sorted({r["profile_id"] for r in part}))
+        async with sem:
+            return await asyncio.gather(
+                asbr_all(
+                    "Category_Summary",
+                    {"select": "summary_id,record_id,category_id,total_expense", "record_id": f"in.({record_ids})"},
+                    "summary_id",
+                    PAGE_SIZE,
+                ),
+                asbr_all(
+                    "Category",
+                    {"select": "category_id,name,monthly_limit", "profile_id": f"in.({profile_ids})", "monthly_limit": "gt.0"},
+                    "category_id",
+                    PAGE_SIZE,
+                ),
+            )
+
+    parts = await asyncio.gather(*(chunk(records[i : i + CHUNK]) for i in range(0, len(records), CHUNK)))
+    summaries = [s for sums, _ in parts for s in sums]
+    categories = {c["category_id"]: c for _, cats in parts for c in cats}
+    return profile_of, summaries, categories
+
+
+def compute_levels(spent: np.ndarray, limit: np.ndarray, near_ratio: float = NEAR_RATIO) -> np.ndarray:
+    ratio = spent / limit
+    return np.where(ratio > 1.0, LEVEL_OVER, np.where(ratio >= near_ratio, LEVEL_NEAR, 0)).astype(np.int8)
+
+
+# ---------- Watermarks ----------
+class WatermarkStore:
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS budget_alert_watermark ("
+            " profile_id TEXT NOT NULL, category_id TEXT NOT NULL, record_id TEXT NOT NULL,"
+            " level INTEGER NOT NULL, updated REAL NOT NULL,"
+            " PRIMARY KEY (profile_id, category_id, record_id))"
+        )
+
+    def load(self) -> Dict[Key, int]:
+        """Only keys that were alerted are stored; everything else is level 0."""
+        rows = self.conn.execute("SELECT profile_id, category_id, record_id, level FROM budget_alert_watermark")
+        return {(p, c, r): level for p, c, r, level in rows}
+
+    def save(self, changes: List[Tuple[Key, int]]) -> None:
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO budget_alert_watermark VALUES (?, ?, ?, ?, ?)",
+                [(*k, level, now) for k, level in changes if level > 0],
+            )
+            self.conn.executemany(
+                "DELETE FROM budget_alert_watermark WHERE profile_id = ? AND category_id = ? AND record_id = ?",
+                [k for k, level in changes if level == 0],
+            )
+            self.conn.execute(
+                "DELETE FROM budget_alert_watermark WHERE updated < ?", (now - STATE_TTL_DAYS * 86400,)
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+# ---------- Evaluation ----------
+def _apply(
+    profile_of: Dict[str, str],
+    summaries: List[Dict[str, Any]],
+    categories: Dict[str, Dict[str, Any]],
+    near_ratio: float,
+    dry_run: bool,
+) -> Dict[str, Any]:
+    keys: List[Key] = []
+    spent: List[float] = []
+    limit: List[float] = []
+    names: List[str] = []
+    for s in summaries:
+        cat = categories.get(s.get("category_id"))
+        profile_id = profile_of.get(s.get("record_id"))
+        if cat is None or profile_id is None:
+            continue  # no limit set, or not this period's record
+        keys.append((profile_id, s["category_id"], s["record_id"]))
+        spent.append(float(s.get("total_expense") or 0))
+        limit.append(float(cat["monthly_limit"]))
+        names.append(cat.get("name") or "")
+
+    spent_a = np.asarray(spent, dtype=np.float64)
+    limit_a = np.asarray(limit, dtype=np.float64)
+    levels = compute_levels(spent_a, limit_a, near_ratio)
+
+    store = WatermarkStore(STATE_PATH)
+    try:
+        marks_by_key = store.load()
+        marks = np.fromiter((marks_by_key.get(k, 0) for k in keys), dtype=np.int8, count=len(keys))
+        rising = np.flatnonzero(levels > marks)
+        falling = np.flatnonzero(levels < marks)
+        stats = {
+            "profiles": len(set(profile_of.values())),
+            "rows": len(keys),
+            "near": int((levels == LEVEL_NEAR).sum()),
+            "over": int((levels == LEVEL_OVER).sum()),
+            "alerts": int((levels[rising] == LEVEL_OVER).sum()),
+            "warnings": int((levels[rising] == LEVEL_NEAR).sum()),
+            "lowered": int(falling.size),
+            "dry_run": dry_run,
+        }
+        if dry_run:
+            return stats
+
+        queued = []
+        for i in rising:
+            profile_id, _, _ = keys[i]
+            if levels[i] == LEVEL_OVER:
+                item = NotificationService.create_budget_alert(profile_id, names[i], spent[i], limit[i])
+            else:
+                item = NotificationService.create_budget_warning(profile_id, names[i], spent[i], limit[i])
+            if item is not None:
+                queued.append((i, item))
+        flush_notifications()
+        sent = [i for i, item in queued if item.delivered]
+        store.save([(keys[i], int(levels[i])) for i in [*sent, *falling]])
+        stats["unsent"] = int(rising.size) - len(sent)
+        return stats
+    finally:
+        store.close()
+
+
+async def run_budget_alerts(
+    today: Optional[datetime.date] = None, near_ratio: float = NEAR_RATIO, dry_run: bool = False
+) -> Dict[str, Any]:
+    """Evaluate every profile's current period; returns counts (or skipped if another run is active)."""
+    started = time.perf_counter()
+    with RunLock(STATE_PATH + ".lock") as lock:
+        if not lock.acquired:
+            return {"skipped": "already_running"}
+        day = (today or datetime.date.today()).isoformat()
+        profile_of, summaries, categories = await load_current(day)
+        loaded = time.perf_counter()
+        stats = await run_in_threadpool(_apply, profile_of, summaries, categories, near_ratio, dry_run)
+    stats.update(
+        period_day=day,
+        load_s=round(loaded - started, 3),
+        duration_s=round(time.perf_counter() - started, 3),
+    )
+    log.info("budget_alerts.run", **stats)
+    return stats
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--today", type=datetime.date.fromisoformat, help="evaluate as of this day (YYYY-MM-DD)")
+    ap.add_argument("--near-ratio", type=float, default=NEAR_RATIO)
+    ap.add_argument("--dry-run", action="store_true", help="count crossings; no notifications, no watermarks")
+    args = ap.parse_args()
+    stats = asyncio.run(run_budget_alerts(args.today, args.near_ratio, args.dry_run))
+    print(stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+# backend/notifications/dedup.py
+"""
+Duplicate suppression and per-profile rate limits for notifications.
+
+Retries, several workers and the periodic evaluators can ask for the same
+notification more than once. create_notification() asks the gate first, so
+suppressed rows never reach the write queue or the database:
+
+    duplicate     (profile_id, type, subject, period) was already sent and its
+                  NOTIFICATION_DEDUP_TTL_SECONDS have not passed
+    rate_limited  the profile already got NOTIFICATION_RATE_LIMIT notifications
+                  in the current NOTIFICATION_RATE_WINDOW_SECONDS window
+
+Claims and window counters live in a SQLite file (NOTIFICATION_DEDUP_PATH,
+WAL mode) shared by all workers on the host; check-and-claim is one
+transaction, so two workers cannot both send. A claim whose notification was
+not queued or not written is released (claim and count undone), so a retry
+goes through. The keys a worker claimed are also kept in a bounded in-memory
+TTL index and answered without touching SQLite.
+Set NOTIFICATION_DEDUP_PATH=:memory: for a per-process gate, a TTL of 0 to
+turn deduplication off and a limit of 0 to turn rate limiting off.
+"""
+import os
+import time
+import heapq
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEDUP_PATH = os.getenv("NOTIFICATION_DEDUP_PATH", str(Path(__file__).with_name("notification_dedup.sqlite3")))
+DEDUP_TTL_SECONDS = float(os.getenv("NOTIFICATION_DEDUP_TTL_SECONDS", "86400"))
+RATE_LIMIT = int(os.getenv("NOTIFICATION_RATE_LIMIT", "20"))
+RATE_WINDOW_SECONDS = float(os.getenv("NOTIFICATION_RATE_WINDOW_SECONDS", "3600"))
+
+# in-memory index size; the earliest-expiring keys go first when it is full
+MEMORY_MAX_KEYS = 100_000
+# drop expired claims and old windows after this many admitted notifications
+PRUNE_EVERY = 256
+
+ADMIT, DUPLICATE, RATE_LIMITED = "admit", "duplicate", "rate_limited"
+RELEASED = "released"
+
+Key = Tuple[str, str, str, str]  # (profile_id, type, subject, period)
+
+
+class _TTLIndex:
+    """Keys known to be claimed until their expiry; bounded, not thread-safe."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._expires: Dict[Key, float] = {}
+        self._heap: List[Tuple[float, Key]] = []
+
+    def __contains__(self, key: Key) -> bool:
+        expires = self._expires.get(key)
+        return expires is not None and expires > time.time()
+
+    def add(self, key: Key, expires: float) -> None:
+        self._expires[key] = expires
+        heapq.heappush(self._heap, (expires, key))
+        now = time.time()
+        while self._heap and (self._heap[0][0] <= now or len(self._expires) > self.max_keys):
+            at, old = heapq.heappop(self._heap)
+            if self._expires.get(old) == at:
+                del self._expires[old]
+
+    def discard(self, key: Key) -> None:
+        self._expires.pop(key, None)  # its heap entry no longer matches and is skipped
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+
+class NotificationGate:
+    def __init__(self, path: str, ttl_seconds: float, rate_limit: int, rate_window_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.rate_limit = rate_limit
+        self.rate_window_seconds = rate_window_seconds
+        self.counts = {ADMIT: 0, DUPLICATE: 0, RATE_LIMITED: 0, RELEASED: 0}
+        self._memory = _TTLIndex(MEMORY_MAX_KEYS)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 or self.rate_limit > 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS notification_dedup ("
+                " profile_id TEXT NOT NULL, type TEXT NOT NULL, subject TEXT NOT NULL, period TEXT NOT NULL,"
+                " expires REAL NOT NULL, PRIMARY KEY (profile_id, type, subject, period))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS notification_dedup_expires ON notification_dedup (expires)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS notification_rate ("
+                " profile_id TEXT NOT NULL, window INTEGER NOT NULL, sent INTEGER NOT NULL,"
+                " PRIMARY KEY (profile_id, window))"
+            )
+            self._conn = conn
+        return self._conn
+
+    def admit(self, profile_id: str, notification_type: str, subject: str, period: str, now: Optional[float] = None) -> str:
+        """
+        ADMIT (and claim the key, count it against the profile), DUPLICATE or
+        RATE_LIMITED. Pass the same `now` to release() to undo an ADMIT.
+        """
+        key: Key = (str(profile_id), notification_type, subject, period)
+        now = time.time() if now is None else now
+        window = int(now // self.rate_window_seconds) if self.rate_limit > 0 else 0
+        with self._lock:
+            if self.ttl_seconds > 0 and key in self._memory:
+                return self._count(DUPLICATE)
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                if self.ttl_seconds > 0:
+                    row = db.execute(
+                        "SELECT expires FROM notification_dedup"
+                        " WHERE profile_id = ? AND type = ? AND subject = ? AND period = ?",
+                        key,
+                    ).fetchone()
+                    if row is not None and row[0] > now:
+                        # not cached: the claiming worker may still release it
+                        db.execute("COMMIT")
+                        return self._count(DUPLICATE)
+                if self.rate_limit > 0:
+                    row = db.execute(
+                        "SELECT sent FROM notification_rate WHERE profile_id = ? AND window = ?", (key[0], window)
+                    ).fetchone()
+                    if row is not None and row[0] >= self.rate_limit:
+                        db.execute("COMMIT")
+                        return self._count(RATE_LIMITED)
+                    db.execute(
+                        "INSERT INTO notification_rate VALUES (?, ?, 1)"
+                        " ON CONFLICT (profile_id, window) DO UPDATE SET sent = sent + 1",
+                        (key[0], window),
+                    )
+                if self.ttl_seconds > 0:
+                    db.execute(
+                        "INSERT OR REPLACE INTO notification_dedup VALUES (?, ?, ?, ?, ?)",
+                        (*key, now + self.ttl_seconds),
+                    )
+                if self.counts[ADMIT] % PRUNE_EVERY == 0:
+                    self._prune(now, window)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            if self.ttl_seconds > 0:
+                self._memory.add(key, now + self.ttl_seconds)
+            return self._count(ADMIT)
+
+    def release(self, profile_id: str, notification_type: str, subject: str, period: str, admitted_at: float) -> None:
+        """Undo the ADMIT made at `admitted_at`: drop the claim and uncount it."""
+        key: Key = (str(profile_id), notification_type, subject, period)
+        window = int(admitted_at // self.rate_window_seconds) if self.rate_limit > 0 else 0
+        with self._lock:
+            self._memory.discard(key)
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                if self.ttl_seconds > 0:
+                    db.execute(
+                        "DELETE FROM notification_dedup"
+                        " WHERE profile_id = ? AND type = ? AND subject = ? AND period = ? AND expires = ?",
+                        (*key, admitted_at + self.ttl_seconds),
+                    )
+                if self.rate_limit > 0:
+                    db.execute(
+                        "UPDATE notification_rate SET sent = sent - 1 WHERE profile_id = ? AND window = ? AND sent > 0",
+                        (key[0], window),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            self._count(RELEASED)
+
+    def _count(self, outcome: str) -> str:
+        self.counts[outcome] += 1
+        return outcome
+
+    def _prune(self, now: float, window: int) -> None:
+        db = self._db()
+        db.execute("DELETE FROM notification_dedup WHERE expires <= ?", (now,))
+        db.execute("DELETE FROM notification_rate WHERE window < ?", (window,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "path": self.path,
+                "ttl_seconds": self.ttl_seconds,
+                "rate_limit": self.rate_limit,
+                "rate_window_seconds": self.rate_window_seconds,
+                "memory_keys": len(self._memory),
+                # outcomes for this worker since it started
+                **self.counts,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+GATE = NotificationGate(DEDUP_PATH, DEDUP_TTL_SECONDS, RATE_LIMIT, RATE_WINDOW_SECONDS)
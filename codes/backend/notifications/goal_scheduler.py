@@ -0,0 +1,355 @@
+# backend/notifications/goal_scheduler.py
+"""
+Goal reminders and completion notices.
+
+    reminder   on target_date - GOAL_REMINDER_LEAD_DAYS, if the goal is still
+               active and not saved up yet
+    completed  when a goal reaches target_amount (its transfers) or the app
+               marks it Completed, whenever that happens
+
+Reminders: the scheduler keeps a min-heap of reminder dates for the active
+goals whose target_date lies in the window [cursor + 1, today + lead +
+lookahead]. A tick reads only that slice of Goal (a target_date range query),
+pushes events for goals that are new or whose target_date changed, and pops
+the due ones. Popped events are checked against the fresh row, so edited,
+finished or deleted goals drop their stale events.
+
+Completion: a tick looks at the goals with a transfer since the day before
+the cursor (device clocks set created_at, so a day of slack), the Completed
+goals not yet known, and the notices still pending. A goal that is reached
+now and was not at its last look gets a notice.
+
+Transfers are loaded only for the goals a tick looks at. Status values are
+compared case-insensitively (the app writes 'Active' / 'Completed').
+
+State (GOAL_SCHEDULER_STATE_PATH, SQLite): the cursor, the last day whose
+reminders have all fired (a restart resumes after it); the reminders fired
+since, keyed (goal_id, kind, target_date); and the goals known to be reached,
+with whether their notice got delivered. An event is recorded once its
+notification is written or found to be a duplicate of one already sent;
+rate-limited or failed ones are tried again on the next tick. Reminders
+found late (target_date already past) are skipped; the first tick
+records the goals already reached without notices.
+
+    python -m notifications.goal_scheduler [--today YYYY-MM-DD]   # one tick
+    GOAL_SCHEDULER_TICK_SECONDS=3600                              # API loop
+"""
+import os
+import sys
+import heapq
+import sqlite3
+import asyncio
+import argparse
+import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from goal_progress import saved_amount
+from logs import get_logger
+from supabase_rest import asbr_all
+from notifications.notification_service import NotificationService, RunLock, flush as flush_notifications
+
+LEAD_DAYS = int(os.getenv("GOAL_REMINDER_LEAD_DAYS", "1"))
+LOOKAHEAD_DAYS = int(os.getenv("GOAL_SCHEDULER_LOOKAHEAD_DAYS", "7"))
+# 0 = no loop in the API (run the module from cron instead)
+TICK_SECONDS = float(os.getenv("GOAL_SCHEDULER_TICK_SECONDS", "0"))
+STATE_PATH = os.getenv("GOAL_SCHEDULER_STATE_PATH", str(Path(__file__).with_name("goal_scheduler.sqlite3")))
+CHUNK = 150  # goal ids per in.(...) filter
+
+REMINDER, COMPLETED = "reminder", "completed"
+GOAL_SELECT = "goal_id,profile_id,name,target_amount,target_date,status"
+
+# (fire_on, goal_id, target_date); ISO dates sort like dates
+Event = Tuple[str, str, str]
+
+log = get_logger("surra.goal_scheduler")
+
+
+class _State:
+    def __init__(self, path: str):
+        # opened and used from threadpool threads, one at a time
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS cursor (id INTEGER PRIMARY KEY CHECK (id = 1), day TEXT NOT NULL)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS fired ("
+            " goal_id TEXT NOT NULL, kind TEXT NOT NULL, target_date TEXT NOT NULL,"
+            " PRIMARY KEY (goal_id, kind, target_date))"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS reached (goal_id TEXT PRIMARY KEY, notified INTEGER NOT NULL)")
+
+    def load(self) -> Tuple[Optional[str], Dict[str, int]]:
+        """The cursor and the reached goals (goal_id -> 1 notified / 0 pending)."""
+        row = self.conn.execute("SELECT day FROM cursor WHERE id = 1").fetchone()
+        return (row[0] if row else None), dict(self.conn.execute("SELECT goal_id, notified FROM reached"))
+
+    def fired(self, keys: List[Tuple[str, str, str]]) -> set:
+        out = set()
+        for i in range(0, len(keys), 300):
+            part = keys[i : i + 300]
+            rows = self.conn.execute(
+                "SELECT goal_id, kind, target_date FROM fired WHERE "
+                + " OR ".join(["(goal_id = ? AND kind = ? AND target_date = ?)"] * len(part)),
+                [v for k in part for v in k],
+            )
+            out.update(rows)
+        return out
+
+    def commit(self, fired: List[Tuple[str, str, str]], reached: Dict[str, Optional[int]], cursor: str) -> None:
+        """Record fired reminders and reached changes (None = no longer reached), move the cursor."""
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("INSERT OR IGNORE INTO fired VALUES (?, ?, ?)", fired)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO reached VALUES (?, ?)", [(g, n) for g, n in reached.items() if n is not None]
+            )
+            self.conn.executemany("DELETE FROM reached WHERE goal_id = ?", [(g,) for g, n in reached.items() if n is None])
+            self.conn.execute("INSERT OR REPLACE INTO cursor (id, day) VALUES (1, ?)", (cursor,))
+            # their events are behind the cursor now, never looked up again
+            self.conn.execute("DELETE FROM fired WHERE target_date <= ?", (cursor,))
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _target(goal: Dict[str, Any]) -> str:
+    return str(goal["target_date"])[:10]
+
+
+def _reached(goal: Dict[str, Any], transfers: List[Dict[str, Any]]) -> bool:
+    if str(goal.get("status") or "").lower() == COMPLETED:
+        return True
+    target = float(goal.get("target_amount") or 0)
+    return target > 0 and saved_amount(transfers) >= target
+
+
+def _delivered(item) -> bool:
+    # written now or a duplicate of one already sent; None (rate-limited) or a
+    # failed write is tried again next tick
+    return item is not None and item.delivered
+
+
+async def _by_ids(table: str, select: str, column: str, ids: Iterable[str], key: str) -> List[Dict[str, Any]]:
+    ids = sorted(ids)
+    parts = await asyncio.gather(
+        *(
+            asbr_all(table, {"select": select, column: f"in.({','.join(ids[i : i + CHUNK])})"}, key)
+            for i in range(0, len(ids), CHUNK)
+        )
+    )
+    return [r for part in parts for r in part]
+
+
+def _emit(
+    today: datetime.date,
+    due: List[Tuple[Event, Dict[str, Any]]],
+    goals: Dict[str, Dict[str, Any]],
+    transfers: Dict[str, List[Dict[str, Any]]],
+    known: Dict[str, int],
+    first_tick: bool,
+) -> Tuple[Dict[str, int], List[Tuple[str, str, str]], List[Event], Dict[str, Optional[int]]]:
+    """
+    Queue and flush the notifications (blocking: dedup gate, queue, flush);
+    returns the sent counts, the reminders to record as fired, the ones to
+    retry and the reached changes.
+    """
+    reminders = []
+    fired: List[Tuple[str, str, str]] = []
+    for event, g in due:
+        if _reached(g, transfers.get(g["goal_id"], [])):
+            fired.append((g["goal_id"], REMINDER, event[2]))  # nothing to remind of
+            continue
+        days_left = (datetime.date.fromisoformat(event[2]) - today).days
+        item = NotificationService.create_goal_reminder(
+            g["profile_id"], g.get("name") or "", period=event[2], days_left=days_left
+        )
+        reminders.append((event, g, item))
+
+    completions = []
+    reached: Dict[str, Optional[int]] = {}
+    for gid, g in goals.items():
+        if not _reached(g, transfers.get(gid, [])):
+            if gid in known:
+                reached[gid] = None
+        elif known.get(gid) == 1:
+            continue
+        elif first_tick:
+            reached[gid] = 1  # reached before the scheduler ever looked: no notice
+        else:
+            item = NotificationService.create_goal_completed(g["profile_id"], g.get("name") or "", period=_target(g))
+            completions.append((gid, item))
+
+    flush_notifications()
+
+    sent = {REMINDER: 0, COMPLETED: 0}
+    retry: List[Event] = []
+    for event, g, item in reminders:
+        if _delivered(item):
+            sent[REMINDER] += 1
+            fired.append((g["goal_id"], REMINDER, event[2]))
+        else:
+            retry.append(event)
+    for gid, item in completions:
+        reached[gid] = 1 if _delivered(item) else 0
+        sent[COMPLETED] += reached[gid]
+    return sent, fired, retry, reached
+
+
+class GoalScheduler:
+    def __init__(self, state_path: str = STATE_PATH):
+        self.state_path = state_path
+        self._heap: List[Event] = []
+        self._goals: Dict[str, Dict[str, Any]] = {}
+
+    def _push(self, goal: Dict[str, Any]) -> None:
+        target = datetime.date.fromisoformat(_target(goal))
+        heapq.heappush(
+            self._heap, ((target - datetime.timedelta(days=LEAD_DAYS)).isoformat(), goal["goal_id"], target.isoformat())
+        )
+
+    async def _refresh(self, start: datetime.date, end: datetime.date) -> None:
+        """Sync the index with the active goals due in [start, end]."""
+        rows = await asbr_all(
+            "Goal",
+            {
+                "select": GOAL_SELECT,
+                "status": "ilike.active",
+                "and": f"(target_date.gte.{start.isoformat()},target_date.lte.{end.isoformat()})",
+            },
+            "goal_id",
+        )
+        fresh = {r["goal_id"]: r for r in rows if r.get("target_date")}
+        for gid, row in fresh.items():
+            old = self._goals.get(gid)
+            if old is None or _target(old) != _target(row):
+                self._push(row)
+        self._goals = fresh
+        if len(self._heap) > 2 * len(fresh) + 64:  # mostly stale entries: rebuild
+            self._heap = []
+            for row in fresh.values():
+                self._push(row)
+
+    def _pop_due(self, today: str, cursor: str) -> Tuple[List[Tuple[Event, Dict[str, Any]]], int]:
+        due: List[Tuple[Event, Dict[str, Any]]] = []
+        expired = 0
+        while self._heap and self._heap[0][0] <= today:
+            event = heapq.heappop(self._heap)
+            fire_on, gid, target = event
+            goal = self._goals.get(gid)
+            if fire_on <= cursor or goal is None or _target(goal) != target:
+                continue  # fired before the cursor, or stale (goal edited / finished / gone)
+            if target < today:
+                expired += 1  # the deadline has passed (a lead of 0 fires on the day itself)
+                continue
+            due.append((event, goal))
+        return due, expired
+
+    async def _completion_candidates(self, start: datetime.date, known: Dict[str, int]) -> Set[str]:
+        """Goals with a recent transfer, Completed goals not yet known, pending notices."""
+        touched, completed = await asyncio.gather(
+            asbr_all(
+                "Goal_Transfer",
+                {"select": "goal_transfer_id,goal_id", "created_at": f"gte.{(start - datetime.timedelta(days=1)).isoformat()}"},
+                "goal_transfer_id",
+            ),
+            asbr_all("Goal", {"select": "goal_id", "status": "ilike.completed", "target_date": f"gte.{start.isoformat()}"}, "goal_id"),
+        )
+        return (
+            {t["goal_id"] for t in touched}
+            | {g["goal_id"] for g in completed if g["goal_id"] not in known}
+            | {gid for gid, notified in known.items() if not notified}
+        )
+
+    async def tick(self, today: Optional[datetime.date] = None) -> Dict[str, Any]:
+        today = today or datetime.date.today()
+        state = await run_in_threadpool(_State, self.state_path)
+        try:
+            saved_cursor, known = await run_in_threadpool(state.load)
+            cursor = saved_cursor or (today - datetime.timedelta(days=1)).isoformat()
+            start = datetime.date.fromisoformat(cursor) + datetime.timedelta(days=1)
+            _, candidates = await asyncio.gather(
+                self._refresh(start, today + datetime.timedelta(days=LEAD_DAYS + LOOKAHEAD_DAYS)),
+                self._completion_candidates(start, known),
+            )
+
+            due, expired = self._pop_due(today.isoformat(), cursor)
+            already = await run_in_threadpool(state.fired, [(ev[1], REMINDER, ev[2]) for ev, _ in due])
+            due = [(ev, g) for ev, g in due if (ev[1], REMINDER, ev[2]) not in already]
+
+            goals = {g["goal_id"]: g for g in await _by_ids("Goal", GOAL_SELECT, "goal_id", candidates, "goal_id")}
+            rows = await _by_ids(
+                "Goal_Transfer",
+                "goal_transfer_id,goal_id,direction,amount",
+                "goal_id",
+                set(goals) | {ev[1] for ev, _ in due},
+                "goal_transfer_id",
+            )
+            transfers: Dict[str, List[Dict[str, Any]]] = {}
+            for t in rows:
+                transfers.setdefault(t["goal_id"], []).append(t)
+
+            sent, fired, retry, reached = await run_in_threadpool(
+                _emit, today, due, goals, transfers, known, saved_cursor is None
+            )
+            for gid in candidates - set(goals):
+                if gid in known:
+                    reached[gid] = None  # deleted
+            # today's later ticks may still find goals created since: the cursor stays a day behind
+            await run_in_threadpool(state.commit, fired, reached, (today - datetime.timedelta(days=1)).isoformat())
+            for event in retry:
+                heapq.heappush(self._heap, event)
+        except BaseException:
+            # popped events were not committed: rebuild the index from the database next tick
+            self._heap, self._goals = [], {}
+            raise
+        finally:
+            await run_in_threadpool(state.close)
+
+        stats = {
+            "today": today.isoformat(),
+            "window_goals": len(self._goals),
+            "heap": len(self._heap),
+            "due": len(due),
+            "reminders": sent[REMINDER],
+            "completion_checked": len(goals),
+            "completed": sent[COMPLETED],
+            "unsent": len(retry) + sum(1 for n in reached.values() if n == 0),
+            "expired_reminders": expired,
+        }
+        log.info("goal_scheduler.tick", **stats)
+        return stats
+
+
+SCHEDULER = GoalScheduler()
+
+
+async def run_tick(today: Optional[datetime.date] = None) -> Dict[str, Any]:
+    """One tick of the shared scheduler, or skipped when another process is ticking."""
+    with RunLock(SCHEDULER.state_path + ".lock") as lock:
+        if not lock.acquired:
+            return {"skipped": "already_running"}
+        return await SCHEDULER.tick(today)
+
+
+async def scheduler_loop(interval_seconds: float = TICK_SECONDS) -> None:
+    """Tick forever; runs until cancelled."""
+    while True:
+        try:
+            await run_tick()
+        except Exception:
+            log.exception("goal_scheduler.tick_failed")
+        await asyncio.sleep(interval_seconds)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--today", type=datetime.date.fromisoformat, help="tick as of this day (YYYY-MM-DD)")
+    args = ap.parse_args()
+    print(asyncio.run(run_tick(args.today)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
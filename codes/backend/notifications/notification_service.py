@@ -1,8 +1,44 @@
 '''2025_GP1_9/codes/backend/notifications/notification_service.py'''
+"""
+Notifications are written behind: create_notification() (and every helper
+built on it) puts the row on a bounded in-process queue and returns. A
+background thread inserts queued rows into "Notification" with one bulk POST
+per batch of NOTIFICATION_BATCH_SIZE rows, or after NOTIFICATION_FLUSH_SECONDS,
+whichever comes first.
+
+When the queue is full, callers block for up to NOTIFICATION_ENQUEUE_TIMEOUT
+seconds (backpressure) and then get a RuntimeError. stop_notification_worker()
+writes everything still queued; the API calls it on shutdown, scripts get it
+through atexit.
+
+Before a row is queued it passes notifications.dedup.GATE, which drops repeats
+of (profile_id, type, subject, period) and enforces per-profile rate limits.
+create_notification() returns None for a rate-limited row (nothing sent),
+else a QueuedNotification: outcome "duplicate" (already sent, not queued
+again) or "admit" (queued; `written` tells after flush() whether it got in).
+`delivered` is True for both a duplicate and a written row. Rows that could
+not be queued or written give their claim back.
+"""
 import os
-from typing import Optional
-from supabase import create_client, Client
+import json
+import time
+import queue
+import atexit
+import datetime
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
 
+from logs import get_logger
+from metrics import NOTIFICATIONS, gauge
+from supabase_rest import sb_post
+from notifications.dedup import ADMIT, DUPLICATE, GATE
+
+try:
+    import fcntl  # one scheduled run at a time per host (Linux / macOS)
+except ImportError:  # pragma: no cover - Windows dev machines
+    fcntl = None
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
@@ -10,7 +46,216 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
     raise ValueError("Missing SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY in environment variables.")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "200"))
+FLUSH_SECONDS = float(os.getenv("NOTIFICATION_FLUSH_SECONDS", "1.0"))
+QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "10000"))
+ENQUEUE_TIMEOUT = float(os.getenv("NOTIFICATION_ENQUEUE_TIMEOUT", "5"))
+WRITE_ATTEMPTS = 3
+# SQLSTATE classes a single row causes: 22 bad value, 23 constraint / foreign key.
+# Anything else (PGRST*, 42703 unknown column, 42P01 ...) fails every row alike.
+ROW_ERROR_CLASSES = ("22", "23")
+
+log = get_logger("surra.notifications")
+
+_queue: "queue.Queue[QueuedNotification]" = queue.Queue(maxsize=QUEUE_SIZE)
+_stop = threading.Event()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+_atexit_registered = False
+
+gauge(
+    "surra_notification_queue_depth",
+    "Notifications queued and not yet written",
+    (),
+    lambda: {(): _queue.qsize()},
+)
+
+
+# ---------- Write-behind worker ----------
+class QueuedNotification:
+    """
+    A row create_notification() accepted: queued (outcome ADMIT; `written`
+    stays None until the writer is done with it) or a DUPLICATE of one
+    already sent, which is not queued again.
+    """
+
+    __slots__ = ("row", "written", "claim", "outcome")
+
+    def __init__(self, row: Dict[str, Any], claim: Optional[Tuple[Any, ...]] = None, outcome: str = ADMIT):
+        self.row = row
+        self.written: Optional[bool] = None
+        self.claim = claim  # GATE.release() arguments: the dedup key and the admit time
+        self.outcome = outcome
+
+    @property
+    def delivered(self) -> bool:
+        """The user has this notification: written now, or sent before (duplicate)."""
+        return self.outcome == DUPLICATE or bool(self.written)
+
+    def release(self) -> None:
+        """Give the dedup claim back, so the same notification can be sent again."""
+        if self.claim is None:
+            return
+        try:
+            GATE.release(*self.claim)
+        except Exception:
+            log.exception("notifications.release_failed", type=self.row.get("type"))
+        self.claim = None
+
+
+def _next_batch() -> List[QueuedNotification]:
+    """Wait for one row, then collect more until the batch is full or FLUSH_SECONDS passed."""
+    try:
+        batch = [_queue.get(timeout=FLUSH_SECONDS)]
+    except queue.Empty:
+        return []
+    deadline = time.monotonic() + FLUSH_SECONDS
+    while len(batch) < BATCH_SIZE:
+        remaining = 0 if _stop.is_set() else deadline - time.monotonic()
+        try:
+            batch.append(_queue.get(timeout=remaining) if remaining > 0 else _queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _retryable(e: Exception) -> bool:
+    """Transport errors, 5xx, 408 and 429 may pass on a retry; other answers won't change."""
+    return not isinstance(e, HTTPException) or e.status_code >= 500 or e.status_code in (408, 429)
+
+
+def _row_error(e: Exception) -> bool:
+    """A rejection caused by the rows themselves (e.g. an unknown profile_id), not by the request."""
+    if not isinstance(e, HTTPException):
+        return False
+    try:
+        code = str(json.loads(e.detail).get("code") or "")
+    except (TypeError, ValueError, AttributeError):
+        code = ""
+    if code:
+        return code.startswith(ROW_ERROR_CLASSES)
+    return e.status_code == 409
+
+
+def _insert(items: List[QueuedNotification]) -> List[QueuedNotification]:
+    """
+    Insert the rows; returns the items that could not be written. A bulk insert is
+    all or nothing, so a batch rejected for a row's content (SQLSTATE 22xxx /
+    23xxx, e.g. a foreign key) is split in halves until only the bad rows are
+    left. Other rejections (schema errors) fail the whole batch at once.
+    """
+    for attempt in range(1, WRITE_ATTEMPTS + 1):
+        try:
+            sb_post("Notification", [item.row for item in items])
+            return []
+        except Exception as e:
+            if _retryable(e) and attempt < WRITE_ATTEMPTS:
+                time.sleep(0.5 * attempt)
+                continue
+            if _row_error(e):
+                if len(items) > 1:
+                    mid = len(items) // 2
+                    return _insert(items[:mid]) + _insert(items[mid:])
+                log.warning(
+                    "notifications.row_rejected",
+                    status=e.status_code,
+                    profile_id=items[0].row.get("profile_id"),
+                    type=items[0].row.get("type"),
+                    detail=str(e.detail)[:300],
+                )
+            else:
+                log.exception("notifications.write_failed", rows=len(items))
+            return items
+    return items
+
+
+def _write(batch: List[QueuedNotification]) -> None:
+    try:
+        failed = _insert(batch)
+        for item in batch:
+            item.written = True
+        for item in failed:
+            item.written = False
+            item.release()
+        if len(failed) < len(batch):
+            NOTIFICATIONS.inc(len(batch) - len(failed), outcome="written")
+        if failed:
+            NOTIFICATIONS.inc(len(failed), outcome="failed")
+    finally:
+        for _ in batch:
+            _queue.task_done()
+
+
+def _run_worker() -> None:
+    while True:
+        batch = _next_batch()
+        if batch:
+            _write(batch)
+        elif _stop.is_set():
+            return
+
+
+def start_notification_worker() -> None:
+    """Start the background writer (idempotent; create_notification also starts it)."""
+    global _worker, _atexit_registered
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        _stop.clear()
+        _worker = threading.Thread(target=_run_worker, name="notification-writer", daemon=True)
+        _worker.start()
+        if not _atexit_registered:
+            atexit.register(stop_notification_worker)
+            _atexit_registered = True
+
+
+def stop_notification_worker(timeout: float = 30) -> None:
+    """Write everything still queued, then stop the writer."""
+    global _worker
+    with _worker_lock:
+        worker, _worker = _worker, None
+    _stop.set()
+    if worker is not None:
+        worker.join(timeout=timeout)
+    while not _queue.empty():  # writer gone or never started: drain here
+        batch = _next_batch()
+        if batch:
+            _write(batch)
+    if _queue.unfinished_tasks:
+        log.warning("notifications.shutdown_unwritten", rows=_queue.unfinished_tasks)
+
+
+def flush() -> None:
+    """Block until every notification queued so far has been written (or given up on, see `written`)."""
+    start_notification_worker()
+    _queue.join()
+
+
+class RunLock:
+    """
+    Non-blocking flock for scheduled notification jobs (budget alerts, goal
+    reminders); `acquired` is False when another process holds it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.acquired = False
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+        if fcntl is None:
+            self.acquired = True
+            return self
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.acquired = True
+        except BlockingIOError:
+            self.acquired = False
+        return self
+
+    def __exit__(self, *exc):
+        os.close(self._fd)  # also releases the flock
 
 
 class NotificationService:
@@ -20,7 +265,14 @@ class NotificationService:
         title: str,
         body: str,
         notification_type: str,
+        subject: Optional[str] = None,
+        period: Optional[str] = None,
     ):
+        """
+        Queue one notification. subject (default: the body) and period (default:
+        today) complete the dedup key. Returns the QueuedNotification (outcome
+        ADMIT or DUPLICATE), or None when the rate limit held it back.
+        """
         payload = {
             "profile_id": profile_id,
             "title": title,
@@ -29,8 +281,31 @@ class NotificationService:
             "is_read": False,
         }
 
-        response = supabase.table("Notification").insert(payload).execute()
-        return response
+        claim = None
+        if GATE.enabled:
+            key = (
+                profile_id,
+                notification_type,
+                body if subject is None else subject,
+                period or datetime.date.today().isoformat(),
+            )
+            admitted_at = time.time()
+            outcome = GATE.admit(*key, now=admitted_at)
+            if outcome != ADMIT:
+                NOTIFICATIONS.inc(outcome=outcome)
+                return QueuedNotification(payload, outcome=DUPLICATE) if outcome == DUPLICATE else None
+            claim = (*key, admitted_at)
+
+        item = QueuedNotification(payload, claim)
+        start_notification_worker()
+        try:
+            _queue.put(item, timeout=ENQUEUE_TIMEOUT)
+        except queue.Full:
+            item.release()
+            NOTIFICATIONS.inc(outcome="rejected")
+            raise RuntimeError("Notification queue is full; writes are falling behind") from None
+        NOTIFICATIONS.inc(outcome="queued")
+        return item
 
     @staticmethod
     def create_budget_alert(
@@ -38,36 +313,64 @@ class NotificationService:
         category_name: str,
         spent: float,
         limit: float,
+        period: Optional[str] = None,
     ):
         return NotificationService.create_notification(
             profile_id=profile_id,
             title="Budget Alert",
             body=f"You exceeded your {category_name} budget.",
             notification_type="budget_alert",
+            subject=category_name,
+            period=period or datetime.date.today().strftime("%Y-%m"),
+        )
+
+    @staticmethod
+    def create_budget_warning(
+        profile_id: str,
+        category_name: str,
+        spent: float,
+        limit: float,
+        period: Optional[str] = None,
+    ):
+        return NotificationService.create_notification(
+            profile_id=profile_id,
+            title="Budget Warning",
+            body=f"You have used {round(100 * spent / limit)}% of your {category_name} budget.",
+            notification_type="budget_warning",
+            subject=category_name,
+            period=period or datetime.date.today().strftime("%Y-%m"),
         )
 
     @staticmethod
     def create_goal_completed(
         profile_id: str,
         goal_name: str,
+        period: Optional[str] = None,
     ):
         return NotificationService.create_notification(
             profile_id=profile_id,
             title="Goal Completed",
             body=f"Congratulations! You completed your goal: {goal_name}.",
             notification_type="goal_completed",
+            subject=goal_name,
+            period=period,
         )
 
     @staticmethod
     def create_goal_reminder(
         profile_id: str,
         goal_name: str,
+        period: Optional[str] = None,
+        days_left: int = 1,
     ):
+        due = {0: "today", 1: "tomorrow"}.get(days_left, f"in {days_left} days")
         return NotificationService.create_notification(
             profile_id=profile_id,
             title="Goal Reminder",
-            body=f"Reminder: your goal {goal_name} is due tomorrow.",
+            body=f"Reminder: your goal {goal_name} is due {due}.",
             notification_type="goal_reminder",
+            subject=goal_name,
+            period=period,
         )
 
     @staticmethod
@@ -79,4 +382,4 @@ class NotificationService:
             title="Negative Balance Alert",
             body="Your balance is negative.",
             notification_type="negative_balance",
-        )
\ No newline at end of file
+        )
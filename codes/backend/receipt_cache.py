@@ -0,0 +1,144 @@
+# backend/receipt_cache.py
+"""
+Content-hash cache for parsed receipts.
+
+Re-scans and app retries send the same OCR text again; the cache returns the
+earlier validated parse instead of paying for another LLM call. The key is a
+SHA-256 of the normalized text (NFKC, casefolded, whitespace collapsed) plus
+CACHE_VERSION, so bump CACHE_VERSION whenever the parsers' output changes.
+
+Entries live in a SQLite file (RECEIPT_CACHE_PATH, WAL mode) shared by all
+workers and kept across restarts. Every PRUNE_EVERY inserts the table is cut
+back to the RECEIPT_CACHE_MAX_ENTRIES most recently used rows, and rows older
+than RECEIPT_CACHE_TTL_DAYS are dropped. Stats: GET /admin/receipt-cache.
+Set RECEIPT_CACHE_PATH=:memory: for a per-process cache.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from typing import Any, Dict, Optional
+
+from metrics import RECEIPT_CACHE
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+RECEIPT_CACHE_PATH = os.getenv("RECEIPT_CACHE_PATH", os.path.join(BASE_DIR, "receipt_cache.sqlite3"))
+RECEIPT_CACHE_MAX_ENTRIES = int(os.getenv("RECEIPT_CACHE_MAX_ENTRIES", "5000"))
+RECEIPT_CACHE_TTL_DAYS = float(os.getenv("RECEIPT_CACHE_TTL_DAYS", "90"))
+
+CACHE_VERSION = 1
+# prune after this many inserts rather than on every one
+PRUNE_EVERY = 64
+# a hit only rewrites last_used when it is older than this (keeps reads read-only)
+TOUCH_AFTER_SECONDS = 3600
+
+_WS_RE = re.compile(r"[ \t]+")
+
+
+def normalize(ocr_text: str) -> str:
+    text = unicodedata.normalize("NFKC", ocr_text or "").casefold()
+    lines = (_WS_RE.sub(" ", ln).strip() for ln in text.splitlines())
+    return "\n".join(ln for ln in lines if ln)
+
+
+def cache_key(ocr_text: str) -> str:
+    return hashlib.sha256(f"v{CACHE_VERSION}\n{normalize(ocr_text)}".encode("utf-8")).hexdigest()
+
+
+class ReceiptCache:
+    def __init__(self, path: str, max_entries: int, ttl_days: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._inserts = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS receipt_cache ("
+                " key TEXT PRIMARY KEY, data TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS receipt_cache_last_used ON receipt_cache (last_used)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._db().execute(
+                "SELECT data, created, last_used FROM receipt_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._db().execute("DELETE FROM receipt_cache WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                RECEIPT_CACHE.inc(outcome="miss")
+                return None
+            if now - row[2] > TOUCH_AFTER_SECONDS:
+                self._db().execute("UPDATE receipt_cache SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        RECEIPT_CACHE.inc(outcome="hit")
+        return json.loads(row[0])
+
+    def put(self, key: str, data: Dict[str, Any]) -> None:
+        now = time.time()
+        payload = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO receipt_cache (key, data, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            self._inserts += 1
+            if self._inserts % PRUNE_EVERY == 1:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        db = self._db()
+        expired = db.execute("DELETE FROM receipt_cache WHERE created < ?", (now - self.ttl_seconds,)).rowcount
+        over = db.execute(
+            "DELETE FROM receipt_cache WHERE key IN ("
+            " SELECT key FROM receipt_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        if expired + over:
+            self.evictions += expired + over
+            RECEIPT_CACHE.inc(expired + over, outcome="evicted")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._db().execute("SELECT COUNT(*) FROM receipt_cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_days": self.ttl_seconds / 86400,
+                # hits/misses are for this worker since it started
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+CACHE = ReceiptCache(RECEIPT_CACHE_PATH, RECEIPT_CACHE_MAX_ENTRIES, RECEIPT_CACHE_TTL_DAYS)
@@ -1,8 +1,21 @@
-import os
 import json
-from openai import OpenAI
+import time
+import asyncio
+from typing import AsyncIterator, Dict, List
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from starlette.concurrency import run_in_threadpool
+
+from llm_client import chat_completion
+from logs import get_logger
+from metrics import RECEIPT_CACHE, RECEIPT_PARSE
+from receipt_cache import CACHE, cache_key
+from receipt_rules import RULES_MIN_CONFIDENCE, parse_receipt_rules
+from tracing import span
+
+log = get_logger("surra.receipt")
+
+# cache key -> parse in progress in this worker; concurrent retries await it
+_inflight: Dict[str, "asyncio.Future[dict]"] = {}
 
 SYSTEM_PROMPT = """
 You are a receipt parsing engine.
@@ -38,8 +51,9 @@ Return JSON in this EXACT shape:
 }
 """
 
-def parse_receipt_with_llm(ocr_text: str) -> dict:
-    response = client.chat.completions.create(
+async def parse_receipt_with_llm(ocr_text: str) -> dict:
+    response = await chat_completion(
+        "receipt",
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -59,7 +73,11 @@ def parse_receipt_with_llm(ocr_text: str) -> dict:
     except json.JSONDecodeError:
         raise ValueError("LLM did not return valid JSON")
 
-    # ---- HARD VALIDATION / FIXES ----
+    return validate_receipt(data)
+
+
+def validate_receipt(data: dict) -> dict:
+    """Hard validation / fixes shared by the rules and LLM parsers."""
 
     # Merchant
     if not data.get("merchant"):
@@ -103,7 +121,7 @@ def parse_receipt_with_llm(ocr_text: str) -> dict:
 
     # Total
     try:
-        data["total"] = float(data["total"])
+        data["total"] = float(data.get("total"))
     except:
         # Fallback: sum items
         if data["items"]:
@@ -112,3 +130,106 @@ def parse_receipt_with_llm(ocr_text: str) -> dict:
             data["total"] = None
 
     return data
+
+
+async def parse_receipt(ocr_text: str) -> dict:
+    """
+    Cached parse: a receipt seen before (same normalized text) is returned from
+    receipt_cache, and identical requests already in flight share one parse.
+    """
+    key = cache_key(ocr_text)
+    pending = _inflight.get(key)
+    if pending is not None:
+        RECEIPT_CACHE.inc(outcome="coalesced")
+        try:
+            return dict(await asyncio.shield(pending))
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # the request that owned the parse went away; parse it ourselves
+
+    future: "asyncio.Future[dict]" = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        with span("receipt.cache") as s:
+            try:
+                cached = await run_in_threadpool(CACHE.get, key)
+            except Exception as e:
+                log.warning("receipt.cache_read_failed", error=repr(e))
+                cached = None
+            s.set(hit=cached is not None)
+        data = cached if cached is not None else await _parse_uncached(ocr_text)
+        future.set_result(data)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # nobody else may be waiting; keep asyncio from warning about it
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+    if cached is None:
+        try:
+            await run_in_threadpool(CACHE.put, key, data)
+        except Exception as e:
+            log.warning("receipt.cache_write_failed", error=repr(e))
+    return dict(data)
+
+
+async def _parse_uncached(ocr_text: str) -> dict:
+    """
+    Rules first; only receipts the rules parser is unsure about reach the LLM.
+    Both paths return the same validated shape.
+    """
+    with span("receipt.rules") as s:
+        data, confidence = parse_receipt_rules(ocr_text)
+        s.set(confidence=confidence)
+
+    if confidence >= RULES_MIN_CONFIDENCE:
+        RECEIPT_PARSE.inc(path="rules", outcome="ok")
+        return validate_receipt(data)
+
+    try:
+        with span("receipt.llm", rules_confidence=confidence):
+            result = await parse_receipt_with_llm(ocr_text)
+    except Exception:
+        RECEIPT_PARSE.inc(path="llm", outcome="error")
+        raise
+    RECEIPT_PARSE.inc(path="llm", outcome="ok")
+    return result
+
+
+async def parse_receipts_stream(
+    texts: List[str], concurrency: int, item_timeout: float
+) -> AsyncIterator[dict]:
+    """
+    Parse many receipts, at most `concurrency` at a time, yielding one result
+    per receipt as it finishes (not in input order; `index` says which).
+    A failure or timeout is reported on that receipt's line only.
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(index: int, text: str) -> dict:
+        async with sem:
+            started = time.perf_counter()
+            try:
+                data = await asyncio.wait_for(parse_receipt(text), item_timeout)
+                out = {"index": index, "ok": True, "data": data}
+            except asyncio.TimeoutError:
+                out = {"index": index, "ok": False, "error": f"timed out after {item_timeout:g}s"}
+            except Exception as e:
+                out = {"index": index, "ok": False, "error": str(e)}
+            out["ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return out
+
+    tasks = [asyncio.create_task(one(i, t)) for i, t in enumerate(texts)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # client went away mid-stream: stop the receipts still queued or running
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,195 @@
+# backend/receipt_rules.py
+"""
+Deterministic receipt parser for rigid layouts (big Saudi chains).
+
+parse_receipt_rules(ocr_text) returns the same dict shape the LLM parser
+produces, plus a confidence in [0, 1]. Confidence comes from what was found:
+
+    total on a TOTAL / الإجمالي line      0.45  (weaker "amount" line: 0.30)
+    items that add up to the total        0.30  (with or without 15% VAT)
+    merchant from the known-chain list    0.15  (first header line: 0.05)
+    a valid date                          0.10
+
+Receipts below RULES_MIN_CONFIDENCE go to the LLM (see receipt_llm.parse_receipt).
+"""
+import os
+import re
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+RULES_MIN_CONFIDENCE = float(os.getenv("RECEIPT_RULES_MIN_CONFIDENCE", "0.8"))
+VAT_RATE = 0.15
+
+# ---------- Normalization ----------
+_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹٫٬", "01234567890123456789.,")
+
+# ---------- Patterns (compiled once) ----------
+_AMOUNT = r"(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d{1,7}(?:[.,]\d{1,2})?)"
+_CURRENCY = r"(?:SAR|SR|S\.R\.?|ر\.?\s?س\.?|ريال)"
+
+TOTAL_STRONG_RE = re.compile(
+    r"(?:grand\s*total|net\s*total|total\s*amount|total\s*due|amount\s*due|total(?:\s*\(?incl[^)]*\)?)?"
+    r"|الإجمالي|الاجمالي|إجمالي|اجمالي|المجموع|الصافي)"
+    rf"\s*(?:{_CURRENCY})?\s*[:=]?\s*(?:{_CURRENCY})?\s*{_AMOUNT}",
+    re.IGNORECASE,
+)
+TOTAL_WEAK_RE = re.compile(
+    rf"(?:amount|paid|المبلغ|المدفوع)\s*(?:{_CURRENCY})?\s*[:=]?\s*{_AMOUNT}\s*(?:{_CURRENCY})?",
+    re.IGNORECASE,
+)
+# a trailing amount after the TOTAL label, when the label and amount are reversed
+TOTAL_REVERSED_RE = re.compile(
+    rf"{_AMOUNT}\s*(?:{_CURRENCY})?\s*(?:الإجمالي|الاجمالي|إجمالي|المجموع)", re.IGNORECASE
+)
+NOT_TOTAL_RE = re.compile(r"sub\s*-?\s*total|vat|tax|ضريبة|الضريبة|المجموع الفرعي|discount|خصم", re.IGNORECASE)
+
+ITEM_RE = re.compile(
+    rf"^(?P<name>.*?[^\W\d_].*?)\s+(?:(?P<qty>\d{{1,3}})\s*[x×@*]\s*{_AMOUNT}\s+)?"
+    rf"(?:{_CURRENCY}\s*)?(?P<price>{_AMOUNT})\s*(?:{_CURRENCY})?$",
+    re.IGNORECASE,
+)
+NOT_ITEM_RE = re.compile(
+    r"total|vat|tax|cash|change|paid|card|mada|visa|master|balance|amount|invoice|receipt|tel|phone|"
+    r"branch|cr\s*no|ضريبة|الضريبة|المجموع|الإجمالي|الاجمالي|إجمالي|نقد|الباقي|مدى|فاتورة|هاتف|فرع",
+    re.IGNORECASE,
+)
+
+DATE_YMD_RE = re.compile(r"\b(20\d{2})[-/.](\d{1,2})[-/.](\d{1,2})\b")
+DATE_DMY_RE = re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](20\d{2})\b")
+
+EARNING_RE = re.compile(r"\brefund\b|\breturn(?:ed)?\b|استرجاع|مرتجع|استرداد", re.IGNORECASE)
+HEADER_NOISE_RE = re.compile(
+    r"\d{4,}|invoice|receipt|vat|tax|tel|phone|www\.|http|branch|cr\s*no|فاتورة|ضريبي|هاتف|فرع|سجل",
+    re.IGNORECASE,
+)
+
+# canonical name -> patterns seen on receipts (English and Arabic)
+KNOWN_MERCHANTS: Dict[str, Tuple[str, ...]] = {
+    "Panda": (r"\bpanda\b", r"بنده", r"باندا"),
+    "Al Othaim Markets": (r"othaim", r"العثيم"),
+    "Danube": (r"\bdanube\b", r"الدانوب"),
+    "Tamimi Markets": (r"tamimi", r"التميمي"),
+    "Carrefour": (r"carrefour", r"كارفور"),
+    "LuLu Hypermarket": (r"\blulu\b", r"لولو"),
+    "Bin Dawood": (r"bin\s*dawood", r"بن\s*داود"),
+    "Nahdi Pharmacy": (r"nahdi", r"النهدي"),
+    "Al Dawaa Pharmacy": (r"al\s*dawaa", r"الدواء"),
+    "Jarir Bookstore": (r"\bjarir\b", r"جرير"),
+    "eXtra": (r"\bextra\b", r"اكسترا"),
+    "Starbucks": (r"starbucks", r"ستاربكس"),
+    "McDonald's": (r"mcdonald", r"ماكدونالدز"),
+    "Al Baik": (r"al\s*baik", r"البيك"),
+    "Aldrees": (r"aldrees|al\s*drees", r"الدريس"),
+    "SASCO": (r"\bsasco\b", r"ساسكو"),
+    "Hyper Panda": (r"hyper\s*panda", r"هايبر\s*بنده"),
+}
+_MERCHANT_RES = [
+    (name, re.compile("|".join(patterns), re.IGNORECASE))
+    # longer names first, so "Hyper Panda" wins over "Panda"
+    for name, patterns in sorted(KNOWN_MERCHANTS.items(), key=lambda kv: -len(kv[0]))
+]
+
+
+def _to_float(raw: str) -> Optional[float]:
+    s = raw.strip()
+    if re.fullmatch(r"\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?", s):
+        s = s.replace(",", "")
+    else:
+        s = s.replace(",", ".")
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def _find_total(lines: List[str]) -> Tuple[Optional[float], float]:
+    # totals sit near the bottom; the last strong match wins
+    for line in reversed(lines):
+        if NOT_TOTAL_RE.search(line) and not re.search(r"incl", line, re.IGNORECASE):
+            continue
+        m = TOTAL_STRONG_RE.search(line) or TOTAL_REVERSED_RE.search(line)
+        if m:
+            value = _to_float(m.group(m.lastindex))
+            if value is not None:
+                return value, 0.45
+    for line in reversed(lines):
+        if NOT_TOTAL_RE.search(line):
+            continue
+        m = TOTAL_WEAK_RE.search(line)
+        if m:
+            value = _to_float(m.group(1))
+            if value is not None:
+                return value, 0.30
+    return None, 0.0
+
+
+def _find_items(lines: List[str]) -> List[Dict[str, Any]]:
+    items = []
+    for line in lines:
+        if NOT_ITEM_RE.search(line) or DATE_YMD_RE.search(line) or DATE_DMY_RE.search(line):
+            continue
+        m = ITEM_RE.match(line)
+        if not m:
+            continue
+        price = _to_float(m.group("price"))
+        name = m.group("name").strip(" .:-")
+        if price is None or price <= 0 or not name:
+            continue
+        items.append({"name": name, "price": round(price, 2)})
+    return items
+
+
+def _find_date(text: str) -> Optional[str]:
+    for regex, order in ((DATE_YMD_RE, (0, 1, 2)), (DATE_DMY_RE, (2, 1, 0))):
+        for m in regex.finditer(text):
+            parts = m.groups()
+            try:
+                d = datetime.date(int(parts[order[0]]), int(parts[order[1]]), int(parts[order[2]]))
+            except ValueError:
+                continue
+            return d.isoformat()
+    return None
+
+
+def _find_merchant(lines: List[str]) -> Tuple[Optional[str], float]:
+    head = "\n".join(lines[:6])
+    for name, regex in _MERCHANT_RES:
+        if regex.search(head):
+            return name, 0.15
+    for line in lines[:3]:
+        if not HEADER_NOISE_RE.search(line) and re.search(r"[^\W\d_]{3,}", line):
+            return line.strip(), 0.05
+    return None, 0.0
+
+
+def _items_match_total(items: List[Dict[str, Any]], total: float) -> bool:
+    s = sum(i["price"] for i in items)
+    tol = max(0.05, 0.01 * total)
+    return abs(s - total) <= tol or abs(s * (1 + VAT_RATE) - total) <= tol
+
+
+def parse_receipt_rules(ocr_text: str) -> Tuple[Dict[str, Any], float]:
+    """
+    Parse OCR text with the precompiled patterns.
+    Returns (data, confidence); data has the LLM parser's shape.
+    """
+    text = (ocr_text or "").translate(_DIGITS)
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+
+    total, confidence = _find_total(lines)
+    items = _find_items(lines)
+    if total is not None and items:
+        confidence += 0.30 if _items_match_total(items, total) else 0.0
+    merchant, merchant_score = _find_merchant(lines)
+    date = _find_date(text)
+
+    confidence += merchant_score + (0.10 if date else 0.0)
+    data = {
+        "merchant": merchant,
+        "date": date,
+        "items": items,
+        "total": total,
+        "currency": "SAR",
+        "type": "earning" if EARNING_RE.search(text) else "expense",
+    }
+    return data, round(min(confidence, 1.0), 2)
@@ -2,14 +2,16 @@
 
 import os
 import json
+import asyncio
 import datetime
 from typing import Any, Dict, List, Optional
 
-import httpx
 from dotenv import load_dotenv
-from openai import OpenAI
 from pathlib import Path
-from fastapi import HTTPException
+
+from llm_client import chat_completion
+from supabase_rest import asbr, asb_single
+from aggregation import load_transactions
 
 # Load backend/.env
 load_dotenv(dotenv_path=Path(__file__).with_name(".env"))
@@ -22,37 +24,12 @@ DASHBOARD_REC_MODEL = os.getenv("DASHBOARD_REC_MODEL", "gpt-4o-mini")
 if not all([OPENAI_API_KEY, SUPABASE_URL, SERVICE_KEY]):
     raise RuntimeError("Missing required env vars for dashboard recommendations")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
-REST = f"{SUPABASE_URL}/rest/v1"
+REST_TIMEOUT = 25
 
 
 # =========================================================
-# Shared REST helpers
+# Shared helpers
 # =========================================================
-def sbr(path: str, params: Dict[str, str] | None = None) -> List[Dict[str, Any]]:
-    with httpx.Client(timeout=25) as c:
-        r = c.get(
-            f"{REST}/{path}",
-            params=params or {},
-            headers={
-                "apikey": SERVICE_KEY,
-                "Authorization": f"Bearer {SERVICE_KEY}",
-                "Accept": "application/json",
-            },
-        )
-        if r.status_code >= 400:
-            raise HTTPException(r.status_code, r.text)
-        return r.json()
-
-
-def sb_single(table: str, select: str, **filters) -> Optional[Dict[str, Any]]:
-    params = {"select": select}
-    for k, v in filters.items():
-        params[k] = f"eq.{v}"
-    rows = sbr(table, params)
-    return rows[0] if rows else None
-
-
 def safe_float(v: Any, default: float = 0.0) -> float:
     try:
         if v is None or v == "":
@@ -74,96 +51,105 @@ def parse_date(value: Any) -> Optional[datetime.date]:
 # =========================================================
 # Data fetching
 # =========================================================
-def fetch_user_recommendation_context(profile_id: str, months: int = 9) -> Dict[str, Any]:
+async def fetch_user_recommendation_context(profile_id: str, months: int = 9) -> Dict[str, Any]:
     today = datetime.date.today()
     approx_start = (today.replace(day=1) - datetime.timedelta(days=32 * (months - 1))).replace(day=1)
 
-    profile = sb_single(
-        "User_Profile",
-        "profile_id,current_balance,full_name,user_id",
-        profile_id=profile_id,
-    ) or {}
-
-    monthly_records = sbr(
-        "Monthly_Financial_Record",
-        {
-            "select": "record_id,period_start,period_end,total_expense,total_income,total_earning,monthly_saving,profile_id",
-            "profile_id": f"eq.{profile_id}",
-            "period_start": f"gte.{approx_start.isoformat()}",
-            "order": "period_start.asc",
-            "limit": str(months),
-        },
+    # First wave: everything keyed only on profile_id, fetched concurrently.
+    (
+        profile,
+        monthly_records,
+        categories,
+        fixed_incomes,
+        fixed_expenses,
+        goals,
+        recent_transactions,
+    ) = await asyncio.gather(
+        asb_single(
+            "User_Profile",
+            "profile_id,current_balance,full_name,user_id",
+            profile_id=profile_id,
+        ),
+        asbr(
+            "Monthly_Financial_Record",
+            {
+                "select": "record_id,period_start,period_end,total_expense,total_income,total_earning,monthly_saving,profile_id",
+                "profile_id": f"eq.{profile_id}",
+                "period_start": f"gte.{approx_start.isoformat()}",
+                "order": "period_start.asc",
+                "limit": str(months),
+            },
+            timeout=REST_TIMEOUT,
+        ),
+        asbr(
+            "Category",
+            {
+                "select": "category_id,name,monthly_limit,icon,icon_color,profile_id,is_archived",
+                "profile_id": f"eq.{profile_id}",
+            },
+            timeout=REST_TIMEOUT,
+        ),
+        asbr(
+            "Fixed_Income",
+            {
+                "select": "income_id,name,monthly_income,payday,is_primary,is_transacted,start_time,end_time,last_update,profile_id",
+                "profile_id": f"eq.{profile_id}",
+            },
+            timeout=REST_TIMEOUT,
+        ),
+        asbr(
+            "Fixed_Expense",
+            {
+                "select": "expense_id,name,amount,due_date,is_transacted,start_time,end_time,last_update,profile_id,category_id",
+                "profile_id": f"eq.{profile_id}",
+            },
+            timeout=REST_TIMEOUT,
+        ),
+        asbr(
+            "Goal",
+            {
+                "select": "goal_id,name,target_amount,target_date,status,created_at,profile_id",
+                "profile_id": f"eq.{profile_id}",
+            },
+            timeout=REST_TIMEOUT,
+        ),
+        # no upper bound: future-dated rows count as activity, as they always did
+        load_transactions(profile_id, approx_start, None),
     )
+    profile = profile or {}
 
-    record_ids = [r["record_id"] for r in monthly_records if r.get("record_id")]
-
-    categories = sbr(
-        "Category",
-        {
-            "select": "category_id,name,monthly_limit,icon,icon_color,profile_id,is_archived",
-            "profile_id": f"eq.{profile_id}",
-        },
-    )
     active_categories = [c for c in categories if not c.get("is_archived", False)]
     category_map = {c["category_id"]: c for c in active_categories if c.get("category_id")}
 
-    category_summaries = []
-    if record_ids:
-        joined_ids = ",".join(record_ids)
-        category_summaries = sbr(
+    # Second wave: queries that depend on ids from the first one.
+    record_ids = [r["record_id"] for r in monthly_records if r.get("record_id")]
+    goal_ids = [g["goal_id"] for g in goals if g.get("goal_id")]
+
+    async def _category_summaries() -> List[Dict[str, Any]]:
+        if not record_ids:
+            return []
+        return await asbr(
             "Category_Summary",
             {
                 "select": "summary_id,total_expense,record_id,category_id",
-                "record_id": f"in.({joined_ids})",
+                "record_id": f"in.({','.join(record_ids)})",
             },
+            timeout=REST_TIMEOUT,
         )
 
-    fixed_incomes = sbr(
-        "Fixed_Income",
-        {
-            "select": "income_id,name,monthly_income,payday,is_primary,is_transacted,start_time,end_time,last_update,profile_id",
-            "profile_id": f"eq.{profile_id}",
-        },
-    )
-
-    fixed_expenses = sbr(
-        "Fixed_Expense",
-        {
-            "select": "expense_id,name,amount,due_date,is_transacted,start_time,end_time,last_update,profile_id,category_id",
-            "profile_id": f"eq.{profile_id}",
-        },
-    )
-
-    goals = sbr(
-        "Goal",
-        {
-            "select": "goal_id,name,target_amount,target_date,status,created_at,profile_id",
-            "profile_id": f"eq.{profile_id}",
-        },
-    )
-
-    goal_ids = [g["goal_id"] for g in goals if g.get("goal_id")]
-
-    goal_transfers = []
-    if goal_ids:
-        joined_goal_ids = ",".join(goal_ids)
-        goal_transfers = sbr(
+    async def _goal_transfers() -> List[Dict[str, Any]]:
+        if not goal_ids:
+            return []
+        return await asbr(
             "Goal_Transfer",
             {
                 "select": "goal_transfer_id,direction,amount,created_at,goal_id",
-                "goal_id": f"in.({joined_goal_ids})",
+                "goal_id": f"in.({','.join(goal_ids)})",
             },
+            timeout=REST_TIMEOUT,
         )
 
-    recent_transactions = sbr(
-        "Transaction",
-        {
-            "select": "amount,date,type,category_id,profile_id",
-            "profile_id": f"eq.{profile_id}",
-            "date": f"gte.{approx_start.isoformat()}",
-            "order": "date.asc",
-        },
-    )
+    category_summaries, goal_transfers = await asyncio.gather(_category_summaries(), _goal_transfers())
 
     return {
         "profile": profile,
@@ -457,9 +443,10 @@ def build_daily_recommendation_signals(ctx: Dict[str, Any]) -> Dict[str, Any]:
     ][:3]
 
     # Activity
-    transaction_count = len(recent_transactions)
-    expense_tx_count = sum(1 for t in recent_transactions if str(t.get("type", "")).lower() == "expense")
-    earning_tx_count = sum(1 for t in recent_transactions if str(t.get("type", "")).lower() == "earning")
+    tx_counts = recent_transactions.kind_counts()
+    transaction_count = recent_transactions.source_rows  # every type, not only income/earning/expense
+    expense_tx_count = tx_counts["expense"]
+    earning_tx_count = tx_counts["earning"]
     has_any_expense_history = expense_tx_count > 0 or latest_expense > 0
     has_any_income_data = (latest_income > 0) or (total_fixed_income > 0) or bool(fixed_incomes)
     is_new_user_like = has_any_income_data and not has_any_expense_history and len(monthly_records) <= 1
@@ -589,8 +576,8 @@ def build_daily_recommendation_signals(ctx: Dict[str, Any]) -> Dict[str, Any]:
 # =========================================================
 # LLM recommendation
 # =========================================================
-def generate_daily_dashboard_recommendation(profile_id: str, months: int = 9) -> Dict[str, Any]:
-    ctx = fetch_user_recommendation_context(profile_id=profile_id, months=months)
+async def generate_daily_dashboard_recommendation(profile_id: str, months: int = 9) -> Dict[str, Any]:
+    ctx = await fetch_user_recommendation_context(profile_id=profile_id, months=months)
     signals = build_daily_recommendation_signals(ctx)
 
     system_prompt = """
@@ -655,7 +642,8 @@ Signals:
 {json.dumps(signals, ensure_ascii=False)}
 """
 
-    response = client.chat.completions.create(
+    response = await chat_completion(
+        "dashboard",
         model=DASHBOARD_REC_MODEL,
         messages=[
             {"role": "system", "content": system_prompt},
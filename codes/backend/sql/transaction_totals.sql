@@ -0,0 +1,41 @@
+-- backend/sql/transaction_totals.sql
+--
+-- Income / earning / expense sums of one profile's transactions in a date
+-- range, computed in Postgres so the API gets one row instead of every
+-- Transaction row (aggregation.period_totals, used by get_balance and the
+-- tools built on it). Until this is applied the API falls back to loading
+-- the rows and summing them itself.
+--
+-- Apply once in the Supabase SQL editor, or:
+--     psql "$DATABASE_URL" -f sql/transaction_totals.sql
+-- Called as POST /rest/v1/rpc/transaction_totals
+--     {"p_profile_id": "...", "p_start": "2026-10-01", "p_end": "2026-10-31"}
+
+create index if not exists "Transaction_profile_id_date_idx"
+    on public."Transaction" (profile_id, "date");
+
+create or replace function public.transaction_totals(p_profile_id uuid, p_start date, p_end date)
+returns table (income numeric, earning numeric, expense numeric, tx_count bigint)
+language sql
+stable
+security invoker
+set search_path = public
+as $$
+    select
+        coalesce(sum(amount) filter (where lower("type") = 'income'), 0),
+        coalesce(sum(amount) filter (where lower("type") = 'earning'), 0),
+        coalesce(sum(amount) filter (where lower("type") = 'expense'), 0),
+        count(*) filter (where lower("type") in ('income', 'earning', 'expense'))
+    from public."Transaction"
+    -- half-open upper bound: also right when "date" is a timestamp
+    where profile_id = p_profile_id
+      and "date" >= p_start
+      and "date" < p_end + 1;
+$$;
+
+-- any profile_id can be passed: only the backend's service role may call it
+revoke execute on function public.transaction_totals(uuid, date, date) from public, anon, authenticated;
+grant execute on function public.transaction_totals(uuid, date, date) to service_role;
+
+-- make PostgREST see the new function without a restart
+notify pgrst, 'reload schema';
@@ -0,0 +1,113 @@
+# backend/startup.py
+"""
+Explicit startup stages.
+
+Importing main must stay cheap (see benchmarks/bench_startup.py): anything
+slow runs as a named stage from the lifespan instead, and its timing is kept
+for the startup report.
+
+    with stage("tools"):
+        openai_tools()
+    background_stage("gold_model", load_gold_lstm)   # off the startup path
+
+Background stages run in a thread (or on the loop, for coroutine functions)
+so the worker can accept traffic while they finish; report() shows which are
+still running. ready() stays False until all of them have finished, failed or
+timed out: GET /ready uses it to keep load balancers off cold workers, while
+GET /health answers as soon as the process is up.
+
+The event loop only keeps weak references to tasks, so background stages are
+held in a module-level set until they finish; cancel_background() stops the
+ones still running on shutdown.
+"""
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from logs import get_logger
+
+log = get_logger("surra.startup")
+
+_IMPORTED_AT = time.time()  # close enough to worker start: main imports this early
+_stages: List[Dict[str, Any]] = []
+_tasks: Set["asyncio.Task[Any]"] = set()
+_lock = threading.Lock()
+
+
+def _record(name: str, started: float, error: str | None, background: bool) -> None:
+    ms = round((time.perf_counter() - started) * 1000, 1)
+    with _lock:
+        for entry in _stages:
+            if entry["name"] == name:
+                entry.update(ms=ms, state="failed" if error else "done", error=error)
+                break
+        else:
+            _stages.append({"name": name, "ms": ms, "state": "failed" if error else "done", "error": error})
+    if error:
+        log.error("startup.stage_failed", stage=name, ms=ms, error=error, background=background)
+    else:
+        log.info("startup.stage", stage=name, ms=ms, background=background)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a blocking startup step; failures propagate after being recorded."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        _record(name, started, repr(e), background=False)
+        raise
+    _record(name, started, None, background=False)
+
+
+def background_stage(name: str, fn: Callable[[], Any], timeout: float | None = None) -> "asyncio.Task[Any]":
+    """
+    Run a slow, optional step off the startup path; failures are logged, not
+    raised. After `timeout` seconds the stage counts as failed (a thread keeps
+    running to completion, it just stops holding up readiness).
+    """
+    with _lock:
+        _stages.append({"name": name, "ms": None, "state": "running", "error": None})
+
+    async def run() -> Any:
+        started = time.perf_counter()
+        work = fn() if asyncio.iscoroutinefunction(fn) else run_in_threadpool(fn)
+        try:
+            result = await asyncio.wait_for(work, timeout)
+        except asyncio.CancelledError:
+            _record(name, started, "cancelled", background=True)
+            raise
+        except Exception as e:
+            _record(name, started, repr(e), background=True)
+            return None
+        _record(name, started, None, background=True)
+        return result
+
+    task = asyncio.create_task(run(), name=f"startup:{name}")
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+async def cancel_background() -> None:
+    """Cancel the background stages still running and wait for them (lifespan exit)."""
+    pending = [t for t in _tasks if not t.done()]
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+def report() -> Dict[str, Any]:
+    with _lock:
+        stages = [dict(s) for s in _stages]
+    return {"uptime_s": round(time.time() - _IMPORTED_AT, 1), "stages": stages}
+
+
+def ready() -> bool:
+    with _lock:
+        return all(s["state"] != "running" for s in _stages)
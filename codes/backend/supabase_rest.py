@@ -0,0 +1,222 @@
+# backend/supabase_rest.py
+import os
+import time
+import asyncio
+import weakref
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from metrics import SUPABASE_CALLS, SUPABASE_LATENCY
+from tracing import current_trace_id, span
+
+load_dotenv(dotenv_path=Path(__file__).with_name(".env"))
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+REST = f"{SUPABASE_URL}/rest/v1"
+TIMEOUT = 20
+
+# One pooled client per process (sync) and per event loop (async), instead of
+# a new connection + TLS handshake for every query.
+_client: httpx.Client | None = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+# Optional transport overrides (benchmarks, local emulators); None = real network.
+_transport: httpx.BaseTransport | None = None
+_async_transport: httpx.AsyncBaseTransport | None = None
+
+_READ_HEADERS = {
+    "apikey": SERVICE_KEY,
+    "Authorization": f"Bearer {SERVICE_KEY}",
+    "Accept": "application/json",
+}
+_RPC_HEADERS = {**_READ_HEADERS, "Content-Type": "application/json"}
+_WRITE_HEADERS = {
+    "apikey": SERVICE_KEY,
+    "Authorization": f"Bearer {SERVICE_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "return=representation",
+}
+
+
+def configure(
+    transport: httpx.BaseTransport | None = None,
+    async_transport: httpx.AsyncBaseTransport | None = None,
+) -> None:
+    """Route the helpers through custom transports. Drops pooled clients."""
+    global _client, _transport, _async_transport
+    _transport = transport
+    _async_transport = async_transport
+    if _client is not None:
+        _client.close()
+        _client = None
+    _async_clients.clear()
+
+
+def _sync_client() -> httpx.Client:
+    global _client
+    if _client is None:
+        _client = httpx.Client(base_url=REST, timeout=TIMEOUT, transport=_transport)
+    return _client
+
+
+def _async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    c = _async_clients.get(loop)
+    if c is None:
+        c = httpx.AsyncClient(base_url=REST, timeout=TIMEOUT, transport=_async_transport)
+        _async_clients[loop] = c
+    return c
+
+
+def _eq_params(select: str, filters: Dict[str, Any]) -> Dict[str, str]:
+    params = {"select": select}
+    for k, v in filters.items():
+        params[k] = f"eq.{v}"
+    return params
+
+
+def _record(method: str, table: str, started: float, status: Any) -> None:
+    SUPABASE_LATENCY.observe(time.perf_counter() - started, table=table, method=method)
+    SUPABASE_CALLS.inc(table=table, method=method, status=str(status))
+
+
+def _with_request_id(headers: Dict[str, str]) -> Dict[str, str]:
+    rid = current_trace_id()
+    return {**headers, "X-Request-ID": rid} if rid else headers
+
+
+def _json_or_raise(r: httpx.Response):
+    if r.status_code >= 400:
+        raise HTTPException(r.status_code, r.text)
+    return r.json()
+
+
+def _request(method: str, path: str, headers: Dict[str, str], **kwargs):
+    table = path.split("?", 1)[0]
+    started, status = time.perf_counter(), "error"
+    with span(f"supabase.{method}", table=table) as s:
+        try:
+            r = _sync_client().request(method, f"/{path}", headers=_with_request_id(headers), **kwargs)
+            status = r.status_code
+        finally:
+            _record(method, table, started, status)
+        data = _json_or_raise(r)
+        s.set(status=status, rows=len(data) if isinstance(data, list) else None)
+        return data
+
+
+async def _arequest(method: str, path: str, headers: Dict[str, str], **kwargs):
+    table = path.split("?", 1)[0]
+    started, status = time.perf_counter(), "error"
+    with span(f"supabase.{method}", table=table) as s:
+        try:
+            r = await _async_client().request(method, f"/{path}", headers=_with_request_id(headers), **kwargs)
+            status = r.status_code
+        finally:
+            _record(method, table, started, status)
+        data = _json_or_raise(r)
+        s.set(status=status, rows=len(data) if isinstance(data, list) else None)
+        return data
+
+
+# ---------- sync ----------
+def sbr(path: str, params: Dict[str, str] | None = None, timeout: float = TIMEOUT) -> List[Dict[str, Any]]:
+    """GET from Supabase REST with service key."""
+    return _request("GET", path, params=params or {}, headers=_READ_HEADERS, timeout=timeout)
+
+
+def sb_post(path: str, rows: list[dict]):
+    return _request("POST", path, headers=_WRITE_HEADERS, json=rows)
+
+
+def sb_patch(path: str, filters: Dict[str, str], data: Dict[str, Any]):
+    return _request("PATCH", path, params=filters, headers=_WRITE_HEADERS, json=data)
+
+
+def sb_single(table: str, select: str, **filters) -> Optional[Dict[str, Any]]:
+    rows = sbr(table, _eq_params(select, filters))
+    return rows[0] if rows else None
+
+
+def sb_list(table: str, select: str, **filters) -> List[Dict[str, Any]]:
+    return sbr(table, _eq_params(select, filters))
+
+
+# ---------- async ----------
+async def asbr(path: str, params: Dict[str, str] | None = None, timeout: float = TIMEOUT) -> List[Dict[str, Any]]:
+    return await _arequest("GET", path, params=params or {}, headers=_READ_HEADERS, timeout=timeout)
+
+
+async def asbr_all(path: str, params: Dict[str, str], key: str, page_size: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Every row matching params, keyset-paginated on the unique column `key`.
+    page_size must not exceed the server's max-rows (1000 on Supabase), or a
+    short page ends the scan early.
+    """
+    rows: List[Dict[str, Any]] = []
+    last: Optional[str] = None
+    while True:
+        page_params = {**params, "order": f"{key}.asc", "limit": str(page_size)}
+        if last is not None:
+            page_params[key] = f"gt.{last}"
+        page = await asbr(path, page_params)
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        last = page[-1][key]
+
+
+async def arpc(function: str, args: Dict[str, Any]) -> Any:
+    """Call a Postgres function (POST /rpc/<function>); a missing function is a 404."""
+    return await _arequest("POST", f"rpc/{function}", headers=_RPC_HEADERS, json=args)
+
+
+async def asb_post(path: str, rows: list[dict]):
+    return await _arequest("POST", path, headers=_WRITE_HEADERS, json=rows)
+
+
+async def asb_patch(path: str, filters: Dict[str, str], data: Dict[str, Any]):
+    return await _arequest("PATCH", path, params=filters, headers=_WRITE_HEADERS, json=data)
+
+
+async def asb_single(table: str, select: str, **filters) -> Optional[Dict[str, Any]]:
+    rows = await asbr(table, _eq_params(select, filters))
+    return rows[0] if rows else None
+
+
+async def asb_list(table: str, select: str, **filters) -> List[Dict[str, Any]]:
+    return await asbr(table, _eq_params(select, filters))
+
+
+_thread = threading.local()
+
+
+def run_sync(coro):
+    """
+    Run an async helper from sync code (scripts, threadpool callers) on the
+    calling thread's event loop. The loop lives as long as the thread, so its
+    pooled AsyncClient is reused by the next call instead of reconnecting.
+    Must not be called from inside a running event loop.
+    """
+    loop = getattr(_thread, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _thread.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coro)
+
+
+async def awarm(table: str = "User_Profile") -> None:
+    """Open this loop's pooled connection (DNS, TLS) before the first real query."""
+    await asbr(table, {"select": "*", "limit": "0"})
+
+
+async def aclose() -> None:
+    c = _async_clients.pop(asyncio.get_running_loop(), None)
+    if c is not None:
+        await c.aclose()
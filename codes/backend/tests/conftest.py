@@ -0,0 +1,67 @@
+# backend/tests/conftest.py
+"""
+Shared setup for the backend tests: fake credentials and throwaway state
+files are set before any backend module is imported. Fixtures: `postgrest`
+routes supabase_rest through the in-memory PostgREST emulator, `outbox`
+captures the notifications the write-behind worker inserts.
+
+    cd codes/backend && python -m pytest -q tests
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+_state = tempfile.mkdtemp(prefix="surra-tests-")
+for _k, _v in {
+    "OPENAI_API_KEY": "sk-test",
+    "FT_MODEL_ID": "ft:test",
+    "SUPABASE_URL": "http://supabase.test",
+    "SUPABASE_SERVICE_ROLE_KEY": "test",
+    "BACKEND_API_KEY": "test",
+    "LOG_LEVEL": "WARNING",
+    "NOTIFICATION_FLUSH_SECONDS": "0.01",
+    "NOTIFICATION_DEDUP_PATH": os.path.join(_state, "notification_dedup.sqlite3"),
+    "BUDGET_ALERT_STATE_PATH": os.path.join(_state, "budget_alerts.sqlite3"),
+    "GOAL_SCHEDULER_STATE_PATH": os.path.join(_state, "goal_scheduler.sqlite3"),
+    "RECEIPT_CACHE_PATH": os.path.join(_state, "receipt_cache.sqlite3"),
+}.items():
+    os.environ[_k] = _v
+
+
+@pytest.fixture
+def postgrest():
+    """Install an emulator over the given tables; returns (store, transport)."""
+    import supabase_rest
+    from loadtest.postgrest_emulator import PostgrestStore, install
+
+    def make(tables, functions=None):
+        store = PostgrestStore(tables, functions)
+        return store, install(store)
+
+    yield make
+    supabase_rest.configure()
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    """Fresh in-memory notification gate (TTL 100s, 3 per hour) and a recording sb_post; yields the written rows."""
+    from notifications import notification_service as ns
+    from notifications.dedup import NotificationGate
+
+    rows = []
+
+    def post(path, batch):
+        rows.extend(batch)
+        return batch
+
+    monkeypatch.setattr(ns, "GATE", NotificationGate(":memory:", 100, 3, 3600))
+    monkeypatch.setattr(ns, "sb_post", post)
+    monkeypatch.setattr(ns.time, "sleep", lambda s: None)
+    yield rows
+    ns.flush()  # nothing queued by one test is written under the next one's patches
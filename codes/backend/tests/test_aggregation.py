@@ -0,0 +1,141 @@
+import random
+import asyncio
+import datetime
+
+import pytest
+
+import aggregation
+from aggregation import TxFrame, aggregate, check_buckets, resolve_range
+
+D = datetime.date
+TODAY = D(2026, 10, 19)  # a Monday
+
+
+def _rows(n, seed=7):
+    rnd = random.Random(seed)
+    return [
+        {
+            "transaction_id": f"t{i}",
+            "date": (D(2026, 1, 1) + datetime.timedelta(days=rnd.randrange(300))).isoformat(),
+            "type": rnd.choice(["Income", "earning", "Expense", "expense"]),
+            "amount": round(rnd.uniform(1, 500), 2),
+            "category_id": rnd.choice(["c1", "c2", None]),
+        }
+        for i in range(n)
+    ]
+
+
+def test_from_rows_drops_undated_and_unknown_rows():
+    frame = TxFrame.from_rows(
+        [
+            {"date": "2026-10-01T08:30:00", "type": "Expense", "amount": 10, "category_id": "c1"},
+            {"date": None, "type": "Expense", "amount": 10},
+            {"date": "2026-10-02", "type": "refund", "amount": 10},
+            {"date": "2026-10-03", "type": "income", "amount": None},
+        ]
+    )
+    assert len(frame) == 2 and frame.source_rows == 4
+    assert frame.kind_counts() == {"income": 1, "earning": 0, "expense": 1}
+
+
+@pytest.mark.parametrize("by", ["day", "week", "month", "category", "total"])
+def test_aggregate_matches_a_plain_loop(by):
+    rows = _rows(2000)
+    start, end = D(2026, 2, 11), D(2026, 8, 20)
+    if by == "day":
+        end = D(2026, 3, 31)
+    out = aggregate(TxFrame.from_rows(rows), start, end, by)
+
+    inside = [r for r in rows if start.isoformat() <= r["date"] <= end.isoformat()]
+    assert out["totals"]["count"] == len(inside)
+    for b in out["buckets"]:
+        if by == "category":
+            picked = [r for r in inside if r["category_id"] == b["category_id"]]
+        else:
+            first, last = (b["date"], b["date"]) if by == "day" else (b["start"], b["end"])
+            picked = [r for r in inside if first <= r["date"] <= last]
+        expense = sum(r["amount"] for r in picked if r["type"].lower() == "expense")
+        assert b["count"] == len(picked)
+        assert b["expense"] == pytest.approx(expense, abs=0.01)
+    assert sum(b["count"] for b in out["buckets"]) == len(inside)
+
+
+def test_time_buckets_are_clipped_to_the_range():
+    out = aggregate(TxFrame.from_rows([]), D(2026, 10, 15), D(2026, 11, 3), "week")
+    assert [(b["start"], b["end"]) for b in out["buckets"]] == [
+        ("2026-10-15", "2026-10-18"),
+        ("2026-10-19", "2026-10-25"),
+        ("2026-10-26", "2026-11-01"),
+        ("2026-11-02", "2026-11-03"),
+    ]
+    months = aggregate(TxFrame.from_rows([]), D(2026, 11, 15), D(2027, 1, 10), "month")["buckets"]
+    assert [(b["start"], b["end"]) for b in months] == [
+        ("2026-11-15", "2026-11-30"),
+        ("2026-12-01", "2026-12-31"),
+        ("2027-01-01", "2027-01-10"),
+    ]
+
+
+def test_aggregate_rejects_bad_input():
+    frame = TxFrame.from_rows([])
+    with pytest.raises(ValueError):
+        aggregate(frame, TODAY, TODAY, "hour")
+    with pytest.raises(ValueError):
+        aggregate(frame, TODAY, TODAY - datetime.timedelta(days=1), "day")
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({}, (D(2026, 10, 1), TODAY)),
+        ({"period": "today"}, (TODAY, TODAY)),
+        ({"period": "this_week"}, (TODAY, TODAY)),
+        ({"period": "last_week"}, (D(2026, 10, 12), D(2026, 10, 18))),
+        ({"period": "last_month"}, (D(2026, 9, 1), D(2026, 9, 30))),
+        ({"period": "this_quarter"}, (D(2026, 10, 1), TODAY)),
+        ({"period": "last_quarter"}, (D(2026, 7, 1), D(2026, 9, 30))),
+        ({"period": "last_year"}, (D(2025, 1, 1), D(2025, 12, 31))),
+        ({"last_days": 7}, (D(2026, 10, 13), TODAY)),
+        ({"start_date": "2026-08-05"}, (D(2026, 8, 5), TODAY)),
+        ({"end_date": "2026-08-05"}, (D(2026, 8, 1), D(2026, 8, 5))),
+    ],
+)
+def test_resolve_range(kwargs, expected):
+    assert resolve_range(TODAY, **kwargs) == expected
+
+
+def test_resolve_range_rejects_empty_ranges():
+    with pytest.raises(ValueError):
+        resolve_range(TODAY, start_date="2026-11-01")
+    with pytest.raises(ValueError):
+        resolve_range(TODAY, last_days=0)
+    with pytest.raises(ValueError):
+        resolve_range(TODAY, period="fortnight")
+
+
+def test_check_buckets():
+    check_buckets(D(2026, 1, 1), D(2026, 4, 30), "day")  # 120
+    with pytest.raises(ValueError):
+        check_buckets(D(2026, 1, 1), D(2026, 5, 1), "day")
+    check_buckets(D(2000, 1, 1), TODAY, "category")
+
+
+@pytest.mark.parametrize("deployed", [True, False])
+def test_load_and_period_totals(postgrest, monkeypatch, deployed):
+    rows = [
+        {**r, "profile_id": "p1"}
+        for r in [
+            {"transaction_id": "t1", "date": "2026-10-01", "type": "Income", "amount": 1000, "category_id": None},
+            {"transaction_id": "t2", "date": "2026-10-19T23:10:00", "type": "Expense", "amount": 40, "category_id": "c1"},
+            {"transaction_id": "t3", "date": "2026-10-20", "type": "Expense", "amount": 99, "category_id": "c1"},
+        ]
+    ]
+    postgrest({"Transaction": rows}, None if deployed else {})
+    monkeypatch.setattr(aggregation, "_rpc_missing_until", 0.0)
+    frame = asyncio.run(aggregation.load_transactions("p1", D(2026, 10, 1), TODAY))
+    assert len(frame) == 2  # the whole of `end`, nothing after it
+
+    totals = asyncio.run(aggregation.period_totals("p1", D(2026, 10, 1), TODAY))
+    assert totals == {"income": 1000.0, "earning": 0.0, "expense": 40.0, "net": 960.0, "count": 2}
+    # without the function: summed from the rows, and not asked again for a while
+    assert (aggregation._rpc_missing_until > 0) is not deployed
@@ -0,0 +1,117 @@
+import time
+import asyncio
+import datetime
+
+import numpy as np
+import pytest
+
+from notifications import budget_alerts
+from notifications import notification_service as ns
+from notifications.dedup import NotificationGate
+
+TODAY = datetime.date(2026, 10, 19)
+
+
+@pytest.fixture
+def alerts(postgrest, outbox, monkeypatch, tmp_path):
+    """One profile, two limited categories (one over, one near); returns (tables, run)."""
+    monkeypatch.setattr(budget_alerts, "STATE_PATH", str(tmp_path / "budget_alerts.sqlite3"))
+    monkeypatch.setattr(ns, "GATE", NotificationGate(":memory:", 100, 0, 3600))
+    tables = {
+        "Monthly_Financial_Record": [
+            {"record_id": "r1", "profile_id": "p1", "period_start": "2026-10-01", "period_end": "2026-10-31"}
+        ],
+        "Category": [
+            {"category_id": "c1", "profile_id": "p1", "name": "Food", "monthly_limit": 100},
+            {"category_id": "c2", "profile_id": "p1", "name": "Fun", "monthly_limit": 100},
+        ],
+        "Category_Summary": [
+            {"summary_id": "s1", "record_id": "r1", "category_id": "c1", "total_expense": 120},
+            {"summary_id": "s2", "record_id": "r1", "category_id": "c2", "total_expense": 85},
+        ],
+    }
+    store, _ = postgrest(tables)
+
+    def run():
+        for table in tables:
+            store._invalidate(table)  # tests edit the rows in place
+        return asyncio.run(budget_alerts.run_budget_alerts(TODAY))
+
+    return tables, run
+
+
+def _forget_watermarks():
+    store = budget_alerts.WatermarkStore(budget_alerts.STATE_PATH)
+    store.conn.execute("DELETE FROM budget_alert_watermark")
+    store.close()
+
+
+def test_duplicate_advances_the_watermark_so_nothing_is_resent_after_the_ttl(alerts, outbox, monkeypatch):
+    _, run = alerts
+    run()
+    assert sorted(r["type"] for r in outbox) == ["budget_alert", "budget_warning"]
+
+    _forget_watermarks()  # e.g. the process died between flush and save
+    stats = run()
+    assert stats["unsent"] == 0 and len(outbox) == 2  # duplicates: counted as delivered
+
+    start = time.time()
+    monkeypatch.setattr(time, "time", lambda: start + 101)  # dedup TTL is over
+    run()
+    assert len(outbox) == 2
+
+
+def test_compute_levels_thresholds():
+    spent = np.array([0, 79, 80, 100, 100.01, 250])
+    levels = budget_alerts.compute_levels(spent, np.full(6, 100.0), 0.8)
+    assert levels.tolist() == [0, 0, 1, 1, 2, 2]
+
+
+def test_watermark_store_saves_levels_and_forgets_zeros(tmp_path, monkeypatch):
+    path = str(tmp_path / "marks.sqlite3")
+    store = budget_alerts.WatermarkStore(path)
+    store.save([(("p1", "c1", "r1"), 2), (("p1", "c2", "r1"), 1)])
+    store.save([(("p1", "c2", "r1"), 0)])
+    assert store.load() == {("p1", "c1", "r1"): 2}
+
+    start = time.time()
+    monkeypatch.setattr(time, "time", lambda: start + (budget_alerts.STATE_TTL_DAYS + 1) * 86400)
+    store.save([(("p2", "c9", "r2"), 1)])  # saving also drops watermarks of finished periods
+    assert store.load() == {("p2", "c9", "r2"): 1}
+    store.close()
+
+
+def test_alerts_only_when_the_level_rises(alerts, outbox, monkeypatch):
+    tables, run = alerts
+    summaries = tables["Category_Summary"]
+    assert run()["alerts"] == 1 and len(outbox) == 2
+    assert run()["alerts"] == 0 and len(outbox) == 2  # same levels: nothing new
+
+    summaries[0]["total_expense"] = 50  # back under: the watermark is lowered
+    assert run()["lowered"] == 1 and len(outbox) == 2
+    summaries[0]["total_expense"] = 130  # over again: a new alert, once the gate's TTL for the first is over
+    start = time.time()
+    monkeypatch.setattr(time, "time", lambda: start + 101)
+    assert run()["alerts"] == 1
+    assert [r["type"] for r in outbox] == ["budget_alert", "budget_warning", "budget_alert"]
+
+
+def test_new_period_starts_from_zero(alerts, outbox):
+    tables, run = alerts
+    run()
+    tables["Monthly_Financial_Record"][0]["record_id"] = "r2"
+    for s in tables["Category_Summary"]:
+        s["record_id"] = "r2"
+    stats = run()
+    assert stats["alerts"] == 1 and stats["warnings"] == 1  # no watermark for the new record yet
+    marks = budget_alerts.WatermarkStore(budget_alerts.STATE_PATH)
+    assert marks.load()[("p1", "c1", "r2")] == budget_alerts.LEVEL_OVER
+    marks.close()
+
+
+def test_rate_limited_alert_is_retried_next_run(alerts, outbox, monkeypatch):
+    _, run = alerts
+    monkeypatch.setattr(ns, "GATE", NotificationGate(":memory:", 100, 1, 3600))
+    assert run()["unsent"] == 1 and len(outbox) == 1
+    monkeypatch.setattr(ns, "GATE", NotificationGate(":memory:", 100, 0, 3600))
+    assert run()["unsent"] == 0 and len(outbox) == 2
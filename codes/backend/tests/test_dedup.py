@@ -0,0 +1,89 @@
+import sys
+import time
+import subprocess
+
+from notifications.dedup import ADMIT, DUPLICATE, RATE_LIMITED, NotificationGate
+
+KEY = ("p1", "budget_alert", "Food", "2026-10")
+NOW = time.time()
+
+
+def _at(monkeypatch, t):
+    monkeypatch.setattr(time, "time", lambda: t)  # the in-memory index reads the clock itself
+
+
+def test_duplicate_within_the_ttl_only(monkeypatch):
+    gate = NotificationGate(":memory:", 100, 0, 3600)
+    assert gate.admit(*KEY, now=NOW) == ADMIT
+    assert gate.admit(*KEY, now=NOW + 50) == DUPLICATE
+    assert gate.admit("p2", *KEY[1:], now=NOW + 50) == ADMIT
+    _at(monkeypatch, NOW + 101)
+    assert gate.admit(*KEY, now=NOW + 101) == ADMIT
+
+
+def test_duplicate_is_found_in_sqlite_by_another_gate(tmp_path):
+    path = str(tmp_path / "dedup.sqlite3")
+    assert NotificationGate(path, 100, 0, 3600).admit(*KEY, now=NOW) == ADMIT
+    other = NotificationGate(path, 100, 0, 3600)  # another worker: nothing in its memory index
+    assert other.admit(*KEY, now=NOW + 1) == DUPLICATE
+
+
+def test_rate_limit_per_profile_and_window():
+    gate = NotificationGate(":memory:", 100, 2, 3600)
+    start = 3600 * (NOW // 3600)
+    assert [gate.admit("p1", "t", f"s{i}", "", now=start + i) for i in range(3)] == [ADMIT, ADMIT, RATE_LIMITED]
+    assert gate.admit("p2", "t", "s0", "", now=start + 3) == ADMIT
+    assert gate.admit("p1", "t", "s9", "", now=start + 3600) == ADMIT  # next window
+
+
+def test_release_undoes_claim_and_count():
+    gate = NotificationGate(":memory:", 100, 1, 3600)
+    assert gate.admit(*KEY, now=NOW) == ADMIT
+    gate.release(*KEY, admitted_at=NOW)
+    assert gate.admit(*KEY, now=NOW + 1) == ADMIT  # neither a duplicate nor over the limit
+    assert gate.stats()["released"] == 1
+
+
+def test_release_leaves_a_newer_claim_alone(tmp_path, monkeypatch):
+    path = str(tmp_path / "dedup.sqlite3")
+    gate = NotificationGate(path, 100, 0, 3600)
+    gate.admit(*KEY, now=NOW)
+    _at(monkeypatch, NOW + 200)
+    gate.admit(*KEY, now=NOW + 200)  # the first claim expired; claimed again
+    gate.release(*KEY, admitted_at=NOW)  # a late release of the first one
+    assert NotificationGate(path, 100, 0, 3600).admit(*KEY, now=NOW + 201) == DUPLICATE
+
+
+def test_prune_drops_expired_claims_and_old_windows():
+    gate = NotificationGate(":memory:", 100, 5, 3600)
+    gate.admit(*KEY, now=NOW)
+    gate._prune(NOW + 7200, int((NOW + 7200) // 3600))
+    db = gate._db()
+    assert db.execute("SELECT COUNT(*) FROM notification_dedup").fetchone()[0] == 0
+    assert db.execute("SELECT COUNT(*) FROM notification_rate").fetchone()[0] == 0
+
+
+def test_disabled_gate_admits_everything():
+    gate = NotificationGate(":memory:", 0, 0, 3600)
+    assert not gate.enabled
+    assert [gate.admit(*KEY, now=NOW) for _ in range(3)] == [ADMIT] * 3
+
+
+RACE = """
+import sys
+from notifications.dedup import NotificationGate
+gate = NotificationGate(sys.argv[1], 86400, 0, 3600)
+print(sum(gate.admit(f"p{i % 50}", "budget_alert", "Food", "2026-10") == "admit" for i in range(500)))
+"""
+
+
+def test_workers_racing_on_one_file_admit_each_key_once(tmp_path):
+    from conftest import BACKEND_DIR
+
+    path = str(tmp_path / "dedup.sqlite3")
+    workers = [
+        subprocess.Popen([sys.executable, "-c", RACE, path], cwd=BACKEND_DIR, stdout=subprocess.PIPE, text=True)
+        for _ in range(4)
+    ]
+    admitted = [int(w.communicate(timeout=60)[0]) for w in workers]
+    assert sum(admitted) == 50
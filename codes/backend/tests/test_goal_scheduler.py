@@ -0,0 +1,116 @@
+import time
+import asyncio
+import sqlite3
+import datetime
+
+import pytest
+
+from notifications import goal_scheduler as gs
+from notifications import notification_service as ns
+from notifications.dedup import NotificationGate
+
+TODAY = datetime.date(2026, 10, 19)
+
+
+def _day(n):
+    return (TODAY + datetime.timedelta(days=n)).isoformat()
+
+
+@pytest.fixture
+def goals(postgrest, outbox, monkeypatch, tmp_path):
+    """One active goal of 100 due in 30 days; returns (store, tables, scheduler, tick)."""
+    monkeypatch.setattr(ns, "GATE", NotificationGate(":memory:", 100, 0, 3600))
+    tables = {
+        "Goal": [
+            {"goal_id": "g1", "profile_id": "p1", "name": "Bike", "target_amount": 100, "target_date": _day(30), "status": "Active"}
+        ],
+        "Goal_Transfer": [],
+    }
+    store, _ = postgrest(tables)
+    sched = gs.GoalScheduler(str(tmp_path / "goal_scheduler.sqlite3"))
+
+    def tick(day=TODAY):
+        store._invalidate("Goal")
+        store._invalidate("Goal_Transfer")
+        return asyncio.run(sched.tick(day))
+
+    return store, tables, sched, tick
+
+
+def test_deduped_completion_counts_as_sent_and_is_not_resent_after_the_ttl(goals, outbox, monkeypatch):
+    _, tables, sched, tick = goals
+    tick()  # first tick: nothing reached yet
+    tables["Goal_Transfer"].append(
+        {"goal_transfer_id": "t1", "goal_id": "g1", "direction": "Assign", "amount": 100, "created_at": _day(0) + "T10:00:00+00:00"}
+    )
+    assert tick()["completed"] == 1
+    assert [r["type"] for r in outbox] == ["goal_completed"]
+
+    conn = sqlite3.connect(sched.state_path)  # the notice went out but the process died before recording it
+    with conn:
+        conn.execute("UPDATE reached SET notified = 0")
+    stats = tick()
+    assert stats["unsent"] == 0 and len(outbox) == 1
+    assert list(conn.execute("SELECT goal_id, notified FROM reached")) == [("g1", 1)]
+    conn.close()
+
+    start = time.time()
+    monkeypatch.setattr(time, "time", lambda: start + 101)  # dedup TTL is over
+    tick()
+    assert len(outbox) == 1
+
+
+def test_lead_of_zero_reminds_on_the_target_date(goals, outbox, monkeypatch):
+    _, tables, _, tick = goals
+    monkeypatch.setattr(gs, "LEAD_DAYS", 0)
+    tables["Goal"][0]["target_date"] = _day(0)
+    stats = tick()
+    assert stats["reminders"] == 1 and stats["expired_reminders"] == 0
+    assert [r["body"] for r in outbox] == ["Reminder: your goal Bike is due today."]
+
+
+def test_reminder_fires_once_on_its_lead_day_and_survives_a_restart(goals, outbox):
+    store, tables, sched, tick = goals
+    tables["Goal"][0]["target_date"] = _day(3)
+    assert tick(TODAY)["reminders"] == 0  # lead 1: due on day 2
+    assert tick(TODAY + datetime.timedelta(days=2))["reminders"] == 1
+    assert outbox[-1]["body"] == "Reminder: your goal Bike is due tomorrow."
+
+    restarted = gs.GoalScheduler(sched.state_path)  # empty heap, same state file
+    stats = asyncio.run(restarted.tick(TODAY + datetime.timedelta(days=2)))
+    assert stats["reminders"] == 0 and len(outbox) == 1
+
+
+def test_edited_or_finished_goals_drop_their_reminders(goals, outbox):
+    _, tables, sched, tick = goals
+    goal = tables["Goal"][0]
+    goal["target_date"] = _day(3)
+    tick(TODAY)
+    goal["target_date"] = _day(5)  # moved: the old event is stale, a new one is pushed
+    assert tick(TODAY + datetime.timedelta(days=2))["reminders"] == 0
+    assert tick(TODAY + datetime.timedelta(days=4))["reminders"] == 1
+
+    tables["Goal"].append(
+        {"goal_id": "g2", "profile_id": "p2", "name": "Car", "target_amount": 10, "target_date": _day(7), "status": "Active"}
+    )
+    tick(TODAY + datetime.timedelta(days=4))
+    tables["Goal"][1]["status"] = "Completed"  # finished before its reminder
+    stats = tick(TODAY + datetime.timedelta(days=6))
+    assert stats["reminders"] == 0
+    assert [r["type"] for r in outbox] == ["goal_reminder", "goal_completed"]
+
+
+def test_first_tick_records_reached_goals_without_a_notice(goals, outbox):
+    _, tables, _, tick = goals
+    tables["Goal"][0]["status"] = "Completed"
+    assert tick()["completed"] == 0
+    assert tick(TODAY + datetime.timedelta(days=1))["completed"] == 0
+    assert outbox == []
+
+
+def test_status_flip_without_a_transfer_completes_the_goal(goals, outbox):
+    _, tables, _, tick = goals
+    tick()
+    tables["Goal"][0]["status"] = "COMPLETED"  # compared case-insensitively
+    assert tick(TODAY + datetime.timedelta(days=1))["completed"] == 1
+    assert [r["type"] for r in outbox] == ["goal_completed"]
@@ -0,0 +1,51 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import llm_client
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """A shared client whose calls take 20ms; returns the peak in-flight counts."""
+    peak = {"all": 0, "now": 0}
+
+    async def create(**kwargs):
+        peak["now"] += 1
+        peak["all"] = max(peak["all"], peak["now"])
+        await asyncio.sleep(0.02)
+        peak["now"] -= 1
+        return SimpleNamespace(usage=None, kwargs=kwargs)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(llm_client, "_client", client)
+    monkeypatch.setattr(llm_client, "_global_limit", None)
+    monkeypatch.setattr(llm_client, "_endpoint_limits", {})
+    return peak
+
+
+def test_endpoint_quota_caps_its_own_calls(fake_openai, monkeypatch):
+    monkeypatch.setitem(llm_client.ENDPOINT_QUOTAS, "receipt", 3)
+
+    async def run():
+        await asyncio.gather(*(llm_client.chat_completion("receipt", model="m") for _ in range(10)))
+
+    asyncio.run(run())
+    assert fake_openai["all"] == 3
+
+
+def test_global_cap_spans_endpoints(fake_openai, monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_MAX_CONCURRENCY", 4)
+
+    async def run():
+        calls = [llm_client.chat_completion(e, model="m") for e in ("chat", "receipt", "dashboard") for _ in range(5)]
+        await asyncio.gather(*calls)
+
+    asyncio.run(run())
+    assert fake_openai["all"] == 4
+
+
+def test_unknown_endpoint_is_rejected(fake_openai):
+    with pytest.raises(ValueError):
+        asyncio.run(llm_client.chat_completion("batch", model="m"))
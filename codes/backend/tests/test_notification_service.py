@@ -0,0 +1,135 @@
+import time
+
+from fastapi import HTTPException
+
+from notifications import notification_service as ns
+from notifications.dedup import ADMIT, DUPLICATE, NotificationGate
+
+
+def _alert(profile_id="p1", category="Food"):
+    return ns.NotificationService.create_budget_alert(profile_id, category, 120, 100, period="2026-10")
+
+
+def test_written_notification_is_delivered(outbox):
+    item = _alert()
+    ns.flush()
+    assert item.outcome == ADMIT and item.written and item.delivered
+    assert [r["type"] for r in outbox] == ["budget_alert"]
+
+
+def test_duplicate_is_delivered_and_not_queued_again(outbox):
+    _alert()
+    ns.flush()
+    again = _alert()
+    ns.flush()
+    assert again.outcome == DUPLICATE
+    assert again.delivered and again.written is None
+    assert len(outbox) == 1
+
+
+def test_rate_limited_returns_none(outbox):
+    items = [_alert(category=f"c{i}") for i in range(4)]
+    ns.flush()
+    assert [i is None for i in items] == [False, False, False, True]
+    assert len(outbox) == 3
+
+
+def test_duplicate_is_admitted_again_after_the_ttl(outbox, monkeypatch):
+    _alert()
+    ns.flush()
+    start = time.time()
+    monkeypatch.setattr(time, "time", lambda: start + 101)
+    assert _alert().outcome == ADMIT  # callers must keep their own record of delivered ones
+
+
+def test_failed_write_releases_the_claim(outbox, monkeypatch):
+    def reject(path, batch):
+        raise HTTPException(409, '{"code": "23503"}')
+
+    monkeypatch.setattr(ns, "sb_post", reject)
+    item = _alert()
+    ns.flush()
+    assert item.written is False and not item.delivered
+    assert ns.GATE.stats()["released"] == 1
+
+    monkeypatch.setattr(ns, "sb_post", lambda path, batch: outbox.extend(batch))
+    retry = _alert()
+    ns.flush()
+    assert retry.outcome == ADMIT and retry.written
+    assert len(outbox) == 1
+
+
+def _items(n):
+    return [ns.QueuedNotification({"profile_id": f"p{i}", "type": "budget_alert"}) for i in range(n)]
+
+
+def test_row_conflict_is_split_down_to_the_bad_row(monkeypatch):
+    calls = []
+
+    def post(path, batch):
+        calls.append(len(batch))
+        if any(r["profile_id"] == "p5" for r in batch):
+            raise HTTPException(409, '{"code": "23503", "message": "violates foreign key constraint"}')
+        return batch
+
+    monkeypatch.setattr(ns, "sb_post", post)
+    failed = ns._insert(_items(8))
+    assert [i.row["profile_id"] for i in failed] == ["p5"]
+    assert len(calls) == 7  # 8, 4+4, 2+2, 1+1
+
+
+def test_schema_error_fails_the_batch_without_splitting(monkeypatch):
+    calls = []
+
+    def post(path, batch):
+        calls.append(len(batch))
+        raise HTTPException(400, '{"code": "PGRST204", "message": "Could not find the \'kind\' column"}')
+
+    monkeypatch.setattr(ns, "sb_post", post)
+    items = _items(8)
+    assert ns._insert(items) == items
+    assert calls == [8]
+
+
+def test_rows_are_written_in_bulk_batches(outbox, monkeypatch):
+    sizes = []
+
+    def post(path, batch):
+        sizes.append(len(batch))
+        outbox.extend(batch)
+        return batch
+
+    monkeypatch.setattr(ns, "GATE", NotificationGate(":memory:", 100, 0, 3600))
+    monkeypatch.setattr(ns, "BATCH_SIZE", 50)
+    monkeypatch.setattr(ns, "sb_post", post)
+    items = [_alert(profile_id=f"p{i}") for i in range(120)]
+    ns.flush()
+    assert all(i.written for i in items) and len(outbox) == 120
+    assert max(sizes) == 50 and len(sizes) < 10  # not a POST per row
+
+
+def test_transient_error_is_retried(outbox, monkeypatch):
+    answers = [HTTPException(503, "upstream"), None]
+
+    def post(path, batch):
+        error = answers.pop(0)
+        if error:
+            raise error
+        outbox.extend(batch)
+        return batch
+
+    monkeypatch.setattr(ns, "sb_post", post)
+    item = _alert()
+    ns.flush()
+    assert item.written and len(outbox) == 1 and answers == []
+
+
+def test_stop_writes_everything_still_queued(outbox):
+    items = [_alert(category=f"c{i}") for i in range(3)]
+    ns.stop_notification_worker()
+    assert all(i.written for i in items) and len(outbox) == 3
+    assert ns._worker is None
+
+    _alert(profile_id="p2")  # the next notification starts the writer again
+    ns.flush()
+    assert len(outbox) == 4
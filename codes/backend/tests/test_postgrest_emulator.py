@@ -0,0 +1,76 @@
+import pytest
+from fastapi import HTTPException
+
+from loadtest.postgrest_emulator import PostgrestError, PostgrestStore, _split_top, build_predicate
+from supabase_rest import sb_post, sbr
+
+ROWS = [
+    {"goal_id": "g1", "name": "Bike", "amount": 100, "status": "Active", "done": False, "note": None},
+    {"goal_id": "g2", "name": "Car, new", "amount": 2500.5, "status": "active", "done": False, "note": "x"},
+    {"goal_id": "g3", "name": "Trip", "amount": 40, "status": "Completed", "done": True, "note": None},
+]
+
+
+def _ids(params):
+    pred = build_predicate(params)
+    return [r["goal_id"] for r in ROWS if pred(r)]
+
+
+def test_split_top_respects_parentheses_and_quotes():
+    assert _split_top('a.eq.1,or(b.eq.2,c.eq.3),d.in.("x,y",z)') == ["a.eq.1", "or(b.eq.2,c.eq.3)", 'd.in.("x,y",z)']
+
+
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ([("amount", "gt.99")], ["g1", "g2"]),
+        ([("amount", "lte.100"), ("done", "is.false")], ["g1"]),
+        ([("name", 'in.("Car, new",Trip)')], ["g2", "g3"]),
+        ([("status", "ilike.active")], ["g1", "g2"]),
+        ([("status", "like.Act*")], ["g1"]),
+        ([("note", "is.null")], ["g1", "g3"]),
+        ([("note", "not.is.null")], ["g2"]),
+        ([("status", "neq.Completed")], ["g1", "g2"]),
+        ([("or", "(amount.lt.50,name.eq.Bike)")], ["g1", "g3"]),
+        ([("and", "(amount.gte.40,or(done.is.true,status.eq.active))")], ["g2", "g3"]),
+        ([("or", "(not.and(amount.gt.50,done.is.false),goal_id.eq.g1)")], ["g1", "g3"]),
+    ],
+)
+def test_filters(params, expected):
+    assert _ids(params) == expected
+
+
+@pytest.mark.parametrize("params", [[("amount", "between.1")], [("note", "is.maybe")], [("or", "amount.eq.1")]])
+def test_bad_filters_are_400(params):
+    with pytest.raises(PostgrestError) as e:
+        build_predicate(params)
+    assert e.value.status == 400 and e.value.code == "PGRST100"
+
+
+def test_select_order_page_and_columns():
+    store = PostgrestStore({"Goal": [dict(r) for r in ROWS]})
+    rows = store.select(
+        "Goal", [("select", "goal_id,note"), ("order", "note.desc,amount.asc"), ("offset", "1"), ("limit", "2")]
+    )
+    assert rows == [{"goal_id": "g1", "note": None}, {"goal_id": "g2", "note": "x"}]  # nulls first for desc
+    with pytest.raises(PostgrestError) as e:
+        store.select("Goal", [("select", "kind")])
+    assert e.value.code == "42703"
+
+
+def test_indexed_lookups_match_a_scan():
+    store = PostgrestStore({"Goal": [dict(r) for r in ROWS]})
+    assert [r["goal_id"] for r in store.select("Goal", [("goal_id", "in.(g3,g1,g9)")])] == ["g3", "g1"]
+    store.insert("Goal", [{"goal_id": "g4", "name": "Shoes"}])
+    assert store.select("Goal", [("goal_id", "eq.g4"), ("select", "name")]) == [{"name": "Shoes"}]
+
+
+def test_served_through_the_shared_helpers(postgrest):
+    store, transport = postgrest({"Goal": [dict(r) for r in ROWS], "Notification": []})
+    assert sbr("Goal", {"select": "goal_id", "status": "eq.Completed"}) == [{"goal_id": "g3"}]
+    sb_post("Notification", [{"profile_id": "p1", "type": "t"}])
+    assert store.tables["Notification"][0]["notification_id"]
+    with pytest.raises(HTTPException) as e:
+        sbr("Nope", {"select": "*"})
+    assert e.value.status_code == 404 and "42P01" in e.value.detail
+    assert transport.stats.snapshot()["by_method"] == {"GET": 2, "POST": 1}
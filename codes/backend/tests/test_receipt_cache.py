@@ -0,0 +1,85 @@
+import time
+import asyncio
+
+import pytest
+
+import receipt_llm
+import receipt_cache
+from receipt_cache import ReceiptCache, cache_key, normalize
+
+DATA = {"merchant": "Panda", "total": 10.5, "items": []}
+
+
+def test_key_ignores_case_width_and_spacing():
+    assert normalize("  PANDA\t Retail \n\n ＴＯＴＡＬ  10.50 ") == "panda retail\ntotal 10.50"
+    assert cache_key("PANDA\nTOTAL 10.50") == cache_key("panda  \n\n total 10.50")
+    assert cache_key("PANDA\nTOTAL 10.50") != cache_key("PANDA\nTOTAL 10.51")
+
+
+def test_get_put_and_ttl(monkeypatch):
+    cache = ReceiptCache(":memory:", 10, 1)
+    assert cache.get("k") is None
+    cache.put("k", DATA)
+    assert cache.get("k") == DATA
+
+    start = time.time()
+    monkeypatch.setattr(time, "time", lambda: start + 86401)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["hits"] == 1
+
+
+def test_prune_keeps_the_most_recently_used(monkeypatch):
+    monkeypatch.setattr(receipt_cache, "PRUNE_EVERY", 3)  # prunes on the 1st and 4th insert
+    clock = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    cache = ReceiptCache(":memory:", 3, 90)
+    for i in range(3):
+        clock[0] += 1
+        cache.put(f"k{i}", {"i": i})
+    clock[0] += receipt_cache.TOUCH_AFTER_SECONDS + 1
+    cache.get("k0")  # used again: now the most recent
+    clock[0] += 1
+    cache.put("k3", {"i": 3})
+    assert [k for k in ("k0", "k1", "k2", "k3") if cache.get(k) is not None] == ["k0", "k2", "k3"]
+    assert cache.evictions == 1
+
+
+@pytest.fixture
+def parser(monkeypatch):
+    """parse_receipt over an in-memory cache and a slow fake parse; returns the parsed texts."""
+    calls = []
+
+    async def slow_parse(text):
+        calls.append(text)
+        await asyncio.sleep(0.05)
+        return dict(DATA)
+
+    monkeypatch.setattr(receipt_llm, "CACHE", ReceiptCache(":memory:", 10, 90))
+    monkeypatch.setattr(receipt_llm, "_parse_uncached", slow_parse)
+    return calls
+
+
+def test_identical_receipts_in_flight_share_one_parse(parser):
+    async def run():
+        results = await asyncio.gather(*(receipt_llm.parse_receipt("PANDA\nTOTAL 10.50") for _ in range(5)))
+        again = await receipt_llm.parse_receipt("panda\ntotal   10.50")  # from the cache now
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert len(parser) == 1
+    assert results == [DATA] * 5 and again == DATA
+    results[0]["total"] = 0  # callers get their own copies
+    assert results[1]["total"] == 10.5
+
+
+def test_waiter_parses_itself_when_the_owner_is_cancelled(parser):
+    async def run():
+        owner = asyncio.create_task(receipt_llm.parse_receipt("PANDA\nTOTAL 10.50"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(receipt_llm.parse_receipt("PANDA\nTOTAL 10.50"))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        return await waiter
+
+    assert asyncio.run(run()) == DATA
+    assert len(parser) == 2
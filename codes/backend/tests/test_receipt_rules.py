@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from conftest import BACKEND_DIR
+from receipt_rules import RULES_MIN_CONFIDENCE, parse_receipt_rules
+
+SAMPLE = BACKEND_DIR / "benchmarks" / "data" / "receipts_sample.jsonl"
+
+
+def test_accepted_sample_receipts_have_the_right_total():
+    samples = [json.loads(line) for line in SAMPLE.read_text(encoding="utf-8").splitlines() if line.strip()]
+    accepted = 0
+    for sample in samples:
+        data, confidence = parse_receipt_rules(sample["ocr_text"])
+        if confidence >= RULES_MIN_CONFIDENCE:
+            accepted += 1
+            assert data["total"] == sample["total"], sample["ocr_text"]
+    assert accepted >= len(samples) // 2  # the fast path has to take most of them to be worth it
+
+
+def test_arabic_digits_and_vat_inclusive_items():
+    data, confidence = parse_receipt_rules("بنده\nحليب 10.00\nخبز 5.00\nالإجمالي ١٧٫٢٥ ر.س\n2026/10/19")
+    assert data["merchant"] == "Panda" and data["date"] == "2026-10-19"
+    assert data["total"] == 17.25 and len(data["items"]) == 2
+    assert confidence == 1.0
+
+
+def test_grand_total_wins_over_subtotal_and_vat():
+    data, _ = parse_receipt_rules(
+        "Jarir Bookstore\nLaptop 1,200.00\nSubtotal 1,200.00\nVAT 180.00\nGrand Total 1,380.00\n2026-10-01"
+    )
+    assert data["total"] == 1380.0
+    assert data["items"] == [{"name": "Laptop", "price": 1200.0}]
+
+
+def test_refund_is_an_earning():
+    data, _ = parse_receipt_rules("Panda\nRefund\nMilk 10.00\nTOTAL SAR 10.00\n19-10-2026")
+    assert data["type"] == "earning" and data["date"] == "2026-10-19"
+
+
+@pytest.mark.parametrize("text", ["hello world", "", "Cafe Nice\n25.50 الإجمالي"])
+def test_weak_parses_go_to_the_llm(text):
+    data, confidence = parse_receipt_rules(text)
+    assert confidence < RULES_MIN_CONFIDENCE
+    assert set(data) == {"merchant", "date", "items", "total", "currency", "type"}
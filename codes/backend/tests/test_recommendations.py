@@ -0,0 +1,40 @@
+import asyncio
+import datetime
+
+import recommendations
+
+
+def _tx(i, date, type_, amount=10.0):
+    return {
+        "transaction_id": f"t{i:03d}",
+        "profile_id": "p1",
+        "date": date,
+        "type": type_,
+        "amount": amount,
+        "category_id": None,
+    }
+
+
+def test_activity_counts_every_transaction_since_the_window_start(postgrest):
+    today = datetime.date.today()
+    old = (today - datetime.timedelta(days=400)).isoformat()
+    future = (today + datetime.timedelta(days=3)).isoformat()
+    rows = [
+        _tx(0, old, "expense"),  # before the window: not counted
+        _tx(1, today.isoformat(), "expense"),
+        _tx(2, today.isoformat(), "Earning"),
+        _tx(3, today.isoformat(), "income"),
+        _tx(4, today.isoformat(), "transfer"),  # unknown type still counts
+        _tx(5, future, "expense"),  # future-dated still counts
+    ]
+    # more than one page, as the old first-page-only query would have missed
+    rows += [_tx(100 + i, today.isoformat(), "expense") for i in range(1500)]
+    tables = ["User_Profile", "Monthly_Financial_Record", "Category", "Fixed_Income", "Fixed_Expense", "Goal"]
+    postgrest({**{t: [] for t in tables}, "Transaction": rows})
+
+    ctx = asyncio.run(recommendations.fetch_user_recommendation_context("p1"))
+    activity = recommendations.build_daily_recommendation_signals(ctx)["activity"]
+
+    assert activity["transaction_count_last_months"] == 5 + 1500
+    assert activity["expense_transaction_count"] == 2 + 1500
+    assert activity["earning_transaction_count"] == 1
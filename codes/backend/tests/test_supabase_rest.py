@@ -0,0 +1,23 @@
+import asyncio
+import threading
+
+import supabase_rest
+from supabase_rest import asbr, run_sync
+
+
+async def _client_of_this_loop():
+    await asbr("Goal", {"select": "goal_id"})
+    return supabase_rest._async_clients[asyncio.get_running_loop()]
+
+
+def test_run_sync_reuses_one_loop_and_client_per_thread(postgrest):
+    postgrest({"Goal": [{"goal_id": "g1"}]})
+    first = run_sync(_client_of_this_loop())
+    assert run_sync(_client_of_this_loop()) is first
+    assert run_sync(asbr("Goal", {"select": "goal_id"})) == [{"goal_id": "g1"}]
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(run_sync(_client_of_this_loop())))
+    t.start()
+    t.join()
+    assert other[0] is not first
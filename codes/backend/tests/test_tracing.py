@@ -0,0 +1,31 @@
+import json
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+import tracing
+from tracing import span
+
+
+def test_streamed_response_keeps_its_trace_open_until_the_body_is_sent(monkeypatch):
+    async def parse(texts, concurrency, item_timeout):
+        for i, text in enumerate(texts):
+            with span("receipt.parse", index=i):
+                await asyncio.sleep(0.01)
+            yield {"index": i, "ok": True, "data": {"text": text}, "ms": 10}
+
+    monkeypatch.setattr(main, "parse_receipts_stream", parse)
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracing, "BUFFER", tracing.TraceBuffer(10))
+
+    r = TestClient(main.app).post(
+        "/receipt/preprocess/bulk", json={"ocr_texts": ["a", "b", "c"]}, headers={"x-request-id": "bulk-1"}
+    )
+    assert json.loads(r.text.splitlines()[-1])["ok"] == 3
+
+    trace = tracing.BUFFER.get("bulk-1")
+    assert trace["name"] == "POST /receipt/preprocess/bulk"
+    parses = [s for s in trace["spans"] if s["name"] == "receipt.parse"]
+    assert len(parses) == 3
+    assert all(s["start_ms"] + s["duration_ms"] <= trace["duration_ms"] for s in parses)
@@ -0,0 +1,227 @@
+# backend/tracing.py
+"""
+Lightweight per-request tracing.
+
+A trace is started per HTTP request (see main.observe_request) and spans nest
+through contextvars, so they follow awaits, asyncio.gather children and
+run_in_threadpool calls without passing anything around:
+
+    with span("supabase.GET", table="Goal") as s:
+        rows = ...
+        s.set(rows=len(rows))
+
+Finished traces are tail-sampled: slow (>= TRACE_SLOW_MS) and failed
+requests are always kept in the `slow` ring buffer, the rest land in the
+`recent` buffer at TRACE_SAMPLE_RATE. Kept traces are also appended to
+TRACE_FILE (JSON lines) when it is set, by the logs listener thread (see
+logs.setup_logging), never on the event loop. GET /admin/traces reads the
+buffers.
+"""
+import os
+import re
+import time
+import uuid
+import random
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.05"))
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "3000"))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+TRACE_FILE = os.getenv("TRACE_FILE", "").strip()
+# a runaway loop must not grow one trace without bound
+MAX_SPANS_PER_TRACE = 512
+# kept traces are logged here; logs.setup_logging routes them to TRACE_FILE
+TRACE_LOGGER = "surra.traces"
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attrs", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.error: Optional[str] = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def to_dict(self, t0: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ms": round((self.start - t0) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Returned by span() outside a trace (scripts, background loops)."""
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Trace:
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.deferred = False
+        self._lock = threading.Lock()
+
+    def add(self, s: Span) -> bool:
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS_PER_TRACE:
+                self.dropped += 1
+                return False
+            self.spans.append(s)
+            return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        root = self.spans[0]
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "started_at": self.started_at,
+            "duration_ms": round(root.duration_ms, 3),
+            "error": root.error,
+            "attrs": root.attrs,
+            "dropped_spans": self.dropped,
+            "spans": [s.to_dict(root.start) for s in self.spans],
+        }
+
+
+_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+
+
+def request_id(incoming: Optional[str] = None) -> str:
+    """Reuse a caller's X-Request-ID when it is sane, otherwise mint one."""
+    if incoming and _REQUEST_ID_RE.match(incoming):
+        return incoming
+    return uuid.uuid4().hex
+
+
+def current_trace_id() -> Optional[str]:
+    t = _trace.get()
+    return t.trace_id if t else None
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Any]:
+    trace = _trace.get()
+    if trace is None:
+        yield _NOOP
+        return
+    parent = _span.get()
+    s = Span(name, parent.span_id if parent else None, attrs)
+    if not trace.add(s):
+        yield _NOOP
+        return
+    token = _span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end = time.perf_counter()
+        _span.reset(token)
+
+
+@contextmanager
+def start_trace(name: str, trace_id: str, **attrs: Any) -> Iterator[Span]:
+    """Root span for one request; the trace is sampled and exported on exit (see defer_trace)."""
+    trace = Trace(trace_id)
+    t_token = _trace.set(trace)
+    try:
+        with span(name, **attrs) as root:
+            yield root
+    finally:
+        _trace.reset(t_token)
+        if not trace.deferred:
+            BUFFER.finish(trace)
+
+
+def defer_trace() -> Callable[[Optional[BaseException]], None]:
+    """
+    Keep the current trace open past start_trace's exit, for a response body
+    that is produced afterwards (streaming). Call the result when the body is
+    done: it ends the root span and exports the trace.
+    """
+    trace = _trace.get()
+    if trace is None:
+        return lambda error=None: None
+    trace.deferred = True
+
+    def finish(error: Optional[BaseException] = None) -> None:
+        root = trace.spans[0]
+        root.end = time.perf_counter()
+        if error is not None and root.error is None:
+            root.error = f"{type(error).__name__}: {error}"
+        BUFFER.finish(trace)
+
+    return finish
+
+
+# ---------- Export ----------
+class TraceBuffer:
+    def __init__(self, size: int, export: bool = False):
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self.slow: Deque[Dict[str, Any]] = deque(maxlen=size)
+        self.export = export
+        self._lock = threading.Lock()
+        self._log = logging.getLogger(TRACE_LOGGER)
+
+    def finish(self, trace: Trace) -> None:
+        root = trace.spans[0]
+        outlier = root.duration_ms >= TRACE_SLOW_MS or root.error is not None or root.attrs.get("status", 0) >= 500
+        if not outlier and random.random() >= TRACE_SAMPLE_RATE:
+            return
+        data = trace.to_dict()
+        with self._lock:
+            (self.slow if outlier else self.recent).append(data)
+        if self.export:
+            self._log.info(data)  # queued; the file write happens on the listener thread
+
+    def list(self, kind: str = "slow", limit: int = 20) -> List[Dict[str, Any]]:
+        source = self.slow if kind == "slow" else self.recent
+        with self._lock:
+            items = list(source)[-limit:]
+        return [
+            {k: t[k] for k in ("trace_id", "name", "started_at", "duration_ms", "error")} | {"spans": len(t["spans"])}
+            for t in reversed(items)
+        ]
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for source in (self.slow, self.recent):
+                for t in source:
+                    if t["trace_id"] == trace_id:
+                        return t
+        return None
+
+
+BUFFER = TraceBuffer(TRACE_BUFFER_SIZE, export=bool(TRACE_FILE))